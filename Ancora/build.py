@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 """Build the Ancora property analysis dashboard."""
+import argparse
 import sys
 import os
 
@@ -10,16 +11,54 @@ from src.build_data import extract_all
 from src.build_html import generate_dashboard
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--split", action="store_true",
+        help="hosted build: per-tab datasets and code chunks as separate hashed files "
+             "loaded on demand, vendored CDN libraries and an offline service worker "
+             "(default: single self-contained HTML, e.g. for emailing)",
+    )
+    parser.add_argument(
+        "--embed-images", action="store_true",
+        help="inline property photos as base64 instead of writing resized, "
+             "lazy-loaded files to dashboard/img/ (for offline emailing)",
+    )
+    parser.add_argument(
+        "--compact", action="store_true",
+        help="encode datasets in the columnar, minified schema (src/compact.py) "
+             "that the dashboard expands on load",
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="re-run only the extractors whose Data_* folders (or code) changed "
+             "since the last build and reuse data_output/ for the rest (deploy.py)",
+    )
+    parser.add_argument(
+        "--minify", dest="minify", action="store_true", default=None,
+        help="minify the template's CSS/JS in a single-file build too "
+             "(split builds are minified by default)",
+    )
+    parser.add_argument(
+        "--no-minify", dest="minify", action="store_false",
+        help="keep the template's CSS/JS unminified (for debugging in the browser)",
+    )
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
+
     print("=" * 60)
     print("Ancora - Property Analysis Dashboard Builder")
     print("=" * 60)
 
     print("\nStep 1: Extracting data from source files...")
-    extract_all()
+    extract_all(incremental=args.incremental)
 
     print("\nStep 2: Generating dashboard HTML...")
-    generate_dashboard()
+    generate_dashboard(split=args.split, embed_images=args.embed_images,
+                       compact=args.compact, minify=args.minify)
 
     print("\n" + "=" * 60)
     print("Done! Open dashboard/index.html in a browser.")
@@ -0,0 +1,121 @@
+"""Content-hashed static assets written next to the dashboard HTML."""
+import glob
+import gzip
+import hashlib
+import json
+import os
+import re
+from src.config import DASHBOARD_DIR
+
+# Text formats worth precompressing; images are already compressed
+COMPRESSIBLE_EXTS = (".html", ".json", ".js", ".css", ".svg", ".txt")
+COMPRESSED_SUFFIXES = (".gz", ".br")
+HASHED_NAME_RE = re.compile(r"^(?P<stem>.+)\.(?P<hash>[0-9a-f]{10})\.(?P<ext>[A-Za-z0-9]+)$")
+
+
+def content_hash(data, length=10):
+    """Short SHA-256 digest of ``data`` used in cache-busting filenames."""
+    return hashlib.sha256(data).hexdigest()[:length]
+
+
+def dataset_version(doc):
+    """Version of a dataset as the API reports it (api/store.py at the repo root).
+
+    Both sides hash the canonical JSON, so the build can tell the dashboard
+    which server version its inline data corresponds to.
+    """
+    payload = json.dumps(doc, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return content_hash(payload.encode("utf-8"), 16)
+
+
+def write_hashed(subdir, stem, ext, data):
+    """Write ``data`` to dashboard/<subdir>/<stem>.<hash>.<ext>.
+
+    Older builds of the same asset are removed so the directory only holds
+    what the current HTML references. Returns the path relative to the
+    dashboard directory, with forward slashes, for use as a URL.
+    """
+    out_dir = os.path.join(DASHBOARD_DIR, subdir)
+    os.makedirs(out_dir, exist_ok=True)
+    filename = f"{stem}.{content_hash(data)}.{ext}"
+
+    for stale in glob.glob(os.path.join(out_dir, f"{stem}.*.{ext}")):
+        if os.path.basename(stale) != filename:
+            for path in [stale] + [stale + suffix for suffix in COMPRESSED_SUFFIXES]:
+                if os.path.exists(path):
+                    os.remove(path)
+
+    filepath = os.path.join(out_dir, filename)
+    if not os.path.exists(filepath):
+        with open(filepath, "wb") as f:
+            f.write(data)
+    return f"{subdir}/{filename}"
+
+
+def precompress(filepath, brotli=None):
+    """Write .gz (and .br when the brotli module is given) next to a file.
+
+    Hashed files never change, so existing siblings are kept; unhashed
+    files such as index.html are recompressed every build. Returns the
+    compressed sizes keyed by encoding.
+    """
+    with open(filepath, "rb") as f:
+        data = f.read()
+    immutable = HASHED_NAME_RE.match(os.path.basename(filepath)) is not None
+    sizes = {}
+    encoders = [("gzip", ".gz", lambda d: gzip.compress(d, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        encoders.append(("br", ".br", lambda d: brotli.compress(d, quality=11)))
+    for encoding, suffix, compress in encoders:
+        target = filepath + suffix
+        if not (immutable and os.path.exists(target)):
+            with open(target, "wb") as f:
+                f.write(compress(data))
+        sizes[encoding] = os.path.getsize(target)
+    return sizes
+
+
+def publish_assets():
+    """Precompress every text artifact and write dashboard/manifest.json.
+
+    The manifest maps logical names (``data/leasing.json``) to the hashed
+    files currently on disk, plus the uncompressed/compressed sizes, so
+    deploy tooling and the service worker know what is immutable.
+    """
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+        print("  [assets] brotli not available, writing gzip only.")
+
+    manifest = {"files": {}, "entry": "index.html"}
+    total = {"raw": 0, "gzip": 0, "br": 0}
+    for root, _dirs, files in os.walk(DASHBOARD_DIR):
+        for name in sorted(files):
+            if name.endswith(COMPRESSED_SUFFIXES) or name == "manifest.json":
+                continue
+            filepath = os.path.join(root, name)
+            rel = os.path.relpath(filepath, DASHBOARD_DIR).replace(os.sep, "/")
+            match = HASHED_NAME_RE.match(name)
+            logical = rel
+            if match:
+                logical = os.path.dirname(rel) + "/" + f"{match['stem']}.{match['ext']}"
+                logical = logical.lstrip("/")
+            entry = {"file": rel, "bytes": os.path.getsize(filepath), "immutable": bool(match)}
+            if name.endswith(COMPRESSIBLE_EXTS):
+                entry.update(precompress(filepath, brotli))
+            manifest["files"][logical] = entry
+            total["raw"] += entry["bytes"]
+            total["gzip"] += entry.get("gzip", entry["bytes"])
+            total["br"] += entry.get("br", entry.get("gzip", entry["bytes"]))
+
+    payload = json.dumps(manifest, indent=2, ensure_ascii=False).encode("utf-8")
+    manifest_path = os.path.join(DASHBOARD_DIR, "manifest.json")
+    with open(manifest_path, "wb") as f:
+        f.write(payload)
+    precompress(manifest_path, brotli)
+
+    print(f"  -> Published {len(manifest['files'])} assets: "
+          f"{total['raw'] / 1024:.0f} KB raw, {total['gzip'] / 1024:.0f} KB gzip"
+          + (f", {total['br'] / 1024:.0f} KB brotli" if brotli else ""))
+    return manifest
@@ -1,8 +1,13 @@
 """Orchestrate all data extractors and write JSON output files."""
+import hashlib
 import json
 import os
 import re
-from src.config import DATA_OUTPUT, PROPERTY
+from src.config import (
+    DATA_BUDGET, DATA_COMPS, DATA_FINANCIALS, DATA_LEASING, DATA_MARKETING,
+    DATA_MINUTES, DATA_OUTPUT, DATA_PROJECT_INFO, PROJECT_ROOT, PROPERTY, WAREHOUSE_DB,
+)
+from src import portfolio, variance, warehouse
 
 
 def write_json(filepath, data):
@@ -13,6 +18,48 @@ def write_json(filepath, data):
     print(f"  -> Wrote: {os.path.basename(filepath)}")
 
 
+def read_json(filepath):
+    """Load a JSON output file; {} when it has not been written yet."""
+    try:
+        with open(filepath, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+# Extraction state for incremental builds: step name -> input fingerprint
+BUILD_STATE = os.path.join(DATA_OUTPUT, ".build_state.json")
+# Editing any extractor or the config re-runs every step
+CODE_INPUTS = [os.path.join(PROJECT_ROOT, "src")]
+
+
+def fingerprint(paths):
+    """Digest of the relative path, size and mtime of every file under ``paths``.
+
+    No file is read, so this is cheap enough to run for every step on every
+    build. deploy.py keeps mtimes when it copies files, so folders a deploy
+    did not touch keep their fingerprint on the server.
+    """
+    digest = hashlib.sha256()
+    for top in paths:
+        digest.update(f"{os.path.basename(top)}\0".encode("utf-8"))
+        for root, dirs, files in os.walk(top):
+            dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+            for name in sorted(files):
+                stat = os.stat(os.path.join(root, name))
+                rel = os.path.relpath(os.path.join(root, name), top)
+                digest.update(f"{rel}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def _load_build_state():
+    try:
+        with open(BUILD_STATE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
 def _build_strategy_summary(actions, ap_summary):
     """Categorize all actions into strategic summary buckets.
 
@@ -189,84 +236,125 @@ def _summarize_category(cat_name, items, ap_summary):
     return f"{len(items)} action(s)."
 
 
-def extract_all():
-    """Run all extractors and write output JSON files."""
+def extract_all(incremental=False):
+    """Run all extractors and write output JSON files.
+
+    With ``incremental``, steps whose input folders (and the extractor code)
+    are unchanged since the last build keep their previous output.
+    """
     from src.extractors import leasing, budget, financials, minutes, emails, action_plan, comps, loan_info, companions
 
+    previous = _load_build_state() if incremental else {}
+    state = {}
+
+    def changed(name, inputs, outputs):
+        state[name] = fingerprint(CODE_INPUTS + inputs)
+        if previous.get(name) == state[name] and all(
+                os.path.exists(os.path.join(DATA_OUTPUT, o)) for o in outputs):
+            print(f"  -> Unchanged, keeping {', '.join(outputs)}")
+            return False
+        return True
+
     # 1. Property info (static)
     print("\n[1/8] Property Info...")
     write_json(os.path.join(DATA_OUTPUT, "property_info.json"), PROPERTY)
 
     # 2. Budget
     print("\n[2/8] Budget Data...")
-    budget_data = budget.extract()
-    write_json(os.path.join(DATA_OUTPUT, "budget_monthly.json"), budget_data)
+    if changed("budget", [DATA_BUDGET], ["budget_monthly.json"]):
+        budget_data = budget.extract()
+        write_json(os.path.join(DATA_OUTPUT, "budget_monthly.json"), budget_data)
 
     # 3. Leasing
     print("\n[3/8] Leasing Data...")
-    leasing_data = leasing.extract()
-    write_json(os.path.join(DATA_OUTPUT, "leasing_weekly.json"), leasing_data)
+    if changed("leasing", [DATA_LEASING], ["leasing_weekly.json"]):
+        leasing_data = leasing.extract()
+        write_json(os.path.join(DATA_OUTPUT, "leasing_weekly.json"), leasing_data)
 
     # 4. Financial Actuals
     print("\n[4/8] Financial Actuals...")
-    financials_data = financials.extract()
-    write_json(os.path.join(DATA_OUTPUT, "financials_monthly.json"), financials_data)
+    if changed("financials", [DATA_FINANCIALS], ["financials_monthly.json"]):
+        financials_data = financials.extract()
+        write_json(os.path.join(DATA_OUTPUT, "financials_monthly.json"), financials_data)
 
     # 5. Actions Log (combined from minutes, emails, action plan)
     print("\n[5/8] Actions Log...")
-    all_actions = []
-
-    minutes_actions = minutes.extract()
-    all_actions.extend(minutes_actions)
-
-    email_actions = emails.extract()
-    all_actions.extend(email_actions)
-
-    ap_actions, ap_summary = action_plan.extract()
-    all_actions.extend(ap_actions)
-
-    # Sort by date
-    all_actions.sort(key=lambda a: a.get("date", ""))
-
-    # Build strategy summary
-    strategy_summary = _build_strategy_summary(all_actions, ap_summary)
-
-    # Top-level property goal
-    top_goal = {
-        "goal": "Lease-Up Goal: Achieve 95% Stabilized Occupancy (~210 units)",
-        "target_value": 95.0,
-        "metric": "occupancy_pct",
-        "date_set": "2026-02-10",
-        "deadline": "November 2026",
-        "source": "Meeting Minutes (Feb 10, 2026)",
-    }
-
-    actions_data = {
-        "actions": all_actions,
-        "action_plan_summary": ap_summary,
-        "strategy_summary": strategy_summary,
-        "top_goal": top_goal,
-    }
-    write_json(os.path.join(DATA_OUTPUT, "actions_log.json"), actions_data)
+    if changed("actions", [DATA_MINUTES, DATA_MARKETING], ["actions_log.json"]):
+        all_actions = []
+
+        minutes_actions = minutes.extract()
+        all_actions.extend(minutes_actions)
+
+        email_actions = emails.extract()
+        all_actions.extend(email_actions)
+
+        ap_actions, ap_summary = action_plan.extract()
+        all_actions.extend(ap_actions)
+
+        # Sort by date
+        all_actions.sort(key=lambda a: a.get("date", ""))
+
+        # Build strategy summary
+        strategy_summary = _build_strategy_summary(all_actions, ap_summary)
+
+        # Top-level property goal
+        top_goal = {
+            "goal": "Lease-Up Goal: Achieve 95% Stabilized Occupancy (~210 units)",
+            "target_value": 95.0,
+            "metric": "occupancy_pct",
+            "date_set": "2026-02-10",
+            "deadline": "November 2026",
+            "source": "Meeting Minutes (Feb 10, 2026)",
+        }
+
+        actions_data = {
+            "actions": all_actions,
+            "action_plan_summary": ap_summary,
+            "strategy_summary": strategy_summary,
+            "top_goal": top_goal,
+        }
+        write_json(os.path.join(DATA_OUTPUT, "actions_log.json"), actions_data)
 
     # 6. Comps
     print("\n[6/8] Comparable Properties...")
-    comps_data = comps.extract()
-    write_json(os.path.join(DATA_OUTPUT, "comps.json"), comps_data)
+    if changed("comps", [DATA_COMPS], ["comps.json"]):
+        comps_data = comps.extract()
+        write_json(os.path.join(DATA_OUTPUT, "comps.json"), comps_data)
 
     # 7. Loan Info
     print("\n[7/8] Loan Info...")
-    loan_data = loan_info.extract()
-    write_json(os.path.join(DATA_OUTPUT, "loan_info.json"), loan_data)
+    if changed("loan_info", [], ["loan_info.json"]):
+        loan_data = loan_info.extract()
+        write_json(os.path.join(DATA_OUTPUT, "loan_info.json"), loan_data)
 
     # 8. Companion Properties
     print("\n[8/8] Companion Properties...")
-    companion_data = companions.extract()
-    write_json(os.path.join(DATA_OUTPUT, "companions.json"), companion_data)
+    if changed("companions", [], ["companions.json"]):
+        companion_data = companions.extract()
+        write_json(os.path.join(DATA_OUTPUT, "companions.json"), companion_data)
 
     # 9. Images (encode property photos as base64)
     print("\n[Bonus] Property Images...")
-    _encode_images()
+    if changed("images", [DATA_PROJECT_INFO], ["images_b64.json"]):
+        _encode_images()
+
+    # Budget vs. actual, from the budget and T-12 outputs (kept or fresh);
+    # no spreadsheet is read, so it is simply recomputed on every build
+    print("\nBudget vs. Actual...")
+    variance_data = variance.compute(read_json(os.path.join(DATA_OUTPUT, "budget_monthly.json")),
+                                     read_json(os.path.join(DATA_OUTPUT, "financials_monthly.json")))
+    write_json(os.path.join(DATA_OUTPUT, "variance.json"), variance_data)
+    print(f"  -> {len(variance_data['lines'])} lines, actuals through {variance_data.get('as_of') or 'none yet'}")
+
+    with open(BUILD_STATE, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+
+    # Every extracted fact, for cross-week / cross-property queries
+    counts = warehouse.store_outputs()
+    print(f"  -> Loaded {sum(counts.values())} rows into {os.path.basename(WAREHOUSE_DB)}")
+    summary = portfolio.update()["portfolio"]
+    print(f"  -> Portfolio: {summary['properties']} properties, {summary['units']} units, "
+          f"occupancy {summary['occupancy_pct']}%, DSCR {summary['dscr']}")
 
     print(f"\nAll data extracted to {DATA_OUTPUT}/")
 
@@ -274,50 +362,22 @@ def extract_all():
 def _encode_images():
     """Encode selected property photos as base64 for embedding in dashboard."""
     import base64
-    import glob as glob_mod
-    from src.config import DATA_PROJECT_INFO, DATA_OUTPUT
+    from src.config import DATA_OUTPUT
+    from src.images import select_originals
 
-    images_dir = os.path.join(DATA_PROJECT_INFO, "web res")
-    if not os.path.exists(images_dir):
-        print("  [images] No web res directory found.")
+    originals = select_originals()
+    if not originals:
+        print("  [images] No property photos found.")
         write_json(os.path.join(DATA_OUTPUT, "images_b64.json"), {})
         return
 
-    jpg_files = sorted(glob_mod.glob(os.path.join(images_dir, "*.jpg")))
-    if not jpg_files:
-        jpg_files = sorted(glob_mod.glob(os.path.join(images_dir, "*.JPG")))
-
-    if not jpg_files:
-        print("  [images] No JPG files found.")
-        write_json(os.path.join(DATA_OUTPUT, "images_b64.json"), {})
-        return
-
-    # Select up to 5 representative images (spread evenly)
-    n = len(jpg_files)
-    if n <= 5:
-        selected = jpg_files
-    else:
-        # Pick evenly spaced images
-        indices = [0, n // 4, n // 2, 3 * n // 4, n - 1]
-        selected = [jpg_files[i] for i in indices]
-
     images_data = {}
-    for i, filepath in enumerate(selected):
+    for key, filepath in originals.items():
+        mime = "image/png" if filepath.lower().endswith(".png") else "image/jpeg"
         with open(filepath, "rb") as f:
             b64 = base64.b64encode(f.read()).decode("utf-8")
-        key = f"property_{i + 1}"
-        images_data[key] = f"data:image/jpeg;base64,{b64}"
+        images_data[key] = f"data:{mime};base64,{b64}"
         print(f"  [images] Encoded: {os.path.basename(filepath)} -> {key}")
 
-    # Use a specific atmospheric photo for login background
-    login_bg_file = os.path.join(images_dir, "I64A1832-Edit-2.jpg")
-    if os.path.exists(login_bg_file):
-        with open(login_bg_file, "rb") as f:
-            b64 = base64.b64encode(f.read()).decode("utf-8")
-        images_data["login_bg"] = f"data:image/jpeg;base64,{b64}"
-        print(f"  [images] Encoded: I64A1832-Edit-2.jpg -> login_bg (golden lounge)")
-    elif "property_1" in images_data:
-        images_data["login_bg"] = images_data["property_1"]
-
     write_json(os.path.join(DATA_OUTPUT, "images_b64.json"), images_data)
     print(f"  [images] Total images encoded: {len(images_data)}")
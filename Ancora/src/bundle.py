@@ -0,0 +1,286 @@
+"""Minify the dashboard template and split its script into per-tab chunks.
+
+The template's main <script> marks tab-specific code with line comments::
+
+    // @chunk leasing
+    function renderLeasing() { ... }
+    // @endchunk
+
+In split builds each chunk becomes its own content-hashed file under
+dashboard/js/ and the core script gets a small forwarding stub for every
+top-level function in it: the first call loads the chunk, whose real
+declarations then replace the stubs. Single-file builds keep the chunk
+code inline. Placeholder comments (/* __NAME__ */) survive minification
+and are filled in chunks the same way as in the page.
+
+The minifier is deliberately conservative: it drops comments, indentation
+and blank lines and squeezes spaces around punctuation, but keeps line
+breaks (so automatic semicolon insertion is unaffected) and never touches
+string, template or regex literals.
+"""
+import re
+
+PLACEHOLDER_RE = re.compile(r"/\* __([A-Z0-9_]+)__ \*/")
+CHUNK_START_RE = re.compile(r"^[ \t]*// @chunk ([a-z0-9_]+)[ \t]*$")
+CHUNK_END_RE = re.compile(r"^[ \t]*// @endchunk[ \t]*$")
+FUNCTION_DECL_RE = re.compile(r"^(?:async\s+)?function\s+([A-Za-z_$][\w$]*)\s*\(", re.M)
+INLINE_SCRIPT_RE = re.compile(r"(<script>)(.*?)(</script>)", re.S)
+STYLE_RE = re.compile(r"(<style>)(.*?)(</style>)", re.S)
+CSS_TOKEN_RE = re.compile(r"\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*'|/\*.*?\*/", re.S)
+
+# After these keywords a "/" starts a regex literal rather than a division
+REGEX_KEYWORDS = {"return", "typeof", "instanceof", "in", "of", "new", "delete", "void",
+                  "throw", "case", "do", "else", "yield", "await"}
+# Spaces next to these are never needed in CSS; ":" only loses the space after
+# it, since "a :hover" != "a:hover"
+CSS_PUNCT = "{};,>"
+
+
+def _is_word(ch):
+    return ch.isalnum() or ch in "_$" or ord(ch) > 127
+
+
+def _join(prev, nxt):
+    """Whether a space is required between two adjacent JS characters."""
+    if _is_word(prev) and _is_word(nxt):
+        return True
+    # a + +b, a - -b, a / /re/, /re/ in x
+    return prev == nxt and prev in "+-/" or prev == "/" and _is_word(nxt)
+
+
+class _JsMinifier:
+    """Single pass over JS source, tracking literals, comments and nesting."""
+
+    def __init__(self, src):
+        self.src = src
+        self.out = []
+        self.i = 0
+        self.pending = ""       # whitespace seen since the last token: "", " " or "\n"
+        self.last = ""          # last significant token (for regex detection)
+        self.braces = []        # open "{" inside template ${...}: True marks the ${ itself
+
+    def emit(self, text, token=None):
+        if self.pending and self.out:
+            prev = self.out[-1][-1]
+            if self.pending == "\n":
+                self.out.append("\n")
+            elif _join(prev, text[0]):
+                self.out.append(" ")
+        self.pending = ""
+        self.out.append(text)
+        self.last = token if token is not None else text
+
+    def regex_allowed(self):
+        last = self.last
+        if not last:
+            return True
+        if _is_word(last[-1]):
+            return last in REGEX_KEYWORDS
+        return last not in (")", "]", "}")
+
+    def read_quoted(self, quote):
+        start, src = self.i, self.src
+        self.i += 1
+        while self.i < len(src) and src[self.i] != quote:
+            if src[self.i] == "\\":
+                self.i += 1
+            elif src[self.i] == "\n":
+                break  # unterminated; leave the rest to the browser
+            self.i += 1
+        self.i += 1
+        return src[start:self.i]
+
+    def read_regex(self):
+        start, src = self.i, self.src
+        self.i += 1
+        in_class = False
+        while self.i < len(src):
+            ch = src[self.i]
+            if ch == "\\":
+                self.i += 1
+            elif ch == "[":
+                in_class = True
+            elif ch == "]":
+                in_class = False
+            elif ch == "/" and not in_class:
+                break
+            elif ch == "\n":
+                break
+            self.i += 1
+        self.i += 1
+        while self.i < len(src) and _is_word(src[self.i]):
+            self.i += 1  # flags
+        return src[start:self.i]
+
+    def read_template_part(self):
+        """Copy template text up to and including the closing ` or the next ${."""
+        start, src = self.i, self.src
+        while self.i < len(src):
+            ch = src[self.i]
+            if ch == "\\":
+                self.i += 2
+                continue
+            if ch == "`":
+                self.i += 1
+                return src[start:self.i], False
+            if src.startswith("${", self.i):
+                self.i += 2
+                return src[start:self.i], True
+            self.i += 1
+        return src[start:], False
+
+    def run(self):
+        src = self.src
+        while self.i < len(src):
+            ch = src[self.i]
+            if ch in " \t\r":
+                self.pending = self.pending or " "
+                self.i += 1
+            elif ch == "\n":
+                self.pending = "\n"
+                self.i += 1
+            elif src.startswith("//", self.i):
+                end = src.find("\n", self.i)
+                self.i = len(src) if end == -1 else end
+            elif src.startswith("/*", self.i):
+                end = src.find("*/", self.i + 2)
+                end = len(src) if end == -1 else end + 2
+                comment = src[self.i:end]
+                self.i = end
+                if PLACEHOLDER_RE.fullmatch(comment):
+                    self.emit(comment, token="0")  # placeholder stands in for a value
+                elif "\n" in comment:
+                    self.pending = "\n"
+                else:
+                    self.pending = self.pending or " "
+            elif ch in "'\"":
+                self.emit(self.read_quoted(ch), token="0")
+            elif ch == "`":
+                self.i += 1
+                self.template("`")
+            elif ch == "/" and self.regex_allowed():
+                self.emit(self.read_regex(), token="0")
+            elif _is_word(ch):
+                start = self.i
+                while self.i < len(src) and _is_word(src[self.i]):
+                    self.i += 1
+                self.emit(src[start:self.i])
+            elif ch == "{":
+                self.braces.append(False)
+                self.i += 1
+                self.emit(ch)
+            elif ch == "}" and self.braces and self.braces[-1]:
+                self.braces.pop()
+                self.i += 1
+                self.template("}")
+            else:
+                if ch == "}" and self.braces:
+                    self.braces.pop()
+                self.i += 1
+                self.emit(ch)
+        return "".join(self.out)
+
+    def template(self, opener):
+        """Emit template text starting after ``opener`` (a backtick or the } closing ${)."""
+        text, expr = self.read_template_part()
+        self.emit(opener + text, token="0")
+        if expr:
+            self.braces.append(True)
+            self.last = "{"
+
+
+def minify_js(src):
+    """Strip comments and redundant whitespace from JS, keeping line breaks."""
+    return _JsMinifier(src).run()
+
+
+def minify_css(src):
+    """Strip comments and redundant whitespace from CSS."""
+    out, code = [], []
+    pos = 0
+    for m in CSS_TOKEN_RE.finditer(src):
+        code.append(src[pos:m.start()])
+        token = m.group(0)
+        if token.startswith("/*") and not PLACEHOLDER_RE.fullmatch(token):
+            code.append(" ")
+        else:
+            out.append(_squeeze_css("".join(code)))
+            out.append(token)
+            code = []
+        pos = m.end()
+    code.append(src[pos:])
+    out.append(_squeeze_css("".join(code)))
+    return "".join(out).strip()
+
+
+def _squeeze_css(text):
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r" ?([%s]) ?" % re.escape(CSS_PUNCT), r"\1", text)
+    text = text.replace(": ", ":")
+    return text.replace(";}", "}")
+
+
+def split_chunks(script):
+    """Separate ``// @chunk`` sections from the core script.
+
+    Returns (core, chunks) where chunks maps name -> source; a name may be
+    used for several sections, which are concatenated in order.
+    """
+    core, chunks = [], {}
+    current = None
+    for line in script.splitlines(keepends=True):
+        start = CHUNK_START_RE.match(line)
+        if start:
+            if current is not None:
+                raise ValueError(f"@chunk {start.group(1)} opened inside @chunk {current}")
+            current = start.group(1)
+            chunks.setdefault(current, [])
+        elif CHUNK_END_RE.match(line):
+            if current is None:
+                raise ValueError("@endchunk without a matching @chunk")
+            current = None
+        elif current is None:
+            core.append(line)
+        else:
+            chunks[current].append(line)
+    if current is not None:
+        raise ValueError(f"@chunk {current} is never closed")
+
+    return "".join(core), {name: "".join(lines) for name, lines in chunks.items()}
+
+
+def chunk_stubs(chunks):
+    """Core-side stubs: each top-level chunk function loads its chunk, then re-calls itself."""
+    lines = []
+    for name, source in chunks.items():
+        for func in FUNCTION_DECL_RE.findall(source):
+            lines.append(f"function {func}(...a) {{ return loadChunk('{name}').then(() => {func}(...a)); }}")
+    return "\n".join(lines)
+
+
+def bundle_template(text, split=False, minify=True):
+    """Prepare the raw template for rendering.
+
+    Returns (html, chunks, stubs). With ``split=True`` chunk code is removed
+    from the page and returned as name -> JS source, with ``stubs`` holding
+    the declarations for the CHUNK_STUBS slot; otherwise chunks is empty and
+    the chunk code stays inline.
+    """
+    chunks = {}
+
+    def script(m):
+        core, found = split_chunks(m.group(2))
+        if split:
+            chunks.update(found)
+        else:
+            core = m.group(2)
+            core = "".join(line for line in core.splitlines(keepends=True)
+                           if not (CHUNK_START_RE.match(line) or CHUNK_END_RE.match(line)))
+        return m.group(1) + (minify_js(core) if minify else core) + m.group(3)
+
+    html = INLINE_SCRIPT_RE.sub(script, text)
+    stubs = chunk_stubs(chunks)  # before minifying, while nesting is still visible
+    if minify:
+        html = STYLE_RE.sub(lambda m: m.group(1) + minify_css(m.group(2)) + m.group(3), html)
+        chunks = {name: minify_js(source) for name, source in chunks.items()}
+    return html, chunks, stubs
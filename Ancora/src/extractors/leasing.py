@@ -4,6 +4,7 @@ import glob
 from datetime import datetime
 from openpyxl import load_workbook
 from src.config import DATA_LEASING
+from src import leasing_trends
 
 
 def _parse_xlsx_weekly(filepath):
@@ -194,14 +195,14 @@ def extract():
 
     print(f"  [leasing] Total weeks in output: {len(weeks)}")
 
-    result = {"weeks": weeks}
+    result = {"weeks": weeks, "trends": leasing_trends.compute(weeks)}
     if xlsx_data:
         result["xlsx_data"] = {
             "concessions": xlsx_data["concessions"],
             "construction_notes": xlsx_data.get("construction_notes", []),
             "delinquency_notes": xlsx_data["delinquency_notes"],
             # No expiration matrix for lease-up property
-            "expiration_matrix": [],
+            "expiration_matrix": None,
         }
 
     return result
@@ -0,0 +1,110 @@
+"""Rolling leasing trends, computed once at build time for the leasing tab.
+
+``compute(weeks)`` turns the weekly rows into column arrays the dashboard
+hands straight to Chart.js, so the browser does no filtering, reversing or
+summing however long the history gets:
+
+    weeks, labels          activity weeks (not DOCX-only ones), oldest first
+    series[metric]         the weekly values
+    avg[w][metric]         rolling w-week average (w in WINDOWS)
+    sum[w][metric]         rolling w-week total
+    wow[metric]            change from the week before (also occupancy/leased %)
+    velocity               net leases / week and net absorption / week over the
+                           latest VELOCITY_WEEKS, conversion % over CONVERSION_WEEKS
+    totals[metric]         all-history totals (the cumulative conversion KPI)
+    n_weeks, last          what the trends were computed from, so the dashboard
+                           can tell when weeks were added since (manual / OCR entry)
+
+Windows are rolling sums over prefix sums, one pass per metric regardless
+of window size. A window is reported once it spans w weeks; missing values
+count as 0 in sums and are left out of averages. Windows count rows, which
+are one per week in the tracking spreadsheets.
+"""
+from itertools import accumulate
+
+METRICS = ("walk_in_traffic", "new_prospects", "gross_leases", "net_leases", "move_in", "move_out")
+WOW_METRICS = METRICS + ("occupancy_pct", "leased_pct")
+WINDOWS = (4, 13, 52)
+VELOCITY_WEEKS = 4
+CONVERSION_WEEKS = 13
+PLACES = 2
+
+
+def _number(value):
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def _label(week_ending):
+    """'2026-02-06' -> '2/6', as the charts label weeks."""
+    return f"{int(week_ending[5:7])}/{int(week_ending[8:10])}"
+
+
+def _prefix(values):
+    """(running sums, running counts of present values), each with a leading 0."""
+    sums = [0, *accumulate(v or 0 for v in values)]
+    counts = [0, *accumulate(v is not None for v in values)]
+    return sums, counts
+
+
+def rolling(values, window):
+    """(sums, averages) over each ``window`` weeks ending at every week."""
+    sums, counts = _prefix(values)
+    total, avg = [], []
+    for end in range(1, len(values) + 1):
+        start = end - window
+        count = counts[end] - counts[start] if start >= 0 else 0
+        if not count:
+            total.append(None)
+            avg.append(None)
+            continue
+        window_sum = sums[end] - sums[start]
+        total.append(round(window_sum, PLACES))
+        avg.append(round(window_sum / count, PLACES))
+    return total, avg
+
+
+def _diff(values):
+    return [None] + [round(b - a, PLACES) if a is not None and b is not None else None
+                     for a, b in zip(values, values[1:])]
+
+
+def _ratio_pct(numerators, denominators):
+    return [round(n / d * 100, 1) if n is not None and d else None for n, d in zip(numerators, denominators)]
+
+
+def compute(weeks):
+    """The trends block for a leasing document's ``weeks``; None without activity weeks."""
+    rows = sorted((w for w in weeks if w.get("source_type") != "docx"), key=lambda w: w["week_ending"])
+    if not rows:
+        return None
+    series = {m: [_number(w.get(m)) for w in rows] for m in WOW_METRICS}
+
+    trends = {
+        "weeks": [w["week_ending"] for w in rows],
+        "labels": [_label(w["week_ending"]) for w in rows],
+        "windows": list(WINDOWS),
+        "series": {m: series[m] for m in METRICS},
+        "avg": {},
+        "sum": {},
+        "wow": {m: _diff(series[m]) for m in WOW_METRICS},
+    }
+    for window in WINDOWS:
+        key = str(window)  # JSON object keys
+        trends["sum"][key], trends["avg"][key] = {}, {}
+        for m in METRICS:
+            trends["sum"][key][m], trends["avg"][key][m] = rolling(series[m], window)
+
+    absorption = [i - o if i is not None and o is not None else None
+                  for i, o in zip(series["move_in"], series["move_out"])]
+    conversion = {m: rolling(series[m], CONVERSION_WEEKS)[0] for m in ("gross_leases", "new_prospects")}
+    trends["velocity"] = {
+        "weeks": VELOCITY_WEEKS,
+        "net_leases_per_week": rolling(series["net_leases"], VELOCITY_WEEKS)[1],
+        "absorption_per_week": rolling(absorption, VELOCITY_WEEKS)[1],
+        "conversion_weeks": CONVERSION_WEEKS,
+        "conversion_pct": _ratio_pct(conversion["gross_leases"], conversion["new_prospects"]),
+    }
+    trends["totals"] = {m: round(sum(v for v in series[m] if v is not None), PLACES) for m in METRICS}
+    trends["n_weeks"] = len(weeks)
+    trends["last"] = max(w["week_ending"] for w in weeks)
+    return trends
@@ -0,0 +1,186 @@
+"""Fund-level KPIs across every property in the warehouse (src/warehouse.py).
+
+Each build recomputes only its own property's KPIs (and its companions')
+into property_kpis, then rolls all stored rows up into
+config.PORTFOLIO_SUMMARY, so the fund view is current as soon as any one
+property rebuilds:
+
+    occupancy_pct, leased_pct   latest leasing week, weighted by units
+    noi_t12, income_t12, opex_t12   latest 12 T-12 months (annualized when
+                                fewer are available; t12_months says how many)
+    noi_per_unit                NOI / units
+    opex_per_sf                 OpEx / rentable SF
+    dscr                        NOI / debt service over the latest 12 scheduled months
+    *_yoy_pct                   vs the 12 months before, where both windows are complete
+
+Portfolio figures divide sums (sum of NOI / sum of units, ...), so each
+property counts by its size; a property missing an input is left out of
+that KPI, and ``coverage`` says which ones went in.
+"""
+import datetime
+import json
+import os
+from src.config import PORTFOLIO_SUMMARY, PROPERTY_ID, WAREHOUSE_DB
+from src.warehouse import connect
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS property_kpis (
+    property TEXT NOT NULL,
+    kpi      TEXT NOT NULL,
+    value    REAL,
+    period   TEXT,
+    PRIMARY KEY (property, kpi)
+);
+"""
+T12_METRICS = {"noi": "noi", "total_income": "income", "total_opex": "opex"}
+DEBT_SERVICE_METRICS = ("interest", "principal", "mip", "admin_fee")
+WINDOW = 12
+
+
+def _shift(period, months):
+    """'2025-09' shifted by -11 -> '2024-10'."""
+    year, month = divmod(int(period[:4]) * 12 + int(period[5:7]) - 1 + months, 12)
+    return f"{year:04d}-{month + 1:02d}"
+
+
+def _window_sums(conn, prop, dataset, metrics, end):
+    """{metric: (sum, months)} over the WINDOW months ending at ``end``."""
+    rows = conn.execute(
+        f"SELECT metric, SUM(value), COUNT(DISTINCT period) FROM facts "
+        f"WHERE property = ? AND dataset = ? AND metric IN ({', '.join('?' * len(metrics))}) "
+        f"AND period BETWEEN ? AND ? GROUP BY metric",
+        (prop, dataset, *metrics, _shift(end, 1 - WINDOW), end)).fetchall()
+    return {metric: (total, months) for metric, total, months in rows}
+
+
+def _property_kpis(conn, prop, units, sf):
+    """[(kpi, value, period), ...] for one property."""
+    kpis = []
+    week = conn.execute("SELECT MAX(period) FROM facts WHERE property = ? AND dataset = 'leasing' "
+                        "AND metric = 'occupancy_pct'", (prop,)).fetchone()[0]
+    if week:
+        for metric, value in conn.execute("SELECT metric, value FROM facts WHERE property = ? AND dataset = 'leasing' "
+                                          "AND period = ? AND metric IN ('occupancy_pct', 'leased_pct')", (prop, week)):
+            kpis.append((metric, value, week))
+
+    end = conn.execute("SELECT MAX(period) FROM facts WHERE property = ? AND dataset = 't12' AND metric = 'noi' "
+                       "AND period LIKE '____-__'", (prop,)).fetchone()[0]
+    if end:
+        current = _window_sums(conn, prop, "t12", list(T12_METRICS), end)
+        prior = _window_sums(conn, prop, "t12", list(T12_METRICS), _shift(end, -WINDOW))
+        for metric, name in T12_METRICS.items():
+            if metric not in current:
+                continue
+            total, months = current[metric]
+            # Short histories (e.g. a property a few months past lease-up) are annualized
+            kpis.append((f"{name}_t12", total * WINDOW / months, end))
+            if metric in prior and current[metric][1] == prior[metric][1] == WINDOW:
+                kpis.append((f"{name}_prior_t12", prior[metric][0], _shift(end, -WINDOW)))
+        kpis.append(("t12_months", current.get("noi", (0, 0))[1], end))
+
+    ds_end = conn.execute(
+        f"SELECT MAX(period) FROM facts WHERE property = ? AND dataset = 'loan' AND period LIKE '____-__' "
+        f"AND metric IN ({', '.join('?' * len(DEBT_SERVICE_METRICS))})", (prop, *DEBT_SERVICE_METRICS)).fetchone()[0]
+    if ds_end:
+        debt = _window_sums(conn, prop, "loan", DEBT_SERVICE_METRICS, ds_end)
+        kpis.append(("debt_service", sum(total or 0 for total, _months in debt.values()), ds_end))
+
+    values = {kpi: value for kpi, value, _period in kpis}
+    if values.get("noi_t12") is not None and units:
+        kpis.append(("noi_per_unit", values["noi_t12"] / units, end))
+    if values.get("opex_t12") is not None and sf:
+        kpis.append(("opex_per_sf", values["opex_t12"] / sf, end))
+    if values.get("noi_t12") is not None and values.get("debt_service"):
+        kpis.append(("dscr", values["noi_t12"] / values["debt_service"], end))
+    for name in T12_METRICS.values():
+        prior = values.get(f"{name}_prior_t12")
+        if prior:
+            kpis.append((f"{name}_yoy_pct", (values[f"{name}_t12"] - prior) / abs(prior) * 100, end))
+    return kpis
+
+
+def _ratio(numerators, denominators):
+    """sum(n) / sum(d) over the pairs where both are present."""
+    pairs = [(n, d) for n, d in zip(numerators, denominators) if n is not None and d]
+    if not pairs:
+        return None
+    return sum(n for n, _d in pairs) / sum(d for _n, d in pairs)
+
+
+def rollup(conn):
+    """The portfolio summary dict from every property's stored KPIs."""
+    props = [dict(row) for row in conn.execute("SELECT property, name, units, sf, owner FROM properties "
+                                               "ORDER BY owner != property, property")]
+    kpis = {p["property"]: {} for p in props}
+    periods = {p["property"]: {} for p in props}
+    for row in conn.execute("SELECT property, kpi, value, period FROM property_kpis"):
+        if row["property"] in kpis:
+            kpis[row["property"]][row["kpi"]] = row["value"]
+            periods[row["property"]][row["kpi"]] = row["period"]
+
+    # One column per input, aligned with ``props``
+    ids = [p["property"] for p in props]
+    units, sf = [p["units"] for p in props], [p["sf"] for p in props]
+
+    def column(kpi):
+        return [kpis[prop].get(kpi) for prop in ids]
+
+    def unit_weighted(kpi):
+        """(value x units, units) columns for a percentage reported per property."""
+        values = column(kpi)
+        return ([v * u if v is not None and u else None for v, u in zip(values, units)],
+                [u if v is not None else None for v, u in zip(values, units)])
+
+    portfolio = {"properties": len(props), "units": sum(u or 0 for u in units), "sf": sum(s or 0 for s in sf)}
+    coverage = {}
+    measures = {
+        "occupancy_pct": unit_weighted("occupancy_pct"),
+        "leased_pct": unit_weighted("leased_pct"),
+        "noi_per_unit": (column("noi_t12"), units),
+        "opex_per_sf": (column("opex_t12"), sf),
+        "dscr": (column("noi_t12"), column("debt_service")),
+    }
+    for name, (numerators, denominators) in measures.items():
+        value = _ratio(numerators, denominators)
+        portfolio[name] = round(value, 2) if value is not None else None
+        coverage[name] = [prop for prop, n, d in zip(ids, numerators, denominators) if n is not None and d]
+    for name in T12_METRICS.values():
+        current, prior = column(f"{name}_t12"), column(f"{name}_prior_t12")
+        portfolio[f"{name}_t12"] = round(sum(v for v in current if v is not None), 0)
+        both = [(c, p) for c, p in zip(current, prior) if c is not None and p]
+        portfolio[f"{name}_yoy_pct"] = (round((sum(c for c, _p in both) - sum(p for _c, p in both))
+                                              / abs(sum(p for _c, p in both)) * 100, 1) if both else None)
+        coverage[f"{name}_yoy_pct"] = [prop for prop, c, p in zip(ids, current, prior) if c is not None and p]
+
+    return {
+        "generated_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "portfolio": portfolio,
+        "coverage": coverage,
+        "properties": {
+            p["property"]: dict(name=p["name"], units=p["units"], sf=p["sf"],
+                                companion_of=p["owner"] if p["owner"] != p["property"] else None,
+                                kpis={k: round(v, 2) if v is not None else None for k, v in kpis[p["property"]].items()},
+                                as_of=periods[p["property"]])
+            for p in props
+        },
+    }
+
+
+def update(prop=PROPERTY_ID, path=WAREHOUSE_DB, summary_path=PORTFOLIO_SUMMARY):
+    """Recompute ``prop``'s KPIs (and its companions'), then rewrite the portfolio summary."""
+    conn = connect(path)
+    try:
+        conn.executescript(SCHEMA)
+        with conn:
+            conn.execute("DELETE FROM property_kpis WHERE property NOT IN (SELECT property FROM properties)")
+            for row in conn.execute("SELECT property, units, sf FROM properties WHERE owner = ?", (prop,)).fetchall():
+                conn.execute("DELETE FROM property_kpis WHERE property = ?", (row["property"],))
+                conn.executemany("INSERT INTO property_kpis VALUES (?, ?, ?, ?)",
+                                 ((row["property"],) + kpi for kpi in _property_kpis(conn, *row)))
+        summary = rollup(conn)
+    finally:
+        conn.close()
+    with open(summary_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+    os.replace(summary_path + ".tmp", summary_path)
+    return summary
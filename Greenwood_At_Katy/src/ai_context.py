@@ -0,0 +1,139 @@
+"""Compact T-12 context for the dashboard's AI chat, precomputed at build time.
+
+The chat used to rebuild its system prompt from FINANCIAL_DATA on every
+message. The build now writes the data part once: whole-dollar numbers
+without separators, one line per metric, the largest YoY variances
+instead of every line item, and a few ratios and trends that the model
+would otherwise have to work out itself. The text is byte-identical
+across turns, so the API's prompt caching can reuse it.
+"""
+from src.config import AI_CONTEXT_KEYS, PROPERTY
+
+TOP_VARIANCES = 8
+TREND_MONTHS = 3
+TREND_KEYS = ("total_income", "total_opex", "noi")
+# Annual totals that are already ratios, not dollars
+RATIO_TOTALS = {"opex_ratio": "%"}
+
+
+def _num(value):
+    if isinstance(value, (int, float)):
+        return str(round(value))
+    return str(value)
+
+
+def _series(values):
+    return "[" + ",".join(_num(v) for v in values) + "]"
+
+
+def _pct(part, whole):
+    return f"{part / whole * 100:.1f}%" if whole else "n/a"
+
+
+def _totals(totals):
+    return ", ".join(f"{k}={totals[k]}{RATIO_TOTALS[k]}" if k in RATIO_TOTALS else f"{k}={_num(totals[k])}"
+                     for k in totals)
+
+
+def key_ratios(totals, units, sf):
+    """Ratios analysts ask for first, from the annual totals."""
+    income = totals.get("total_income") or 0
+    market = totals.get("market_rent") or 0
+    noi = totals.get("noi") or 0
+    ratios = [
+        f"NOI margin {_pct(noi, income)}",
+        f"opex/income {_pct(totals.get('total_opex') or 0, income)}",
+        f"concessions/market rent {_pct(abs(totals.get('total_concessions') or 0), market)}",
+        f"vacancy loss/market rent {_pct(abs(totals.get('vacancy_loss') or 0), market)}",
+        f"bad debt/income {_pct(abs(totals.get('bad_debt') or 0), income)}",
+    ]
+    if units:
+        ratios.append(f"NOI/unit {_num(noi / units)}, income/unit {_num(income / units)}, "
+                      f"opex/unit {_num((totals.get('total_opex') or 0) / units)}")
+    if sf:
+        ratios.append(f"NOI/SF {noi / sf:.2f}")
+    return "; ".join(ratios)
+
+
+def trends(metrics):
+    """Average of the last TREND_MONTHS months vs the TREND_MONTHS before them."""
+    out = []
+    for key in TREND_KEYS:
+        values = metrics.get(key) or []
+        if len(values) < 2 * TREND_MONTHS:
+            continue
+        recent = sum(values[-TREND_MONTHS:]) / TREND_MONTHS
+        before = sum(values[-2 * TREND_MONTHS:-TREND_MONTHS]) / TREND_MONTHS
+        change = f"{(recent - before) / abs(before) * 100:+.1f}%" if before else "n/a"
+        out.append(f"{key} {_num(before)} -> {_num(recent)}/mo ({change})")
+    return "; ".join(out)
+
+
+def top_variances(yoy, limit=TOP_VARIANCES):
+    """The YoY line items with the largest absolute dollar change."""
+    items = sorted((yoy or {}).get("line_items", {}).values(),
+                   key=lambda li: abs(li.get("change_abs") or 0), reverse=True)
+    return [f"{li['label']}: cur={_num(li.get('current_annual'))} prior={_num(li.get('prior_annual'))} "
+            f"chg={_num(li.get('change_abs'))} ({li.get('change_pct')}%)"
+            for li in items[:limit]]
+
+
+def _monthly(lines, title, metrics, keys):
+    present = [k for k in keys if metrics.get(k)]
+    if present:
+        lines.append(title)
+        lines.extend(f"  {k}: {_series(metrics[k])}" for k in present)
+
+
+def _period_block(lines, name, period, units, sf):
+    lines.append(f"{name} T-12: {period.get('period', 'n/a')}")
+    lines.append(f"Months: {', '.join(period.get('months') or [])}")
+    totals = period.get("annual_totals") or {}
+    lines.append(f"{name} annual totals: {_totals(totals)}")
+    lines.append(f"{name} ratios: {key_ratios(totals, units, sf)}")
+    trend = trends(period.get("metrics") or {})
+    if trend:
+        lines.append(f"{name} trend (last {TREND_MONTHS} mo vs previous {TREND_MONTHS}): {trend}")
+
+
+def build_ai_context(financial, companions=None):
+    """Return the data section of the AI chat's system prompt, or None without T-12 data."""
+    if not financial or financial.get("status") != "loaded":
+        return None
+    units, sf = PROPERTY["total_units"], PROPERTY["total_sf"]
+    lines = ["All amounts whole US dollars."]
+
+    _period_block(lines, "CURRENT", financial, units, sf)
+    prior = financial.get("prior") or {}
+    if prior.get("period"):
+        _period_block(lines, "PRIOR", prior, units, sf)
+
+    yoy = financial.get("yoy_comparison") or {}
+    summary = yoy.get("summary") or {}
+    if summary:
+        lines.append("YOY: " + "; ".join(
+            f"{k} {_num(summary.get(k + '_change_abs'))} ({summary.get(k + '_change_pct')}%)"
+            for k in ("total_income", "total_opex", "noi")))
+    variances = top_variances(yoy)
+    if variances:
+        lines.append(f"TOP {len(variances)} YOY VARIANCES:")
+        lines.extend("  " + v for v in variances)
+
+    labels = financial.get("metrics") or {}
+    legend = [f"{k}={labels[k + '_label']}" for k in AI_CONTEXT_KEYS if labels.get(k + "_label")]
+    if legend:
+        lines.append("Labels: " + "; ".join(legend))
+    _monthly(lines, "CURRENT MONTHLY:", financial.get("metrics") or {}, AI_CONTEXT_KEYS)
+    _monthly(lines, "PRIOR MONTHLY:", prior.get("metrics") or {}, AI_CONTEXT_KEYS)
+
+    for prop in (companions or {}).values():
+        lines.append("")
+        lines.append(f"COMPANION {prop.get('name')} ({prop.get('short_name')}): "
+                     f"{prop.get('total_units')} units, {_num(prop.get('total_sf') or 0)} SF")
+        for name in ("current", "prior"):
+            period = prop.get(name)
+            if period:
+                _period_block(lines, name.upper(), period, prop.get("total_units"), prop.get("total_sf"))
+                _monthly(lines, f"{name.upper()} MONTHLY:", period.get("metrics") or {}, AI_CONTEXT_KEYS)
+
+    return "\n".join(lines) + "\n"
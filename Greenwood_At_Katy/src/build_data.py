@@ -1,7 +1,12 @@
 """Orchestrate all data extractors and write JSON output files."""
+import hashlib
 import json
 import os
-from src.config import DATA_OUTPUT, PROPERTY
+from src.config import (
+    DATA_BUDGET, DATA_COMPANIONS, DATA_COMPS, DATA_LEASING, DATA_MARKETING,
+    DATA_MINUTES, DATA_OUTPUT, DATA_T12, PROJECT_ROOT, PROPERTY, WAREHOUSE_DB,
+)
+from src import portfolio, variance, warehouse
 
 
 def write_json(filepath, data):
@@ -12,6 +17,48 @@ def write_json(filepath, data):
     print(f"  -> Wrote: {os.path.basename(filepath)}")
 
 
+def read_json(filepath):
+    """Load a JSON output file; {} when it has not been written yet."""
+    try:
+        with open(filepath, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+# Extraction state for incremental builds: step name -> input fingerprint
+BUILD_STATE = os.path.join(DATA_OUTPUT, ".build_state.json")
+# Editing any extractor or the config re-runs every step
+CODE_INPUTS = [os.path.join(PROJECT_ROOT, "src")]
+
+
+def fingerprint(paths):
+    """Digest of the relative path, size and mtime of every file under ``paths``.
+
+    No file is read, so this is cheap enough to run for every step on every
+    build. deploy.py keeps mtimes when it copies files, so folders a deploy
+    did not touch keep their fingerprint on the server.
+    """
+    digest = hashlib.sha256()
+    for top in paths:
+        digest.update(f"{os.path.basename(top)}\0".encode("utf-8"))
+        for root, dirs, files in os.walk(top):
+            dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+            for name in sorted(files):
+                stat = os.stat(os.path.join(root, name))
+                rel = os.path.relpath(os.path.join(root, name), top)
+                digest.update(f"{rel}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def _load_build_state():
+    try:
+        with open(BUILD_STATE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
 import re
 
 
@@ -198,79 +245,119 @@ def _summarize_category(cat_name, items, ap_summary):
     return f"{len(items)} action(s)."
 
 
-def extract_all():
-    """Run all extractors and write output JSON files."""
+def extract_all(incremental=False):
+    """Run all extractors and write output JSON files.
+
+    With ``incremental``, steps whose input folders (and the extractor code)
+    are unchanged since the last build keep their previous output.
+    """
     from src.extractors import leasing, budget, financials, minutes, emails, action_plan, comps, loan_info, companions
 
+    previous = _load_build_state() if incremental else {}
+    state = {}
+
+    def changed(name, inputs, outputs):
+        state[name] = fingerprint(CODE_INPUTS + inputs)
+        if previous.get(name) == state[name] and all(
+                os.path.exists(os.path.join(DATA_OUTPUT, o)) for o in outputs):
+            print(f"  -> Unchanged, keeping {', '.join(outputs)}")
+            return False
+        return True
+
     # 1. Property info (static)
     print("\n[1/8] Property Info...")
     write_json(os.path.join(DATA_OUTPUT, "property_info.json"), PROPERTY)
 
     # 2. Budget
     print("\n[2/8] Budget Data...")
-    budget_data = budget.extract()
-    write_json(os.path.join(DATA_OUTPUT, "budget_monthly.json"), budget_data)
+    if changed("budget", [DATA_BUDGET], ["budget_monthly.json"]):
+        budget_data = budget.extract()
+        write_json(os.path.join(DATA_OUTPUT, "budget_monthly.json"), budget_data)
 
     # 3. Leasing
     print("\n[3/8] Leasing Data...")
-    leasing_data = leasing.extract()
-    write_json(os.path.join(DATA_OUTPUT, "leasing_weekly.json"), leasing_data)
+    if changed("leasing", [DATA_LEASING], ["leasing_weekly.json"]):
+        leasing_data = leasing.extract()
+        write_json(os.path.join(DATA_OUTPUT, "leasing_weekly.json"), leasing_data)
 
     # 4. Financial Actuals
     print("\n[4/8] Financial Actuals...")
-    financials_data = financials.extract()
-    write_json(os.path.join(DATA_OUTPUT, "financials_monthly.json"), financials_data)
+    if changed("financials", [DATA_T12], ["financials_monthly.json"]):
+        financials_data = financials.extract()
+        write_json(os.path.join(DATA_OUTPUT, "financials_monthly.json"), financials_data)
 
     # 5. Actions Log (combined from minutes, emails, action plan)
     print("\n[5/8] Actions Log...")
-    all_actions = []
-
-    minutes_actions = minutes.extract()
-    all_actions.extend(minutes_actions)
-
-    email_actions = emails.extract()
-    all_actions.extend(email_actions)
-
-    ap_actions, ap_summary = action_plan.extract()
-    all_actions.extend(ap_actions)
-
-    # Sort by date
-    all_actions.sort(key=lambda a: a.get("date", ""))
-
-    # Build strategy summary — categorize actions into strategic buckets
-    strategy_summary = _build_strategy_summary(all_actions, ap_summary)
-
-    # Top-level property goal
-    top_goal = {
-        "goal": "60-Day Property Goal: Achieve 94.8% Occupancy",
-        "target_value": 94.8,
-        "metric": "occupancy_pct",
-        "date_set": "2026-02-06",
-        "deadline": None,
-        "source": "Weekly Call (Feb 6, 2026)",
-    }
-
-    actions_data = {
-        "actions": all_actions,
-        "action_plan_summary": ap_summary,
-        "strategy_summary": strategy_summary,
-        "top_goal": top_goal,
-    }
-    write_json(os.path.join(DATA_OUTPUT, "actions_log.json"), actions_data)
+    if changed("actions", [DATA_MINUTES, DATA_MARKETING], ["actions_log.json"]):
+        all_actions = []
+
+        minutes_actions = minutes.extract()
+        all_actions.extend(minutes_actions)
+
+        email_actions = emails.extract()
+        all_actions.extend(email_actions)
+
+        ap_actions, ap_summary = action_plan.extract()
+        all_actions.extend(ap_actions)
+
+        # Sort by date
+        all_actions.sort(key=lambda a: a.get("date", ""))
+
+        # Build strategy summary — categorize actions into strategic buckets
+        strategy_summary = _build_strategy_summary(all_actions, ap_summary)
+
+        # Top-level property goal
+        top_goal = {
+            "goal": "60-Day Property Goal: Achieve 94.8% Occupancy",
+            "target_value": 94.8,
+            "metric": "occupancy_pct",
+            "date_set": "2026-02-06",
+            "deadline": None,
+            "source": "Weekly Call (Feb 6, 2026)",
+        }
+
+        actions_data = {
+            "actions": all_actions,
+            "action_plan_summary": ap_summary,
+            "strategy_summary": strategy_summary,
+            "top_goal": top_goal,
+        }
+        write_json(os.path.join(DATA_OUTPUT, "actions_log.json"), actions_data)
 
     # 6. Comps
     print("\n[6/8] Comparable Properties...")
-    comps_data = comps.extract()
-    write_json(os.path.join(DATA_OUTPUT, "comps.json"), comps_data)
+    if changed("comps", [DATA_COMPS], ["comps.json"]):
+        comps_data = comps.extract()
+        write_json(os.path.join(DATA_OUTPUT, "comps.json"), comps_data)
 
     # 7. HUD Loan Info
     print("\n[7/8] HUD Loan Info...")
-    loan_data = loan_info.extract()
-    write_json(os.path.join(DATA_OUTPUT, "loan_info.json"), loan_data)
+    if changed("loan_info", [DATA_BUDGET], ["loan_info.json"]):
+        loan_data = loan_info.extract()
+        write_json(os.path.join(DATA_OUTPUT, "loan_info.json"), loan_data)
 
     # 8. Companion Properties (T-12 cross-property comparison)
     print("\n[8/8] Companion Properties...")
-    companion_data = companions.extract()
-    write_json(os.path.join(DATA_OUTPUT, "companions.json"), companion_data)
+    if changed("companions", [DATA_COMPANIONS], ["companions.json"]):
+        companion_data = companions.extract()
+        write_json(os.path.join(DATA_OUTPUT, "companions.json"), companion_data)
+
+    # Budget vs. actual, from the budget and T-12 outputs (kept or fresh);
+    # no spreadsheet is read, so it is simply recomputed on every build
+    print("\nBudget vs. Actual...")
+    variance_data = variance.compute(read_json(os.path.join(DATA_OUTPUT, "budget_monthly.json")),
+                                     read_json(os.path.join(DATA_OUTPUT, "financials_monthly.json")))
+    write_json(os.path.join(DATA_OUTPUT, "variance.json"), variance_data)
+    print(f"  -> {len(variance_data['lines'])} lines, actuals through {variance_data.get('as_of') or 'none yet'}")
+
+    with open(BUILD_STATE, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+
+    # Every extracted fact, for cross-week / cross-property queries
+    counts = warehouse.store_outputs()
+    print(f"  -> Loaded {sum(counts.values())} rows into {os.path.basename(WAREHOUSE_DB)}")
+    summary = portfolio.update()["portfolio"]
+    print(f"  -> Portfolio: {summary['properties']} properties, {summary['units']} units, "
+          f"occupancy {summary['occupancy_pct']}%, DSCR {summary['dscr']}")
 
     print(f"\nAll data extracted to {DATA_OUTPUT}/")
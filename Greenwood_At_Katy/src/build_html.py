@@ -1,18 +1,130 @@
 """Generate the dashboard HTML from template + JSON data."""
+import io
 import json
 import os
+import re
 from datetime import datetime
 from src.config import DATA_OUTPUT, DASHBOARD_DIR, TEMPLATES_DIR, PROPERTY
+from src import compact as compact_json
+from src.ai_context import build_ai_context
+from src.assets import dataset_version, publish_assets, write_hashed
+from src.bundle import bundle_template
+from src.images import build_images
+from src.service_worker import SW_FILENAME, remove_service_worker, write_service_worker
+from src.vendor import localize
 
 
-def generate_dashboard():
-    """Read JSON data files and inject into HTML template."""
+# Placeholders look like /* __NAME__ */ so the raw template stays valid JS/CSS
+PLACEHOLDER_RE = re.compile(r"/\* __([A-Z0-9_]+)__ \*/")
+
+
+def compile_template(text):
+    """Split template text into literal segments and placeholder slots.
+
+    Returns a list where even indices are literal text and odd indices are
+    placeholder names, so the template is scanned exactly once.
+    """
+    return PLACEHOLDER_RE.split(text)
+
+
+def render_template(parts, values, out):
+    """Stream a compiled template to a file object.
+
+    Each value is either a string or a callable that writes itself to ``out``
+    (used for large JSON blobs so they are never built as one big string).
+    Slots without a value are written back unchanged.
+    """
+    for i, part in enumerate(parts):
+        if i % 2 == 0:
+            out.write(part)
+            continue
+        value = values.get(part)
+        if value is None:
+            out.write(f"/* __{part}__ */")
+        elif callable(value):
+            value(out)
+        else:
+            out.write(value)
+
+
+def _json_writer(data, compact=False):
+    """Return a slot value that streams ``data`` as JSON."""
+    return lambda out: compact_json.dump(data, out, compact)
+
+
+# Template slot -> dataset name used by the dashboard's lazy loader
+DATASET_SLOTS = {
+    "LEASING_JSON": "leasing",
+    "BUDGET_JSON": "budget",
+    "FINANCIAL_JSON": "financial",
+    "ACTIONS_JSON": "actions",
+    "COMPS_JSON": "comps",
+    "LOAN_JSON": "loan",
+    "COMPANION_JSON": "companion",
+    "VARIANCE_JSON": "variance",
+}
+
+
+def _write_datasets(datasets, compact=False):
+    """Write each dataset as dashboard/data/<name>.<hash>.json.
+
+    Returns the manifest mapping dataset name -> relative URL.
+    """
+    manifest = {}
+    for name, data in datasets.items():
+        payload = compact_json.dumps(data, compact).encode("utf-8")
+        manifest[name] = write_hashed("data", name, "json", payload)
+    return manifest
+
+
+def _write_chunks(chunks, values):
+    """Render each code chunk and write it as dashboard/js/<name>.<hash>.js.
+
+    Returns the manifest mapping chunk name -> relative URL.
+    """
+    manifest = {}
+    for name, source in chunks.items():
+        buf = io.StringIO()
+        render_template(compile_template(source), values, buf)
+        manifest[name] = write_hashed("js", name, "js", buf.getvalue().encode("utf-8"))
+    return manifest
+
+
+def generate_dashboard(split=False, embed_images=False, compact=False, minify=None):
+    """Read JSON data files and inject into HTML template.
+
+    With ``split=True`` the per-tab datasets are written as separate
+    content-hashed files under dashboard/data/ and fetched on demand;
+    otherwise everything is inlined into a single file.
+
+    Property photos are resized into dashboard/img/ and lazy-loaded behind
+    inline blurred placeholders. ``embed_images=True`` inlines them as
+    base64 instead, for a fully offline single-file dashboard.
+
+    ``compact=True`` writes the datasets in the columnar, minified schema
+    from src/compact.py, which the dashboard expands on load.
+
+    The template's CSS/JS is minified when ``minify`` is true, which by
+    default (None) means split builds only: the single file that gets
+    emailed keeps the template's code as written. Split builds also move
+    per-tab code into dashboard/js/ chunks (see src/bundle.py).
+
+    Split builds are the hosted ones: they also serve CDN libraries and
+    fonts from dashboard/vendor/ (src/vendor.py) and get a service worker
+    that precaches the build for offline use (src/service_worker.py).
+    """
+    if minify is None:
+        minify = split
     template_path = os.path.join(TEMPLATES_DIR, "dashboard_template.html")
     output_path = os.path.join(DASHBOARD_DIR, "index.html")
 
-    # Read template
+    # Read, bundle and pre-split template
     with open(template_path, "r", encoding="utf-8") as f:
-        html = f.read()
+        html, chunks, stubs = bundle_template(f.read(), split=split, minify=minify)
+    if split:
+        html, vendored = localize(html)
+        print(f"  -> Vendored {vendored} CDN libraries/fonts to {os.path.join(DASHBOARD_DIR, 'vendor')}")
+    parts = compile_template(html)
 
     # Read all JSON data files
     def load_json(filename):
@@ -30,42 +142,92 @@ def generate_dashboard():
     comps_data = load_json("comps.json")
     loan_data = load_json("loan_info.json")
     companion_data = load_json("companions.json")
+    variance_data = load_json("variance.json")
 
-    # Replace static property placeholders
-    html = html.replace("/* __PROPERTY_NAME__ */", PROPERTY["name"])
-    html = html.replace("/* __PROPERTY_ADDRESS__ */", PROPERTY["address"])
-    html = html.replace("/* __PROPERTY_UNITS__ */", str(PROPERTY["total_units"]))
-    html = html.replace("/* __PROPERTY_YEAR__ */", str(PROPERTY["year_built"]))
-    html = html.replace("/* __PROPERTY_SF__ */", f"{PROPERTY['total_sf']:,}")
-    html = html.replace("/* __PROPERTY_PM__ */", PROPERTY["pm_company"])
-    html = html.replace("/* __BUILD_DATE__ */", datetime.now().strftime("%Y-%m-%d %H:%M"))
-
-    # Inject property images as base64
-    images_data = load_json("images_b64.json")
+    # Static property placeholders
+    values = {
+        "PROPERTY_NAME": PROPERTY["name"],
+        "PROPERTY_ADDRESS": PROPERTY["address"],
+        "PROPERTY_UNITS": str(PROPERTY["total_units"]),
+        "PROPERTY_YEAR": str(PROPERTY["year_built"]),
+        "PROPERTY_SF": f"{PROPERTY['total_sf']:,}",
+        "PROPERTY_PM": PROPERTY["pm_company"],
+        "BUILD_DATE": datetime.now().strftime("%Y-%m-%d %H:%M"),
+    }
+
+    # Property images: responsive files + placeholders, or base64 when embedding
+    image_manifest = None if embed_images else build_images()
+    if not image_manifest:
+        # Pillow missing (None) or no photos to resize ({}): keep the embedded ones
+        if not embed_images:
+            print("  -> Warning: no responsive images built; falling back to base64 images from images_b64.json")
+        images_data = load_json("images_b64.json")
+    else:
+        images_data = {}
+        for key, info in image_manifest.items():
+            slot = "LOGIN_BG" if key == "login_bg" else "IMG_" + key.rsplit("_", 1)[-1]
+            values[slot] = info.pop("placeholder")
+        values["IMAGE_MANIFEST"] = _json_writer(image_manifest)
+        print(f"  -> Built {len(image_manifest)} responsive property images")
+    values.setdefault("IMAGE_MANIFEST", "null")
     if images_data:
         for i in range(1, 5):
             key = f"property_{i}"
             if key in images_data:
-                html = html.replace(f"/* __IMG_{i}__ */", images_data[key])
+                values[f"IMG_{i}"] = images_data[key]
         # Login background image
         if "login_bg" in images_data:
-            html = html.replace("/* __LOGIN_BG__ */", images_data["login_bg"])
+            values["LOGIN_BG"] = images_data["login_bg"]
         print(f"  -> Embedded {len(images_data)} property images")
 
     # Inject JSON data
-    html = html.replace("/* __PROPERTY_JSON__ */", json.dumps(property_info, ensure_ascii=False))
-    html = html.replace("/* __LEASING_JSON__ */", json.dumps(leasing_data, ensure_ascii=False))
-    html = html.replace("/* __BUDGET_JSON__ */", json.dumps(budget_data, ensure_ascii=False))
-    html = html.replace("/* __FINANCIAL_JSON__ */", json.dumps(financial_data, ensure_ascii=False))
-    html = html.replace("/* __ACTIONS_JSON__ */", json.dumps(actions_data, ensure_ascii=False))
-    html = html.replace("/* __COMPS_JSON__ */", json.dumps(comps_data, ensure_ascii=False))
-    html = html.replace("/* __LOAN_JSON__ */", json.dumps(loan_data, ensure_ascii=False))
-    html = html.replace("/* __COMPANION_JSON__ */", json.dumps(companion_data, ensure_ascii=False))
+    datasets = {
+        "LEASING_JSON": leasing_data,
+        "BUDGET_JSON": budget_data,
+        "FINANCIAL_JSON": financial_data,
+        "ACTIONS_JSON": actions_data,
+        "COMPS_JSON": comps_data,
+        "LOAN_JSON": loan_data,
+        "COMPANION_JSON": companion_data,
+        "VARIANCE_JSON": variance_data,
+    }
+    if compact:
+        datasets = {slot: compact_json.encode(DATASET_SLOTS[slot], data)
+                    for slot, data in datasets.items()}
+    # API versions of the inline data, so checkForUpdatedData() can ask for a delta
+    versions = {"leasing": leasing_data, "financials": financial_data}
+    values["DATA_VERSIONS"] = json.dumps({name: dataset_version(data)
+                                          for name, data in versions.items() if data})
+    values["AI_CONTEXT"] = json.dumps(build_ai_context(financial_data, companion_data), ensure_ascii=False)
+    values["PROPERTY_JSON"] = _json_writer(property_info, compact)
+    if split:
+        manifest = _write_datasets({DATASET_SLOTS[slot]: data for slot, data in datasets.items()}, compact)
+        values.update({slot: "{}" for slot in datasets})
+        values["DATA_MANIFEST"] = _json_writer(manifest, compact)
+        print(f"  -> Wrote {len(manifest)} datasets to {os.path.join(DASHBOARD_DIR, 'data')}")
+    else:
+        values.update({slot: _json_writer(data, compact) for slot, data in datasets.items()})
+        values["DATA_MANIFEST"] = "null"
+
+    # Per-tab code chunks (split builds only)
+    if chunks:
+        values["CHUNK_MANIFEST"] = _json_writer(_write_chunks(chunks, values), compact)
+        print(f"  -> Wrote {len(chunks)} code chunks to {os.path.join(DASHBOARD_DIR, 'js')}")
+    else:
+        values["CHUNK_MANIFEST"] = "null"
+    values["CHUNK_STUBS"] = stubs
+    values["SERVICE_WORKER_URL"] = json.dumps(SW_FILENAME) if split else "null"
 
     # Write output
     os.makedirs(DASHBOARD_DIR, exist_ok=True)
     with open(output_path, "w", encoding="utf-8") as f:
-        f.write(html)
+        render_template(parts, values, f)
 
     print(f"  -> Dashboard generated: {output_path}")
     print(f"  -> File size: {os.path.getsize(output_path) / 1024:.1f} KB")
+
+    if split:
+        write_service_worker(minify)
+    else:
+        remove_service_worker()
+    publish_assets()
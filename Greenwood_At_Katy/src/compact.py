@@ -0,0 +1,133 @@
+"""Opt-in compact JSON encoding for the dashboard datasets (build.py --compact).
+
+Weekly leasing rows are stored struct-of-arrays: one array per metric
+instead of one dict per week repeating every key name. Repeated text
+(concession strings, DOCX notes, source types) is replaced by indexes
+into a shared string table, floats are rounded to a fixed precision and
+everything is written with minified separators. The dashboard expands
+the result back into the original shape with expandCompact().
+"""
+import json
+
+FORMAT = "columnar-v1"
+SEPARATORS = (",", ":")
+
+# Fixed precision: dollar-sized values keep cents, small values (rates,
+# fractions, percentages, PSF) keep enough places to stay exact on screen
+MONEY_PLACES = 2
+RATIO_PLACES = 6
+MONEY_THRESHOLD = 100
+
+
+def round_floats(obj):
+    """Round every float in a JSON-like structure; integral floats become ints."""
+    if isinstance(obj, float):
+        places = MONEY_PLACES if abs(obj) >= MONEY_THRESHOLD else RATIO_PLACES
+        value = round(obj, places)
+        return int(value) if value.is_integer() else value
+    if isinstance(obj, dict):
+        return {k: round_floats(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [round_floats(v) for v in obj]
+    return obj
+
+
+class StringTable:
+    """Interns repeated strings; the table is emitted once per document."""
+
+    def __init__(self):
+        self.strings = []
+        self._index = {}
+
+    def code(self, text):
+        if text not in self._index:
+            self._index[text] = len(self.strings)
+            self.strings.append(text)
+        return self._index[text]
+
+
+def _column_code(values):
+    """How a column's values are interned: 'list', 'scalar' or None."""
+    present = [v for v in values if v is not None]
+    if not present:
+        return None
+    if all(isinstance(v, list) and all(isinstance(s, str) for s in v) for v in present):
+        return "list"
+    if all(isinstance(v, str) for v in present) and len(set(present)) <= len(present) // 2:
+        return "scalar"
+    return None
+
+
+def encode_records(records, table):
+    """Encode a list of flat dicts as one array per key.
+
+    Keys absent from some rows are listed under "missing" so the
+    expansion restores exactly the original rows.
+    """
+    keys = []
+    for row in records:
+        for key in row:
+            if key not in keys:
+                keys.append(key)
+
+    cols, codes, missing = {}, {}, {}
+    for key in keys:
+        values = [row.get(key) for row in records]
+        absent = [i for i, row in enumerate(records) if key not in row]
+        if absent:
+            missing[key] = absent
+        code = _column_code(values)
+        if code == "list":
+            values = [None if v is None else [table.code(s) for s in v] for v in values]
+            codes[key] = code
+        elif code == "scalar":
+            values = [None if v is None else table.code(v) for v in values]
+            codes[key] = code
+        cols[key] = values
+
+    return {"_columns": 1, "n": len(records), "cols": cols, "codes": codes, "missing": missing}
+
+
+def encode_leasing(data):
+    """Compact leasing_weekly.json: columnar weeks + shared string table."""
+    data = round_floats(data)
+    weeks = data.get("weeks")
+    if not weeks:
+        return data
+    table = StringTable()
+    encoded = dict(data)
+    encoded["weeks"] = encode_records(weeks, table)
+    encoded["_format"] = FORMAT
+    encoded["strings"] = table.strings
+    return encoded
+
+
+def encode_series(data):
+    """Compact T-12 style documents (already one array per metric)."""
+    return round_floats(data)
+
+
+# Dataset name -> encoder used in compact builds
+ENCODERS = {
+    "leasing": encode_leasing,
+    "financial": encode_series,
+    "budget": encode_series,
+    "companion": encode_series,
+    "loan": encode_series,
+    "variance": encode_series,
+}
+
+
+def encode(name, data):
+    """Apply the compact encoder for a dataset, if it has one."""
+    encoder = ENCODERS.get(name)
+    return encoder(data) if encoder else data
+
+
+def dump(data, out, compact=False):
+    """json.dump with minified separators in compact mode."""
+    json.dump(data, out, ensure_ascii=False, separators=SEPARATORS if compact else None)
+
+
+def dumps(data, compact=False):
+    return json.dumps(data, ensure_ascii=False, separators=SEPARATORS if compact else None)
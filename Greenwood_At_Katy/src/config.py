@@ -4,6 +4,9 @@ import os
 # Project root
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+# Short id used by the API, storage keys and the portfolio warehouse
+PROPERTY_ID = "gwk"
+
 # Property metadata
 PROPERTY = {
     "name": "Greenwood at Katy",
@@ -38,6 +41,8 @@ DATA_FINANCIALS = os.path.join(PROJECT_ROOT, "Data_Financials")
 DATA_MINUTES = os.path.join(PROJECT_ROOT, "Data_Minutes")
 DATA_MARKETING = os.path.join(PROJECT_ROOT, "Data_Marketing_Others")
 DATA_PROJECT_INFO = os.path.join(PROJECT_ROOT, "Data_Project Information")
+# Photo (inside DATA_PROJECT_INFO or its "web res" folder) used behind the login card
+LOGIN_BG_IMAGE = None  # falls back to the hero photo
 DATA_COMPS = os.path.join(PROJECT_ROOT, "Data_Comps")
 DATA_T12 = os.path.join(PROJECT_ROOT, "Data_T12P&L")
 DATA_COMPANIONS = os.path.join(DATA_T12, "Other Comps")
@@ -58,7 +63,22 @@ COMPANION_PROPERTIES = {
 # Output directories
 DATA_OUTPUT = os.path.join(PROJECT_ROOT, "data_output")
 DASHBOARD_DIR = os.path.join(PROJECT_ROOT, "dashboard")
+# SQLite database of extracted facts for every property (src/warehouse.py)
+WAREHOUSE_DB = os.path.join(os.path.dirname(PROJECT_ROOT), "portfolio.sqlite")
+# Fund-level KPIs rolled up from the warehouse (src/portfolio.py)
+PORTFOLIO_SUMMARY = os.path.join(os.path.dirname(PROJECT_ROOT), "portfolio_summary.json")
 TEMPLATES_DIR = os.path.join(PROJECT_ROOT, "templates")
+# Downloaded CDN libraries/fonts (src/vendor.py); versioned URLs, safe to commit
+VENDOR_CACHE = os.path.join(PROJECT_ROOT, "vendor")
+
+# T-12 metrics whose monthly values go into the AI chat context (src/ai_context.py)
+AI_CONTEXT_KEYS = [
+    "total_income", "total_rental_income", "total_other_income", "total_opex", "noi",
+    "market_rent", "vacancy_loss", "total_concessions", "bad_debt_rent",
+    "payroll_benefits", "repairs_maintenance", "make_ready", "contract_services",
+    "marketing", "utilities", "management_fees", "insurance", "taxes",
+    "one_time_concessions", "renewal_concessions",
+]
 
 # Budget Summary sheet column mapping
 # Columns 11-22 = Jan 2026 through Dec 2026
@@ -117,3 +137,35 @@ BUDGET_ROW_MAP = {
     "total_non_operating": "TOTAL NON-OPERATING EXPENSE",
     "net_income": "NET INCOME",
 }
+
+
+# Budget line -> T-12 roll-up for the budget-vs-actual variance dataset
+# (src/variance.py): (BUDGET_ROW_MAP key, label, T-12 ROW_MAP keys summed,
+# "income" | "expense"). Income lines are favorable above budget, expense
+# lines below. Contra-income lines (vacancy, bad debt) are not compared:
+# which direction is favorable depends on how each source signs them.
+VARIANCE_LINES = [
+    ("potential_rent", "Potential Rent", ["potential_rent"], "income"),
+    ("total_rental_income", "Total Rental Income", ["total_rental_income"], "income"),
+    ("other_income_residential", "Other Income", ["total_other_income"], "income"),
+    ("total_income", "TOTAL INCOME", ["total_income"], "income"),
+    ("payroll_benefits", "Payroll & Benefits", ["payroll_benefits"], "expense"),
+    ("repairs_maintenance", "Repairs & Maintenance", ["repairs_maintenance"], "expense"),
+    ("make_ready", "Make-Ready / Redecorating", ["make_ready"], "expense"),
+    ("recreational_amenities", "Recreational Amenities", ["recreational_amenities"], "expense"),
+    ("contract_services", "Contract Services", ["contract_services"], "expense"),
+    ("marketing", "Marketing", ["marketing"], "expense"),
+    ("office_expenses", "Office Expenses", ["office_expenses"], "expense"),
+    ("other_admin", "Other G&A", ["other_admin"], "expense"),
+    ("utilities", "Utilities", ["utilities"], "expense"),
+    ("controllable_expenses", "CONTROLLABLE EXPENSES",
+     ["payroll_benefits", "repairs_maintenance", "make_ready", "recreational_amenities",
+      "contract_services", "marketing", "office_expenses", "other_admin", "utilities"], "expense"),
+    ("management_fees", "Management Fees", ["management_fees"], "expense"),
+    ("taxes", "Taxes", ["taxes"], "expense"),
+    ("insurance", "Insurance", ["insurance"], "expense"),
+    ("non_controllable_expenses", "NON-CONTROLLABLE EXPENSES",
+     ["management_fees", "taxes", "insurance"], "expense"),
+    ("total_opex", "TOTAL OPERATING EXPENSES", ["total_opex"], "expense"),
+    ("noi", "NET OPERATING INCOME", ["noi"], "income"),
+]
@@ -0,0 +1,138 @@
+"""Lease expirations as one month x snapshot grid, with exposure precomputed.
+
+The weekly tracking spreadsheet repeats a short expiration table in every
+snapshot (as-of date), each covering the next few months. ``build()``
+lays them out as one grid per field, ``grid[month][snapshot]``, with
+None where a snapshot does not cover a month:
+
+    snapshots                   as-of dates, oldest first; ``latest`` is the newest
+    months, periods             month labels as the sheet shows them, and as YYYY-MM
+                                (the year taken from the as-of date), in month order
+    fields[name]                expiring, notice, renewals, month_to_month, transfers,
+                                pending, avg_increase_pct, retention_pct
+    derived[name]
+        share_pct               expiring / total units
+        cumulative_expiring     running total over the snapshot's months
+        cumulative_share_pct    that over total units
+        undecided               expiring - notice - renewals - transfers - pending
+        conversion_pct          the renewal conversion applied: the month's own
+                                retention when reported (0% included), else the
+                                share of the snapshot's decided leases that
+                                renewed, pended or transferred
+        projected_move_outs     notice + undecided x (1 - conversion)
+        cumulative_projected_move_outs
+
+so the dashboard and any forecast read exposure straight off the grid.
+"""
+import re
+from itertools import accumulate
+from src.config import PROPERTY
+from src.warehouse import month_period
+
+FIELDS = ("expiring", "notice", "renewals", "month_to_month", "transfers", "pending",
+          "avg_increase_pct", "retention_pct")
+# Leases that stay (renewed, pending renewal or moving to another unit)
+RETAINED = ("renewals", "pending", "transfers")
+PLACES = 2
+
+
+def _number(value):
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def _round(value):
+    return round(value, PLACES) if value is not None else None
+
+
+def _month_key(label, as_of):
+    """'YYYY-MM' for a month label in a snapshot taken on ``as_of``; the label if it won't parse."""
+    year, month = int(as_of[:4]), int(as_of[5:7])
+    period = month_period(label, year)
+    if not period:
+        return str(label)
+    if not re.search(r"\d{4}", str(label)) and int(period[5:7]) < month - 6:
+        period = f"{year + 1}{period[4:]}"  # 'Jan' in a November snapshot
+    return period
+
+
+def _column(grid, s):
+    return [row[s] for row in grid]
+
+
+def _snapshot_conversion(fields, s):
+    """Retained / decided over one snapshot's months, as a percentage; None without decisions."""
+    retained = sum(v or 0 for f in RETAINED for v in _column(fields[f], s))
+    decided = retained + sum(v or 0 for v in _column(fields["notice"], s))
+    return retained / decided * 100 if decided else None
+
+
+def _derive(fields, covered, s, units):
+    """Derived columns for snapshot ``s`` over the month rows it covers."""
+    rows = [m for m in range(len(covered)) if covered[m]]
+    expiring = [fields["expiring"][m][s] or 0 for m in rows]
+    notice = [fields["notice"][m][s] or 0 for m in rows]
+    retained = [sum(fields[f][m][s] or 0 for f in RETAINED) for m in rows]
+    undecided = [max(e - n - r, 0) for e, n, r in zip(expiring, notice, retained)]
+    fallback = _snapshot_conversion(fields, s)
+    conversion = []
+    for m in rows:
+        own = fields["retention_pct"][m][s]
+        conversion.append(own if own is not None else fallback)
+    projected = [n + u * (1 - c / 100) if c is not None else None
+                 for n, u, c in zip(notice, undecided, conversion)]
+    cumulative = list(accumulate(expiring))
+    cumulative_projected = list(accumulate(projected, lambda a, b: a + b if a is not None and b is not None else None))
+    return rows, {
+        "share_pct": [e / units * 100 if units else None for e in expiring],
+        "cumulative_expiring": cumulative,
+        "cumulative_share_pct": [c / units * 100 if units else None for c in cumulative],
+        "undecided": undecided,
+        "conversion_pct": conversion,
+        "projected_move_outs": projected,
+        "cumulative_projected_move_outs": cumulative_projected,
+    }
+
+
+def build(snapshots, units=PROPERTY["total_units"]):
+    """The grid form of ``expiration_matrix`` snapshots; None without any."""
+    snapshots = sorted((s for s in snapshots if s.get("months")), key=lambda s: s["as_of_date"])
+    if not snapshots:
+        return None
+    labels = {}
+    for snap in snapshots:
+        for entry in snap["months"]:
+            labels.setdefault(_month_key(entry["month"], snap["as_of_date"]), str(entry["month"]))
+    periods = list(labels)  # first appearance; by date when every label parsed
+    if all(re.match(r"^\d{4}-\d{2}$", p) for p in periods):
+        periods.sort()
+    index = {p: m for m, p in enumerate(periods)}
+    months = [labels[p] for p in periods]
+
+    width = len(snapshots)
+    fields = {f: [[None] * width for _ in months] for f in FIELDS}
+    covered = [[False] * width for _ in months]
+    for s, snap in enumerate(snapshots):
+        for entry in snap["months"]:
+            m = index[_month_key(entry["month"], snap["as_of_date"])]
+            covered[m][s] = True
+            for f in FIELDS:
+                fields[f][m][s] = _number(entry.get(f))
+
+    derived = {}
+    for s in range(width):
+        rows, columns = _derive(fields, [c[s] for c in covered], s, units)
+        for name, values in columns.items():
+            grid = derived.setdefault(name, [[None] * width for _ in months])
+            for m, value in zip(rows, values):
+                grid[m][s] = _round(value)
+
+    return {
+        "layout": "month-x-snapshot",
+        "units": units,
+        "snapshots": [snap["as_of_date"] for snap in snapshots],
+        "latest": width - 1,
+        "months": months,
+        "periods": periods,
+        "fields": fields,
+        "derived": derived,
+    }
@@ -5,6 +5,7 @@ import glob
 from datetime import datetime
 from docx import Document
 from src.config import DATA_LEASING
+from src import expirations, leasing_trends
 
 
 def _parse_date_from_filename(filename):
@@ -413,11 +414,11 @@ def extract():
     weeks.sort(key=lambda w: w["week_ending"])
     print(f"  [leasing] Total weeks in output: {len(weeks)}")
 
-    result = {"weeks": weeks}
+    result = {"weeks": weeks, "trends": leasing_trends.compute(weeks)}
     if xlsx_data:
         result["xlsx_data"] = {
             "concessions": xlsx_data["concessions"],
-            "expiration_matrix": xlsx_data["expiration_matrix"],
+            "expiration_matrix": expirations.build(xlsx_data["expiration_matrix"]),
             "delinquency_notes": xlsx_data["delinquency_notes"],
         }
 
@@ -0,0 +1,129 @@
+"""Build resized, content-hashed property photos for the hosted dashboard.
+
+Originals come from Data_Project Information/ (its "web res" folder when
+present). Each photo is written in several widths as AVIF (when Pillow
+supports it), WebP and a JPEG fallback, plus a tiny blurred placeholder
+that is inlined in the HTML while the real image lazy-loads.
+"""
+import base64
+import glob
+import io
+import os
+from src.assets import write_hashed
+from src.config import DATA_PROJECT_INFO, LOGIN_BG_IMAGE
+
+# Responsive widths (px); originals are never upscaled
+WIDTHS = (640, 1280, 1920)
+PLACEHOLDER_WIDTH = 24
+QUALITY = {"avif": 50, "webp": 72, "jpeg": 78}
+IMAGE_EXTS = (".jpg", ".jpeg", ".png")
+
+
+def select_originals():
+    """Pick the photos used on the cover and login pages.
+
+    Returns a dict of image key (property_1..property_5, login_bg) -> path.
+    """
+    images_dir = os.path.join(DATA_PROJECT_INFO, "web res")
+    if not os.path.isdir(images_dir):
+        images_dir = DATA_PROJECT_INFO
+    if not os.path.isdir(images_dir):
+        return {}
+
+    files = sorted(f for f in glob.glob(os.path.join(images_dir, "*"))
+                   if f.lower().endswith(IMAGE_EXTS))
+    if not files:
+        return {}
+
+    # Select up to 5 representative images (spread evenly)
+    n = len(files)
+    if n <= 5:
+        selected = files
+    else:
+        indices = [0, n // 4, n // 2, 3 * n // 4, n - 1]
+        selected = [files[i] for i in indices]
+
+    originals = {f"property_{i + 1}": path for i, path in enumerate(selected)}
+    login_bg = os.path.join(images_dir, LOGIN_BG_IMAGE) if LOGIN_BG_IMAGE else None
+    if login_bg and os.path.exists(login_bg):
+        originals["login_bg"] = login_bg
+    else:
+        originals["login_bg"] = selected[0]
+    return originals
+
+
+def _formats(Image):
+    """Output formats supported by the installed Pillow, best first."""
+    exts = Image.registered_extensions()
+    return [fmt for fmt, ext in (("avif", ".avif"), ("webp", ".webp"), ("jpeg", ".jpg"))
+            if ext in exts]
+
+
+def _encode(img, fmt):
+    buf = io.BytesIO()
+    if fmt == "jpeg":
+        img.save(buf, "JPEG", quality=QUALITY[fmt], optimize=True, progressive=True)
+    elif fmt == "webp":
+        img.save(buf, "WEBP", quality=QUALITY[fmt], method=6)
+    else:
+        img.save(buf, "AVIF", quality=QUALITY[fmt])
+    return buf.getvalue()
+
+
+def _placeholder(img, ImageFilter):
+    """Tiny blurred JPEG as a data URI, shown until the real image loads."""
+    height = max(1, round(img.height * PLACEHOLDER_WIDTH / img.width))
+    small = img.resize((PLACEHOLDER_WIDTH, height)).filter(ImageFilter.GaussianBlur(1))
+    buf = io.BytesIO()
+    small.save(buf, "JPEG", quality=40)
+    return "data:image/jpeg;base64," + base64.b64encode(buf.getvalue()).decode("ascii")
+
+
+def build_images():
+    """Write responsive variants to dashboard/img/ and return the manifest.
+
+    Manifest shape::
+
+        {key: {"width", "height", "placeholder",
+               "sources": {"avif"|"webp"|"jpeg": [{"url", "width"}, ...]}}}
+
+    Returns None when Pillow is not installed, so the caller can fall back
+    to base64 embedding.
+    """
+    try:
+        from PIL import Image, ImageFilter, ImageOps
+    except ImportError:
+        print("  [images] Pillow not available.")
+        return None
+
+    formats = _formats(Image)
+    originals = select_originals()
+    if not originals:
+        print("  [images] No property photos found.")
+        return {}
+
+    manifest = {}
+    for key, path in originals.items():
+        with Image.open(path) as src:
+            img = ImageOps.exif_transpose(src).convert("RGB")
+
+        widths = sorted({min(w, img.width) for w in WIDTHS})
+        sources = {fmt: [] for fmt in formats}
+        for width in widths:
+            height = round(img.height * width / img.width)
+            resized = img if width == img.width else img.resize((width, height), Image.LANCZOS)
+            for fmt in formats:
+                ext = "jpg" if fmt == "jpeg" else fmt
+                url = write_hashed("img", f"{key}-{width}", ext, _encode(resized, fmt))
+                sources[fmt].append({"url": url, "width": width})
+
+        manifest[key] = {
+            "width": img.width,
+            "height": img.height,
+            "placeholder": _placeholder(img, ImageFilter),
+            "sources": sources,
+        }
+        print(f"  [images] {os.path.basename(path)} -> {key} "
+              f"({len(widths)} sizes x {', '.join(formats)})")
+
+    return manifest
@@ -0,0 +1,62 @@
+"""Generate dashboard/sw.js, the service worker for hosted (--split) builds.
+
+The worker precaches the shell and every hashed file of the current build
+except photos (the browser only ever needs one format/width of each, so
+they are cached the first time they are shown). Its cache version is
+derived from the precached content, so a rebuild that changes anything
+installs a fresh precache and drops the old one.
+"""
+import json
+import os
+import re
+from src.assets import COMPRESSED_SUFFIXES, HASHED_NAME_RE, content_hash
+from src.bundle import PLACEHOLDER_RE, minify_js
+from src.config import DASHBOARD_DIR, PROPERTY, TEMPLATES_DIR
+
+SW_FILENAME = "sw.js"
+# Hashed files fetched lazily instead of at install time
+RUNTIME_ONLY_DIRS = ("img",)
+
+
+def precache_urls():
+    """The shell plus every hashed file under the dashboard directory."""
+    urls = []
+    for root, _dirs, files in os.walk(DASHBOARD_DIR):
+        for name in sorted(files):
+            if name.endswith(COMPRESSED_SUFFIXES) or not HASHED_NAME_RE.match(name):
+                continue
+            rel = os.path.relpath(os.path.join(root, name), DASHBOARD_DIR).replace(os.sep, "/")
+            if rel.split("/", 1)[0] not in RUNTIME_ONLY_DIRS:
+                urls.append(rel)
+    return ["./"] + sorted(urls)
+
+
+def write_service_worker(minify=True):
+    """Render templates/sw_template.js to dashboard/sw.js (after index.html is written)."""
+    with open(os.path.join(TEMPLATES_DIR, "sw_template.js"), "r", encoding="utf-8") as f:
+        template = f.read()
+    if minify:
+        template = minify_js(template)
+
+    urls = precache_urls()
+    with open(os.path.join(DASHBOARD_DIR, "index.html"), "rb") as f:
+        shell = f.read()
+    version = content_hash(json.dumps(urls).encode("utf-8") + shell)
+    values = {
+        "CACHE_PREFIX": json.dumps(re.sub(r"[^a-z0-9]+", "-", PROPERTY["name"].lower()) + "-"),
+        "CACHE_VERSION": json.dumps(version),
+        "PRECACHE_URLS": json.dumps(urls),
+    }
+    script = PLACEHOLDER_RE.sub(lambda m: values[m.group(1)], template)
+
+    with open(os.path.join(DASHBOARD_DIR, SW_FILENAME), "w", encoding="utf-8") as f:
+        f.write(script)
+    print(f"  -> Service worker precaches {len(urls)} files (cache {version})")
+
+
+def remove_service_worker():
+    """Single-file builds don't register a worker; drop one left by a split build."""
+    for suffix in ("",) + COMPRESSED_SUFFIXES:
+        path = os.path.join(DASHBOARD_DIR, SW_FILENAME + suffix)
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,142 @@
+"""Budget vs. actual variance, aligned month by month at build time.
+
+The budget (BUDGET_ROW_MAP names, one calendar year) and the T-12
+statements (ROW_MAP names, trailing twelve months plus the prior
+statement) name and date their lines differently. config.VARIANCE_LINES
+says which T-12 lines roll up into each budget line; compute() places
+both on the budget's months and works on whole rows at a time:
+
+    budget, actual              aligned values (actual None for months without a T-12)
+    variance, variance_pct      actual - budget, and that as % of |budget|
+    variance_per_unit           variance / total units
+    ytd_budget, ytd_actual,     running year-to-date totals over the months with
+    ytd_variance                actuals, and their variance
+    gaps                        month labels in that window missing a budget or an
+                                actual cell for this line (counted as 0 in the YTD)
+    ytd                         those totals as of the latest actual month, with
+                                % and per-unit variances
+
+Every line's YTD covers the same months (``actual_mask``: the months the
+T-12 has activity for), so totals and subtotals add up over one window.
+
+``favorable`` is 1 for income lines (above budget is good) and -1 for
+expense lines, so variance * favorable > 0 is a favorable variance.
+"""
+from src.config import PROPERTY, VARIANCE_LINES
+from src.warehouse import month_period
+
+# Statement lines that tell a month with actuals from an empty column
+# (T-12s list twelve months even before a property was acquired)
+ACTIVITY_KEYS = ("total_income", "total_opex", "noi")
+PLACES = 2
+
+
+def _round(value, places=PLACES):
+    return round(value, places) if value is not None else None
+
+
+def _actuals(financials):
+    """{period: {T-12 key: value}} over the prior and current statements; current wins."""
+    by_period = {}
+    for statement in (financials.get("prior"), financials):
+        if not statement or not statement.get("months"):
+            continue
+        columns = {k: v for k, v in statement.get("metrics", {}).items() if isinstance(v, list)}
+        for i, label in enumerate(statement["months"]):
+            month = {k: v[i] for k, v in columns.items() if i < len(v)}
+            period = month_period(label)
+            if period and any(month.get(k) for k in ACTIVITY_KEYS):
+                by_period[period] = month
+    return by_period
+
+
+def _row_sum(values, keys):
+    """Sum of ``keys`` in one month's values; None when any is missing."""
+    parts = [values.get(k) for k in keys]
+    return sum(parts) if all(isinstance(p, (int, float)) for p in parts) else None
+
+
+def _pct(variance, base):
+    return [_round(v / abs(b) * 100, 1) if v is not None and b else None for v, b in zip(variance, base)]
+
+
+def _per_unit(values, units):
+    return [_round(v / units) if v is not None and units else None for v in values]
+
+
+def _running(values, mask):
+    """Year-to-date totals over the months in ``mask`` (a missing cell counts as 0); None outside it."""
+    totals, total = [], 0
+    for value, included in zip(values, mask):
+        if not included:
+            totals.append(None)
+            continue
+        total += value or 0
+        totals.append(total)
+    return totals
+
+
+def compute(budget, financials, units=PROPERTY["total_units"], lines=VARIANCE_LINES):
+    """The variance dataset for a budget_monthly.json and a financials_monthly.json."""
+    year = budget.get("year")
+    months = budget.get("months") or []
+    budget_metrics = budget.get("metrics") or {}
+    if not year or not budget_metrics:
+        return {"status": "awaiting_data", "months": months, "lines": []}
+
+    periods = [month_period(m, year) for m in months]
+    actuals = _actuals(financials or {})
+    available = {k for values in actuals.values() for k in values}
+    aligned = [actuals.get(p) for p in periods]
+    mask = [values is not None for values in aligned]  # one YTD window for every line
+
+    rows = []
+    for key, label, t12_keys, kind in lines:
+        if key not in budget_metrics or not set(t12_keys) <= available:
+            continue
+        b_row = [v if isinstance(v, (int, float)) else None for v in budget_metrics[key]][:len(periods)]
+        b_row += [None] * (len(periods) - len(b_row))
+        a_row = [_row_sum(values, t12_keys) if values else None for values in aligned]
+        variance = [a - b if a is not None and b is not None else None for a, b in zip(a_row, b_row)]
+        ytd_budget, ytd_actual = _running(b_row, mask), _running(a_row, mask)
+        ytd_variance = [a - b if a is not None else None for a, b in zip(ytd_actual, ytd_budget)]
+        gaps = {name: [months[i] for i, v in enumerate(row) if mask[i] and v is None]
+                for name, row in (("budget", b_row), ("actual", a_row))}
+        rows.append({
+            "key": key, "label": label, "kind": kind, "favorable": 1 if kind == "income" else -1,
+            "total": label.isupper(),  # totals and subtotals are upper case, as on the statements
+            "t12_keys": list(t12_keys),
+            "budget": [_round(v) for v in b_row],
+            "actual": [_round(v) for v in a_row],
+            "variance": [_round(v) for v in variance],
+            "variance_pct": _pct(variance, b_row),
+            "variance_per_unit": _per_unit(variance, units),
+            "ytd_budget": [_round(v) for v in ytd_budget],
+            "ytd_actual": [_round(v) for v in ytd_actual],
+            "ytd_variance": [_round(v) for v in ytd_variance],
+            "gaps": gaps,
+        })
+
+    # YTD as of the latest month with actuals
+    filled = [i for i, included in enumerate(mask) if included] if rows else []
+    as_of = filled[-1] if filled else None
+    for row in rows:
+        if as_of is None:
+            row["ytd"] = None
+            continue
+        b, a, v = row["ytd_budget"][as_of], row["ytd_actual"][as_of], row["ytd_variance"][as_of]
+        row["ytd"] = {"budget": b, "actual": a, "variance": v,
+                      "variance_pct": _pct([v], [b])[0], "variance_per_unit": _per_unit([v], units)[0]}
+
+    return {
+        "status": "loaded" if as_of is not None else "awaiting_actuals",
+        "year": year,
+        "months": months,
+        "periods": periods,
+        "as_of": periods[as_of] if as_of is not None else None,
+        "actual_months": len(filled),
+        "actual_mask": mask,
+        "units": units,
+        "sources": {"budget": budget.get("source_file"), "t12": (financials or {}).get("source")},
+        "lines": rows,
+    }
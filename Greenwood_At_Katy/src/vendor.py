@@ -0,0 +1,82 @@
+"""Serve the dashboard's third-party libraries and fonts from its own origin.
+
+Hosted builds (build.py --split) copy every jsDelivr script and the Google
+Fonts stylesheet referenced by the template into dashboard/vendor/ as
+content-hashed files and point the HTML at them, so the service worker can
+precache them and the dashboard keeps working offline.
+
+Downloads are kept in VENDOR_CACHE (versioned URLs never change), so only
+the first build needs network access. When a download fails and nothing
+is cached, the CDN URL is left in place.
+"""
+import os
+import re
+import urllib.request
+from src.assets import write_hashed
+from src.config import VENDOR_CACHE
+
+SCRIPT_URL_RE = re.compile(r"https://cdn\.jsdelivr\.net/npm/[^\s'\"()]+\.js")
+FONT_CSS_URL_RE = re.compile(r"https://fonts\.googleapis\.com/css2\?[^\s'\"()]+")
+FONT_FILE_URL_RE = re.compile(r"url\((https://fonts\.gstatic\.com/[^)]+)\)")
+# Google Fonts picks the font format from the User-Agent; ask for woff2
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/120.0 Safari/537.36")
+TIMEOUT = 30
+
+
+def _cache_path(url):
+    name = re.sub(r"[^A-Za-z0-9._-]+", "_", url.split("://", 1)[1])
+    return os.path.join(VENDOR_CACHE, name[-150:])
+
+
+def fetch(url):
+    """Return the bytes at ``url``, from VENDOR_CACHE when downloaded before."""
+    path = _cache_path(url)
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return f.read()
+    req = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+    with urllib.request.urlopen(req, timeout=TIMEOUT) as resp:
+        data = resp.read()
+    os.makedirs(VENDOR_CACHE, exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    return data
+
+
+def _split_name(url):
+    """chart.umd.min.js -> ("chart.umd.min", "js")"""
+    stem, _, ext = url.rsplit("/", 1)[-1].partition("?")[0].rpartition(".")
+    return stem, ext
+
+
+def _vendor_fonts(css_url):
+    css = fetch(css_url).decode("utf-8")
+
+    def font(m):
+        stem, ext = _split_name(m.group(1))
+        url = write_hashed("vendor", stem, ext, fetch(m.group(1)))
+        return f"url({url.rsplit('/', 1)[-1]})"  # relative to the stylesheet in vendor/
+
+    css = FONT_FILE_URL_RE.sub(font, css)
+    return write_hashed("vendor", "fonts", "css", css.encode("utf-8"))
+
+
+def localize(html):
+    """Rewrite CDN URLs in ``html`` to copies under dashboard/vendor/.
+
+    Returns (html, count of URLs localized).
+    """
+    localized = {}
+    for url in sorted(set(SCRIPT_URL_RE.findall(html) + FONT_CSS_URL_RE.findall(html))):
+        try:
+            if FONT_CSS_URL_RE.fullmatch(url):
+                localized[url] = _vendor_fonts(url)
+            else:
+                localized[url] = write_hashed("vendor", *_split_name(url), fetch(url))
+        except OSError as e:
+            print(f"  [vendor] Keeping CDN link for {url} ({e})")
+
+    for url, local in localized.items():
+        html = html.replace(url, local)
+    return html, len(localized)
@@ -0,0 +1,305 @@
+"""SQLite store of every extracted fact, shared by all properties.
+
+build_data writes each property's outputs into one database next to the
+project folders (config.WAREHOUSE_DB), so cross-week and cross-property
+questions are a query instead of loading and walking JSON:
+
+    facts(property, dataset, period, metric, value)
+        leasing    period = week ending (YYYY-MM-DD), one row per numeric field
+        t12        period = YYYY-MM, current and prior T-12 (current wins on overlap);
+                   companion properties' T-12s are stored under their own id
+        budget     period = YYYY-MM
+        loan       period = YYYY (amortization), YYYY-MM (debt service), or the
+                   as-of date for scalar terms such as current_balance
+    comps(property, comp, unit_type, metric, value)     unit_type '' = whole property
+    properties(property, name, units, sf, owner)        owner = property whose build
+                                                        loads it (companions: the host)
+    actions(property, date, category, status, source, responsible, sentiment, text)
+    loads(property, dataset, rows, loaded_at)
+
+A build replaces its property's rows in one transaction. Query helpers
+at the bottom cover the common shapes; ``query()`` runs anything else.
+"""
+import datetime
+import json
+import os
+import re
+import sqlite3
+from src.config import DATA_OUTPUT, PROPERTY, PROPERTY_ID, WAREHOUSE_DB
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS facts (
+    property TEXT NOT NULL,
+    dataset  TEXT NOT NULL,
+    period   TEXT NOT NULL,
+    metric   TEXT NOT NULL,
+    value    REAL,
+    PRIMARY KEY (property, dataset, period, metric)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS facts_metric ON facts (property, metric, period);
+CREATE INDEX IF NOT EXISTS facts_portfolio ON facts (dataset, metric, period);
+CREATE TABLE IF NOT EXISTS comps (
+    property  TEXT NOT NULL,
+    comp      TEXT NOT NULL,
+    unit_type TEXT NOT NULL,
+    metric    TEXT NOT NULL,
+    value     REAL,
+    PRIMARY KEY (property, comp, unit_type, metric)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS actions (
+    property    TEXT NOT NULL,
+    date        TEXT,
+    category    TEXT,
+    status      TEXT,
+    source      TEXT,
+    responsible TEXT,
+    sentiment   TEXT,
+    text        TEXT
+);
+CREATE INDEX IF NOT EXISTS actions_date ON actions (property, date);
+CREATE TABLE IF NOT EXISTS properties (
+    property TEXT PRIMARY KEY,
+    name     TEXT,
+    units    INTEGER,
+    sf       REAL,
+    owner    TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS loads (
+    property  TEXT NOT NULL,
+    dataset   TEXT NOT NULL,
+    rows      INTEGER NOT NULL,
+    loaded_at TEXT NOT NULL,
+    PRIMARY KEY (property, dataset)
+);
+"""
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+# Map positions, not measurements
+SKIPPED_FIELDS = {"lat", "lng"}
+
+
+def connect(path=WAREHOUSE_DB):
+    """Open the warehouse, creating the schema on first use."""
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")  # readers don't block a build
+    conn.executescript(SCHEMA)
+    return conn
+
+
+# ---------------------------------------------------------------------------
+#  Flattening extractor output into rows
+# ---------------------------------------------------------------------------
+
+def _number(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return float(value)
+
+
+def month_period(label, year=None):
+    """'Oct 2024' -> '2024-10'; 'Jan' with year 2026 -> '2026-01'; None if unparseable."""
+    match = re.match(r"^([A-Za-z]{3})[a-z]*\.?\s*(\d{4})?$", str(label).strip())
+    if not match or match.group(1).title() not in MONTHS:
+        return None
+    year = match.group(2) or year
+    return f"{year}-{MONTHS.index(match.group(1).title()) + 1:02d}" if year else None
+
+
+def _monthly_rows(months, metrics, year=None):
+    periods = [month_period(m, year) for m in months]
+    for metric, values in metrics.items():
+        if not isinstance(values, list):
+            continue
+        for period, value in zip(periods, values):
+            value = _number(value)
+            if period and value is not None:
+                yield period, metric, value
+
+
+def _leasing_rows(data):
+    for week in data.get("weeks", []):
+        for metric, value in week.items():
+            value = _number(value)
+            if value is not None and week.get("week_ending"):
+                yield week["week_ending"], metric, value
+
+
+def _t12_rows(data):
+    rows = {}
+    # Prior first so the current statement wins where periods overlap
+    for statement in (data.get("prior"), data):
+        if statement and statement.get("months"):
+            for period, metric, value in _monthly_rows(statement["months"], statement.get("metrics", {})):
+                rows[period, metric] = value
+    return [(period, metric, value) for (period, metric), value in rows.items()]
+
+
+def _companions(data):
+    """{slug: (properties row, t12 rows)} for the companion T-12s."""
+    result = {}
+    for slug, comp in data.items():
+        statement = dict(comp.get("current") or {}, prior=comp.get("prior"))
+        result[slug] = ((comp.get("name"), comp.get("total_units"), comp.get("total_sf")),
+                        _t12_rows(statement))
+    return result
+
+
+def _budget_rows(data):
+    if not data.get("year"):
+        return []
+    return list(_monthly_rows(data.get("months", []), data.get("metrics", {}), data["year"]))
+
+
+def _loan_rows(data, budget_year=None):
+    if not data:
+        return []
+    rows = []
+    as_of = data.get("as_of_date") or ""
+    for metric, value in data.items():
+        value = _number(value)
+        if value is not None:
+            rows.append((as_of, metric, value))
+    for entry in data.get("amort_table") or []:
+        for metric, value in entry.items():
+            if metric != "year" and _number(value) is not None:
+                rows.append((str(entry["year"]), metric, _number(value)))
+    for key, value in data.items():
+        match = re.match(r"^ds_(\d{4})_monthly$", key)
+        if match and isinstance(value, dict):
+            rows.extend(_monthly_rows(MONTHS, value, match.group(1)))
+    if data.get("monthly_interest_schedule") and budget_year:
+        rows.extend(_monthly_rows(MONTHS, {"interest": data["monthly_interest_schedule"]}, budget_year))
+    return rows
+
+
+def _comps_rows(data):
+    rows = []
+    for comp in data.get("competitors", []):
+        name = comp.get("name")
+        for metric, value in comp.items():
+            if metric not in SKIPPED_FIELDS and _number(value) is not None:
+                rows.append((name, "", metric, _number(value)))
+        for unit_type, value in (comp.get("rent_by_type") or {}).items():
+            # Greenwood's comps give rent PSF per type, Ancora's a dict of rent/psf/sf
+            fields = value if isinstance(value, dict) else {"psf": value}
+            for metric, number in fields.items():
+                if _number(number) is not None:
+                    rows.append((name, unit_type, metric, _number(number)))
+    return rows
+
+
+def _actions_rows(data):
+    return [(a.get("date"), a.get("strategy_category") or a.get("category"), a.get("status"),
+             a.get("source"), a.get("responsible"), a.get("sentiment"), a.get("action"))
+            for a in data.get("actions", [])]
+
+
+def _read(name):
+    path = os.path.join(DATA_OUTPUT, name)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f) or {}
+
+
+# ---------------------------------------------------------------------------
+#  Loading
+# ---------------------------------------------------------------------------
+
+def store_outputs(prop=PROPERTY_ID, path=WAREHOUSE_DB):
+    """Replace ``prop``'s rows with what is in data_output/; returns row counts by dataset."""
+    budget = _read("budget_monthly.json")
+    facts = {
+        "leasing": list(_leasing_rows(_read("leasing_weekly.json"))),
+        "t12": _t12_rows(_read("financials_monthly.json")),
+        "budget": _budget_rows(budget),
+        "loan": _loan_rows(_read("loan_info.json"), budget.get("year")),
+    }
+    comps = _comps_rows(_read("comps.json"))
+    companions = _companions(_read("companions.json"))
+    actions = _actions_rows(_read("actions_log.json"))
+    counts = {name: len(rows) for name, rows in facts.items()}
+    counts.update(comps=len(comps), actions=len(actions),
+                  companions=sum(len(rows) for _info, rows in companions.values()))
+    loaded_at = datetime.datetime.now().isoformat(timespec="seconds")
+
+    conn = connect(path)
+    try:
+        with conn:
+            for old in conn.execute("SELECT property FROM properties WHERE owner = ? AND property != ?",
+                                    (prop, prop)).fetchall():
+                conn.execute("DELETE FROM facts WHERE property = ?", (old[0],))
+            conn.execute("DELETE FROM properties WHERE owner = ?", (prop,))
+            conn.execute("INSERT OR REPLACE INTO properties VALUES (?, ?, ?, ?, ?)",
+                         (prop, PROPERTY.get("name"), PROPERTY.get("total_units"), PROPERTY.get("total_sf"), prop))
+            for slug, (info, rows) in companions.items():
+                conn.execute("INSERT OR REPLACE INTO properties VALUES (?, ?, ?, ?, ?)", (slug, *info, prop))
+                conn.executemany("INSERT OR REPLACE INTO facts VALUES (?, 't12', ?, ?, ?)",
+                                 ((slug,) + tuple(row) for row in rows))
+            for dataset, rows in facts.items():
+                conn.execute("DELETE FROM facts WHERE property = ? AND dataset = ?", (prop, dataset))
+                conn.executemany("INSERT OR REPLACE INTO facts VALUES (?, ?, ?, ?, ?)",
+                                 ((prop, dataset) + tuple(row) for row in rows))
+            conn.execute("DELETE FROM comps WHERE property = ?", (prop,))
+            conn.executemany("INSERT OR REPLACE INTO comps VALUES (?, ?, ?, ?, ?)",
+                             ((prop,) + row for row in comps))
+            conn.execute("DELETE FROM actions WHERE property = ?", (prop,))
+            conn.executemany("INSERT INTO actions VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                             ((prop,) + row for row in actions))
+            conn.executemany("INSERT OR REPLACE INTO loads VALUES (?, ?, ?, ?)",
+                             ((prop, dataset, n, loaded_at) for dataset, n in counts.items()))
+    finally:
+        conn.close()
+    return counts
+
+
+# ---------------------------------------------------------------------------
+#  Queries
+# ---------------------------------------------------------------------------
+
+def query(sql, params=(), path=WAREHOUSE_DB):
+    """Run any SELECT; returns a list of dicts."""
+    conn = connect(path)
+    try:
+        return [dict(row) for row in conn.execute(sql, params)]
+    finally:
+        conn.close()
+
+
+def series(metric, prop=PROPERTY_ID, dataset=None, start=None, end=None, path=WAREHOUSE_DB):
+    """[(period, value), ...] of one metric for one property, oldest first."""
+    sql = "SELECT period, value FROM facts WHERE property = ? AND metric = ?"
+    params = [prop, metric]
+    for clause, value in (("dataset = ?", dataset), ("period >= ?", start), ("period <= ?", end)):
+        if value is not None:
+            sql += " AND " + clause
+            params.append(value)
+    return [(row["period"], row["value"]) for row in query(sql + " ORDER BY period", params, path)]
+
+
+def latest(metric, dataset, path=WAREHOUSE_DB):
+    """{property: (period, value)} of the most recent value of a metric, for every property."""
+    rows = query("SELECT property, MAX(period) AS period, value FROM facts "
+                 "WHERE dataset = ? AND metric = ? GROUP BY property", (dataset, metric), path)
+    return {row["property"]: (row["period"], row["value"]) for row in rows}
+
+
+def pivot(metrics, prop=PROPERTY_ID, dataset=None, path=WAREHOUSE_DB):
+    """{period: {metric: value}} for several metrics of one property."""
+    sql = (f"SELECT period, metric, value FROM facts WHERE property = ? "
+           f"AND metric IN ({', '.join('?' * len(metrics))})")
+    params = [prop, *metrics]
+    if dataset is not None:
+        sql += " AND dataset = ?"
+        params.append(dataset)
+    table = {}
+    for row in query(sql + " ORDER BY period", params, path):
+        table.setdefault(row["period"], {})[row["metric"]] = row["value"]
+    return table
+
+
+def total(metric, dataset, start, end, path=WAREHOUSE_DB):
+    """{property: sum of a metric over [start, end]}, e.g. YTD NOI across the portfolio."""
+    rows = query("SELECT property, SUM(value) AS total FROM facts WHERE dataset = ? AND metric = ? "
+                 "AND period BETWEEN ? AND ? GROUP BY property", (dataset, metric, start, end), path)
+    return {row["property"]: row["total"] for row in rows}
@@ -0,0 +1,101 @@
+// Service worker for the hosted dashboard (generated by src/service_worker.py)
+//
+// - Precache: the shell (index.html) plus every content-hashed data file,
+//   code chunk and vendored library of this build.
+// - Hashed files never change: served cache-first.
+// - The shell and other same-origin GETs (photos included): stale-while-
+//   revalidate, so repeat visits render from cache and pick up a new
+//   build on the next load.
+// - /api/v1/{property}/* GETs: stale-while-revalidate too; when the
+//   background refresh brings different data the page is told to re-sync.
+const CACHE_PREFIX = /* __CACHE_PREFIX__ */;
+const PRECACHE_NAME = CACHE_PREFIX + /* __CACHE_VERSION__ */;
+const RUNTIME_NAME = CACHE_PREFIX + 'runtime';
+const PRECACHE_URLS = /* __PRECACHE_URLS__ */;
+const API_PREFIX = '/api/v1/';
+const HASHED_RE = /\.[0-9a-f]{10}\.[A-Za-z0-9]+$/;
+
+self.addEventListener('install', event => {
+  event.waitUntil((async () => {
+    const cache = await caches.open(PRECACHE_NAME);
+    // Reuse hashed files already cached by the previous build
+    await Promise.all(PRECACHE_URLS.map(async url => {
+      const request = new Request(new URL(url, self.registration.scope));
+      const cached = HASHED_RE.test(url) && await caches.match(request);
+      await cache.put(request, cached || await fetch(request, { cache: 'no-cache' }).then(checkOk));
+    }));
+    await self.skipWaiting();
+  })());
+});
+
+self.addEventListener('activate', event => {
+  event.waitUntil((async () => {
+    for (const name of await caches.keys()) {
+      if (name.startsWith(CACHE_PREFIX) && name !== PRECACHE_NAME && name !== RUNTIME_NAME) {
+        await caches.delete(name);
+      }
+    }
+    await self.clients.claim();
+  })());
+});
+
+self.addEventListener('fetch', event => {
+  const request = event.request;
+  const url = new URL(request.url);
+  if (request.method !== 'GET' || url.origin !== self.location.origin) return;
+  if (url.pathname.startsWith(API_PREFIX)) {
+    // Conditional requests (If-None-Match) already cost next to nothing;
+    // no-store ones (deltas, job status) must see the server's current answer
+    if (!request.headers.has('If-None-Match') && request.cache !== 'no-store') {
+      event.respondWith(staleWhileRevalidate(event, request, true));
+    }
+  } else if (HASHED_RE.test(url.pathname)) {
+    event.respondWith(cacheFirst(request));
+  } else {
+    event.respondWith(staleWhileRevalidate(event, request, false));
+  }
+});
+
+function checkOk(response) {
+  if (!response.ok) throw new Error('HTTP ' + response.status + ' for ' + response.url);
+  return response;
+}
+
+async function cacheFirst(request) {
+  const cached = await caches.match(request);
+  if (cached) return cached;
+  const response = await fetch(request);
+  if (response.ok) (await caches.open(RUNTIME_NAME)).put(request, response.clone());
+  return response;
+}
+
+async function staleWhileRevalidate(event, request, notify) {
+  const cached = await caches.match(request, { ignoreSearch: request.mode === 'navigate' });
+  const previous = notify && cached ? cached.clone() : null;
+  const refresh = fetch(request).then(async response => {
+    if (response.ok) {
+      await (await caches.open(cacheNameOf(request))).put(request, response.clone());
+      if (previous && await changed(previous, response.clone())) {
+        for (const client of await self.clients.matchAll()) {
+          client.postMessage({ type: 'api-updated', url: request.url });
+        }
+      }
+    }
+    return response;
+  });
+  if (!cached) return refresh;
+  event.waitUntil(refresh.catch(() => {}));  // offline: keep serving the cached copy
+  return cached;
+}
+
+// The shell lives in the precache; keep its refreshed copy there
+function cacheNameOf(request) {
+  return new URL(request.url).pathname === new URL(self.registration.scope).pathname
+    ? PRECACHE_NAME : RUNTIME_NAME;
+}
+
+async function changed(cached, response) {
+  const etag = response.headers.get('ETag');
+  if (etag && etag === cached.headers.get('ETag')) return false;
+  return (await cached.text()) !== (await response.text());
+}
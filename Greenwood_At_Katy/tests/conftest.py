@@ -0,0 +1,5 @@
+"""Tests for this project's src/ modules; Ancora's copies of the shared ones are identical."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,94 @@
+"""src/portfolio.py: per-property KPIs from the warehouse and their unit-weighted roll-up."""
+import json
+
+import pytest
+
+from src import portfolio, warehouse
+
+
+def months(year, first=1, last=12):
+    return [f"{year}-{m:02d}" for m in range(first, last + 1)]
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = str(tmp_path / "portfolio.sqlite")
+    conn = warehouse.connect(path)
+    with conn:
+        conn.executemany("INSERT INTO properties VALUES (?, ?, ?, ?, ?)", [
+            ("gwk", "Greenwood", 324, 310836, "gwk"),
+            ("trails", "Trails", 288, 278784, "gwk"),  # companion loaded by Greenwood's build
+            ("anc", "Ancora", 220, 200000, "anc"),
+        ])
+        rows = [
+            ("gwk", "leasing", "2026-01-02", "occupancy_pct", 50),  # older week: not used
+            ("gwk", "leasing", "2026-01-09", "occupancy_pct", 90),
+            ("gwk", "leasing", "2026-01-09", "leased_pct", 95),
+            ("anc", "leasing", "2026-01-09", "occupancy_pct", 80),
+        ]
+        rows += [("gwk", "t12", p, "noi", 1000) for p in months(2024)]
+        rows += [("gwk", "t12", p, "noi", 1100) for p in months(2025)]
+        rows += [("gwk", "loan", p, "interest", 500) for p in months(2025)]
+        rows += [("trails", "t12", p, "noi", 800) for p in months(2025)]
+        rows += [("anc", "t12", p, "noi", 500) for p in months(2025, first=7)]  # six months since lease-up
+        conn.executemany("INSERT INTO facts VALUES (?, ?, ?, ?, ?)", rows)
+    conn.close()
+    return path
+
+
+def update(db, tmp_path, prop):
+    return portfolio.update(prop, db, str(tmp_path / "portfolio_summary.json"))
+
+
+def test_property_kpis(db, tmp_path):
+    summary = update(db, tmp_path, "gwk")
+    gwk = summary["properties"]["gwk"]["kpis"]
+    assert gwk["occupancy_pct"] == 90 and gwk["leased_pct"] == 95
+    assert gwk["noi_t12"] == 13200 and gwk["noi_prior_t12"] == 12000 and gwk["noi_yoy_pct"] == 10.0
+    assert gwk["debt_service"] == 6000 and gwk["dscr"] == 2.2
+    assert gwk["noi_per_unit"] == round(13200 / 324, 2)
+    assert summary["properties"]["gwk"]["as_of"]["occupancy_pct"] == "2026-01-09"
+    # The host's build also recomputes its companions
+    assert summary["properties"]["trails"]["kpis"]["noi_t12"] == 9600
+    assert summary["properties"]["trails"]["companion_of"] == "gwk"
+
+
+def test_short_history_is_annualized_without_yoy(db, tmp_path):
+    anc = update(db, tmp_path, "anc")["properties"]["anc"]["kpis"]
+    assert anc["t12_months"] == 6 and anc["noi_t12"] == 6000
+    assert "noi_yoy_pct" not in anc and "dscr" not in anc
+
+
+def test_rollup_weights_by_size_and_reports_coverage(db, tmp_path):
+    update(db, tmp_path, "gwk")
+    summary = update(db, tmp_path, "anc")
+    total = summary["portfolio"]
+    assert total["properties"] == 3 and total["units"] == 324 + 288 + 220
+    # Occupancy is weighted by units; Trails has no leasing data, so it is left out
+    assert total["occupancy_pct"] == round((90 * 324 + 80 * 220) / (324 + 220), 2)
+    assert summary["coverage"]["occupancy_pct"] == ["anc", "gwk"]  # hosts first, by id
+    assert total["noi_per_unit"] == round((13200 + 9600 + 6000) / (324 + 288 + 220), 2)
+    assert total["noi_t12"] == 13200 + 9600 + 6000
+    # Only Greenwood has debt service and a complete prior year
+    assert total["dscr"] == 2.2 and summary["coverage"]["dscr"] == ["gwk"]
+    assert total["noi_yoy_pct"] == 10.0 and summary["coverage"]["noi_yoy_pct"] == ["gwk"]
+    assert total["opex_per_sf"] is None and summary["coverage"]["opex_per_sf"] == []
+    with open(tmp_path / "portfolio_summary.json", encoding="utf-8") as f:
+        assert json.load(f)["portfolio"] == total
+
+
+def test_other_properties_kpis_wait_for_their_build(db, tmp_path):
+    summary = update(db, tmp_path, "gwk")
+    assert summary["properties"]["anc"]["kpis"] == {}
+    assert summary["coverage"]["occupancy_pct"] == ["gwk"]
+
+
+def test_removed_properties_drop_out(db, tmp_path):
+    update(db, tmp_path, "anc")
+    conn = warehouse.connect(db)
+    with conn:
+        conn.execute("DELETE FROM properties WHERE property = 'anc'")
+    conn.close()
+    summary = update(db, tmp_path, "gwk")
+    assert "anc" not in summary["properties"]
+    assert warehouse.query("SELECT * FROM property_kpis WHERE property = 'anc'", path=db) == []
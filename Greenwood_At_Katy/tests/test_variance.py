@@ -0,0 +1,99 @@
+"""src/variance.py: aligning budget and T-12 months, and the shared year-to-date window."""
+import pytest
+
+from src import variance
+
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+LINES = [
+    ("total_income", "TOTAL INCOME", ["total_income"], "income"),
+    ("controllable_expenses", "CONTROLLABLE EXPENSES", ["payroll_benefits", "utilities"], "expense"),
+    ("total_opex", "Total OpEx", ["total_opex"], "expense"),
+    ("noi", "NOI", ["noi"], "income"),
+    ("taxes", "Taxes", ["taxes"], "expense"),  # not on the T-12: left out
+]
+
+
+def budget(**overrides):
+    metrics = {"total_income": [1000] * 12, "controllable_expenses": [300] * 12,
+               "total_opex": [400] * 12, "noi": [600] * 12, "taxes": [50] * 12}
+    metrics.update(overrides)
+    return {"year": 2026, "months": MONTHS, "metrics": metrics, "source_file": "budget.xlsx"}
+
+
+def t12(months, **metrics):
+    """A statement over ``months`` with the same value every month, unless a list is given."""
+    base = {"total_income": 1100, "payroll_benefits": 200, "utilities": 120, "total_opex": 380, "noi": 720}
+    base.update(metrics)
+    return {"months": months, "metrics": {k: v if isinstance(v, list) else [v] * len(months)
+                                          for k, v in base.items()}}
+
+
+def lines(result):
+    return {line["key"]: line for line in result["lines"]}
+
+
+def test_aligns_trailing_months_onto_the_budget_year():
+    financials = t12([f"{m} 2025" for m in MONTHS[3:]] + ["Jan 2026", "Feb 2026", "Mar 2026"])
+    result = variance.compute(budget(), financials, units=100, lines=LINES)
+    assert result["status"] == "loaded" and result["as_of"] == "2026-03" and result["actual_months"] == 3
+    assert result["actual_mask"] == [True] * 3 + [False] * 9
+    income = lines(result)["total_income"]
+    assert income["actual"][:4] == [1100, 1100, 1100, None]
+    assert income["variance"][:3] == [100, 100, 100] and income["variance_pct"][0] == 10.0
+    assert income["variance_per_unit"][0] == 1.0
+    assert income["ytd"] == {"budget": 3000, "actual": 3300, "variance": 300,
+                             "variance_pct": 10.0, "variance_per_unit": 3.0}
+    assert "taxes" not in lines(result)
+
+
+def test_sums_t12_lines_and_signs_favorability():
+    result = variance.compute(budget(), t12(["Jan 2026"]), units=100, lines=LINES)
+    controllable = lines(result)["controllable_expenses"]
+    assert controllable["actual"][0] == 320 and controllable["variance"][0] == 20
+    assert controllable["favorable"] == -1 and controllable["total"]  # over budget on an expense: unfavorable
+    assert lines(result)["noi"]["favorable"] == 1 and not lines(result)["total_opex"]["total"]
+
+
+def test_current_statement_wins_and_empty_months_are_skipped():
+    financials = t12(["Jan 2026", "Feb 2026", "Mar 2026"], total_income=[1100, 1200, 0], total_opex=[380, 380, 0],
+                     noi=[720, 820, 0])
+    financials["prior"] = t12(["Dec 2025", "Jan 2026"], total_income=900)
+    result = variance.compute(budget(), financials, units=100, lines=LINES)
+    assert lines(result)["total_income"]["actual"][:3] == [1100, 1200, None]
+    assert result["actual_months"] == 2
+
+
+def test_every_line_shares_one_ytd_window():
+    missing_january = [None] + [400] * 11
+    financials = t12(["Jan 2026", "Feb 2026", "Mar 2026"])
+    result = variance.compute(budget(total_opex=missing_january), financials, units=100, lines=LINES)
+    assert result["actual_months"] == 3
+    by_key = lines(result)
+    assert by_key["total_opex"]["gaps"] == {"budget": ["Jan"], "actual": []}
+    assert by_key["total_income"]["gaps"] == {"budget": [], "actual": []}
+    # The gap counts as 0 instead of shrinking the window
+    assert by_key["total_opex"]["ytd"]["budget"] == 800 and by_key["total_opex"]["ytd"]["actual"] == 1140
+    assert by_key["total_income"]["ytd"]["actual"] == 3300
+    assert by_key["total_opex"]["variance"][0] is None
+    assert {key: line["ytd_actual"].index(None) for key, line in by_key.items()} == dict.fromkeys(by_key, 3)
+
+
+def test_actual_gaps_are_flagged_too():
+    financials = t12(["Jan 2026", "Feb 2026"], utilities=[120, None])
+    controllable = lines(variance.compute(budget(), financials, units=100, lines=LINES))["controllable_expenses"]
+    assert controllable["actual"][:2] == [320, None]
+    assert controllable["gaps"] == {"budget": [], "actual": ["Feb"]}
+    assert controllable["ytd"]["actual"] == 320 and controllable["ytd"]["budget"] == 600
+
+
+@pytest.mark.parametrize("budget_doc, financials, status", [
+    ({}, t12(["Jan 2026"]), "awaiting_data"),
+    ({"year": 2026, "months": MONTHS, "metrics": {}}, t12(["Jan 2026"]), "awaiting_data"),
+    (budget(), t12(["Jan 2025", "Feb 2025"]), "awaiting_actuals"),
+    (budget(), None, "awaiting_actuals"),
+])
+def test_statuses(budget_doc, financials, status):
+    result = variance.compute(budget_doc, financials, units=100, lines=LINES)
+    assert result["status"] == status
+    if status == "awaiting_actuals":
+        assert result["as_of"] is None and result["actual_months"] == 0
@@ -0,0 +1,99 @@
+"""src/warehouse.py: flattening outputs into facts, and replacing only the rows a build owns."""
+import json
+
+import pytest
+
+from src import warehouse
+
+LEASING = {"weeks": [
+    {"week_ending": "2026-01-02", "occupancy_pct": 90.1, "gross_leases": 4, "notes": ["text"], "flag": True},
+    {"week_ending": "2026-01-09", "occupancy_pct": 90.5, "gross_leases": None},
+]}
+T12 = {
+    "months": ["Feb 2025", "Mar 2025"],
+    "metrics": {"noi": [100, 110], "total_income": [300, 310], "label": "not a series"},
+    "prior": {"months": ["Jan 2025", "Feb 2025"], "metrics": {"noi": [90, 95]}},
+}
+BUDGET = {"year": 2026, "months": ["Jan", "Feb"], "metrics": {"noi": [120, 125]}}
+COMPANIONS = {"trails": {"name": "Trails", "total_units": 288, "total_sf": 278784,
+                         "current": {"months": ["Mar 2025"], "metrics": {"noi": [80]}}}}
+
+
+def write_outputs(directory, **datasets):
+    names = {"leasing": "leasing_weekly.json", "t12": "financials_monthly.json",
+             "budget": "budget_monthly.json", "companions": "companions.json"}
+    for name, data in datasets.items():
+        (directory / names[name]).write_text(json.dumps(data), encoding="utf-8")
+
+
+@pytest.fixture
+def outputs(tmp_path, monkeypatch):
+    directory = tmp_path / "data_output"
+    directory.mkdir()
+    monkeypatch.setattr(warehouse, "DATA_OUTPUT", str(directory))
+    return directory
+
+
+@pytest.fixture
+def db(tmp_path):
+    return str(tmp_path / "portfolio.sqlite")
+
+
+def facts(db, prop, dataset):
+    return {(r["period"], r["metric"]): r["value"] for r in warehouse.query(
+        "SELECT period, metric, value FROM facts WHERE property = ? AND dataset = ?", (prop, dataset), db)}
+
+
+@pytest.mark.parametrize("label, year, period", [
+    ("Oct 2024", None, "2024-10"), ("Jan", 2026, "2026-01"), ("Sept. 2025", None, "2025-09"),
+    ("Jan", None, None), ("Total", 2026, None), ("Foo 2026", None, None),
+])
+def test_month_period(label, year, period):
+    assert warehouse.month_period(label, year) == period
+
+
+def test_numeric_fields_become_facts(outputs, db):
+    write_outputs(outputs, leasing=LEASING, t12=T12, budget=BUDGET)
+    counts = warehouse.store_outputs("gwk", db)
+    assert facts(db, "gwk", "leasing") == {("2026-01-02", "occupancy_pct"): 90.1, ("2026-01-02", "gross_leases"): 4,
+                                           ("2026-01-09", "occupancy_pct"): 90.5}
+    # Current statement wins over the prior one where months overlap
+    assert facts(db, "gwk", "t12") == {("2025-01", "noi"): 90, ("2025-02", "noi"): 100, ("2025-03", "noi"): 110,
+                                       ("2025-02", "total_income"): 300, ("2025-03", "total_income"): 310}
+    assert facts(db, "gwk", "budget") == {("2026-01", "noi"): 120, ("2026-02", "noi"): 125}
+    assert counts["leasing"] == 3 and counts["t12"] == 5
+    loads = {r["dataset"]: r["rows"] for r in warehouse.query("SELECT * FROM loads", path=db)}
+    assert loads["leasing"] == 3 and loads["budget"] == 2
+
+
+def test_rebuild_replaces_only_its_own_rows(outputs, db):
+    write_outputs(outputs, leasing=LEASING, t12=T12)
+    warehouse.store_outputs("gwk", db)
+    warehouse.store_outputs("anc", db)
+    write_outputs(outputs, leasing={"weeks": LEASING["weeks"][1:]}, t12={})
+    warehouse.store_outputs("gwk", db)
+    assert facts(db, "gwk", "leasing") == {("2026-01-09", "occupancy_pct"): 90.5}
+    assert facts(db, "gwk", "t12") == {}
+    assert len(facts(db, "anc", "leasing")) == 3 and len(facts(db, "anc", "t12")) == 5
+
+
+def test_companions_are_owned_by_the_host_build(outputs, db):
+    write_outputs(outputs, companions=COMPANIONS)
+    warehouse.store_outputs("gwk", db)
+    props = {r["property"]: r for r in warehouse.query("SELECT * FROM properties", path=db)}
+    assert props["trails"]["owner"] == "gwk" and props["trails"]["units"] == 288
+    assert facts(db, "trails", "t12") == {("2025-03", "noi"): 80}
+    # Dropped from companions.json: its rows go with the next build of the host
+    write_outputs(outputs, companions={})
+    warehouse.store_outputs("gwk", db)
+    assert [r["property"] for r in warehouse.query("SELECT property FROM properties", path=db)] == ["gwk"]
+    assert facts(db, "trails", "t12") == {}
+
+
+def test_query_helpers(outputs, db):
+    write_outputs(outputs, leasing=LEASING, t12=T12)
+    warehouse.store_outputs("gwk", db)
+    assert warehouse.series("noi", "gwk", "t12", start="2025-02", path=db) == [("2025-02", 100), ("2025-03", 110)]
+    assert warehouse.latest("occupancy_pct", "leasing", db) == {"gwk": ("2026-01-09", 90.5)}
+    assert warehouse.pivot(["noi", "total_income"], "gwk", "t12", db)["2025-03"] == {"noi": 110, "total_income": 310}
+    assert warehouse.total("noi", "t12", "2025-01", "2025-02", db) == {"gwk": 190}
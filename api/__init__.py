@@ -0,0 +1,11 @@
+"""Server-side building blocks for the dashboards' /api/v1 endpoints.
+
+The production API runs on the DigitalOcean host; local_server.py can mount
+these modules (PPP_API_DIR) to serve the same protocol from local files.
+"""
+from api.store import DatasetStore, dataset_version
+from api.jobs import JobQueue
+from api.ocr import OcrService
+from api.routes import handle, owns
+
+__all__ = ["DatasetStore", "JobQueue", "OcrService", "dataset_version", "handle", "owns"]
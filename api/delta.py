@@ -0,0 +1,115 @@
+"""Compute and apply deltas between two versions of a dashboard dataset.
+
+A delta is a list of operations, each addressing a value by its key path
+from the document root::
+
+    {"op": "set",    "path": [...], "value": v}       replace / add a value
+    {"op": "del",    "path": [...]}                   remove a dict key
+    {"op": "append", "path": [...], "drop": k,        drop k items from the
+     "items": [...]}                                  front, append items
+    {"op": "upsert", "path": [...], "key": "week_ending",
+     "items": [...], "remove": [...]}                 keyed record list
+
+"append" covers both new weeks and a rolling T-12 window that drops its
+oldest month; "upsert" replaces weekly rows by week_ending in place and
+appends new ones. The dashboard's applyDelta() implements the same rules.
+
+Clients send their own small edits the other way as a JSON merge patch
+(RFC 7396): ``{key: value}`` sets a key, ``{key: null}`` removes it.
+"""
+import copy
+
+# Record lists that are diffed row by row, keyed on this field
+KEYED_LISTS = {"weeks": "week_ending"}
+
+
+def _walk(doc, path):
+    for key in path:
+        doc = doc[key]
+    return doc
+
+
+def apply(doc, ops):
+    """Apply a delta to ``doc`` in place and return the (possibly new) root."""
+    for op in ops:
+        path = op["path"]
+        if not path:
+            doc = copy.deepcopy(op["value"])
+            continue
+        parent, key = _walk(doc, path[:-1]), path[-1]
+        kind = op["op"]
+        if kind == "set":
+            parent[key] = copy.deepcopy(op["value"])
+        elif kind == "del":
+            del parent[key]
+        elif kind == "append":
+            del parent[key][:op["drop"]]
+            parent[key].extend(copy.deepcopy(op["items"]))
+        elif kind == "upsert":
+            field, removed = op["key"], set(op.get("remove", []))
+            rows = [row for row in parent[key] if row.get(field) not in removed]
+            index = {row.get(field): i for i, row in enumerate(rows)}
+            for item in copy.deepcopy(op["items"]):
+                if item[field] in index:
+                    rows[index[item[field]]] = item
+                else:
+                    index[item[field]] = len(rows)
+                    rows.append(item)
+            parent[key] = rows
+        else:
+            raise ValueError(f"Unknown delta op: {kind}")
+    return doc
+
+
+def _diff_list(old, new, path):
+    field = KEYED_LISTS.get(path[-1]) if path else None
+    if field and all(isinstance(r, dict) and field in r for r in old + new):
+        new_keys = {r[field] for r in new}
+        old_rows = {r[field]: r for r in old}
+        op = {"op": "upsert", "path": list(path), "key": field,
+              "items": [r for r in new if old_rows.get(r[field]) != r],
+              "remove": [r[field] for r in old if r[field] not in new_keys]}
+        if not op["remove"]:
+            del op["remove"]
+        return [op]
+
+    # Longest overlap between the tail of ``old`` and the head of ``new``
+    for drop in range(len(old) + 1):
+        kept = len(old) - drop
+        if kept <= len(new) and old[drop:] == new[:kept]:
+            return [{"op": "append", "path": list(path), "drop": drop, "items": new[kept:]}]
+    return [{"op": "set", "path": list(path), "value": new}]
+
+
+def merge_patch(doc, patch):
+    """Apply a JSON merge patch to ``doc`` in place and return the new root."""
+    if not isinstance(patch, dict):
+        return copy.deepcopy(patch)
+    if not isinstance(doc, dict):
+        doc = {}
+    for key, value in patch.items():
+        if value is None:
+            doc.pop(key, None)
+        else:
+            doc[key] = merge_patch(doc.get(key), value)
+    return doc
+
+
+def diff(old, new, path=()):
+    """Operations that turn ``old`` into ``new``; [] when they are equal."""
+    if old == new:
+        return []
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = [{"op": "del", "path": [*path, key]} for key in old if key not in new]
+        for key, value in new.items():
+            if key not in old:
+                ops.append({"op": "set", "path": [*path, key], "value": value})
+            else:
+                ops.extend(diff(old[key], value, (*path, key)))
+        return ops
+    if isinstance(old, list) and isinstance(new, list) and path:
+        ops = _diff_list(old, new, path)
+        # Keyed rows that were reordered can't be expressed as an upsert
+        if apply({"v": copy.deepcopy(old)}, [dict(op, path=["v"]) for op in ops])["v"] == new:
+            return ops
+    return [{"op": "set", "path": list(path), "value": new}]
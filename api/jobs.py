@@ -0,0 +1,92 @@
+"""In-process background jobs with pollable status.
+
+Long-running work (spreadsheet extraction) runs on a small thread pool
+instead of inside the HTTP request. ``submit()`` returns immediately with
+a job whose ``to_dict()`` is what the status route reports:
+
+    {"id", "kind", "status": "queued" | "running" | "done" | "error",
+     "stage", "message", "result", "error", "created", "updated"}
+
+A job function receives the job as its first argument, reports progress
+with ``job.update(stage, message)`` and returns the result dict. Jobs
+that share a ``lock_key`` run one at a time; others run in parallel.
+"""
+import collections
+import concurrent.futures
+import threading
+import time
+import traceback
+import uuid
+
+WORKERS = 4
+KEEP_JOBS = 100  # finished jobs remembered for status requests
+
+
+class Job:
+    def __init__(self, kind):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.status = "queued"
+        self.stage = "queued"
+        self.message = ""
+        self.result = None
+        self.error = None
+        self.created = self.updated = time.time()
+
+    def update(self, stage=None, message=None):
+        if stage is not None:
+            self.stage = stage
+        if message is not None:
+            self.message = message
+        self.updated = time.time()
+
+    def to_dict(self):
+        return {"id": self.id, "kind": self.kind, "status": self.status, "stage": self.stage,
+                "message": self.message, "result": self.result, "error": self.error,
+                "created": self.created, "updated": self.updated}
+
+
+class JobQueue:
+    def __init__(self, workers=WORKERS, keep=KEEP_JOBS):
+        self.keep = keep
+        self._pool = concurrent.futures.ThreadPoolExecutor(workers, thread_name_prefix="job")
+        self._jobs = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = collections.defaultdict(threading.Lock)
+
+    def submit(self, kind, fn, *args, lock_key=None):
+        """Queue ``fn(job, *args)`` and return the job right away."""
+        job = Job(kind)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+            key_lock = self._key_locks[lock_key] if lock_key is not None else None
+        self._pool.submit(self._run, job, fn, args, key_lock)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job, fn, args, key_lock):
+        if key_lock is not None:
+            job.update(message="Waiting for the previous upload to finish")
+            key_lock.acquire()
+        try:
+            job.status = "running"
+            job.update(stage="running", message="")
+            job.result = fn(job, *args)
+            job.status = "done"
+            job.update(stage="done", message="Done")
+        except Exception as e:
+            traceback.print_exc()
+            job.status, job.error = "error", str(e) or e.__class__.__name__
+            job.update(stage="error")
+        finally:
+            if key_lock is not None:
+                key_lock.release()
+
+    def _prune(self):
+        finished = [j.id for j in self._jobs.values() if j.status in ("done", "error")]
+        for job_id in finished[:max(0, len(self._jobs) - self.keep)]:
+            del self._jobs[job_id]
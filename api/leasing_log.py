@@ -0,0 +1,300 @@
+"""Event-sourced storage for a property's leasing document.
+
+Weekly leasing data only ever changes a few weeks at a time, so instead of
+rewriting the whole document on every manual entry or OCR import, each
+change is appended to a log as one line (a "commit" of one or more
+events) and applied to an in-memory view:
+
+    {"op": "week_added",    "week": {...}}
+    {"op": "week_replaced", "week": {...}}
+    {"op": "week_removed",  "week_ending": "YYYY-MM-DD"}
+    {"op": "fields_set",    "fields": {name: value | null}}   other top-level keys
+
+Each commit records its source (xlsx, docx, ocr, manual, api) and time,
+so the log doubles as an audit trail. Undo appends a commit of
+compensating events computed when the undone commit was written, so it
+costs the same as any other write.
+
+Every SNAPSHOT_EVERY commits the view is written to a snapshot together
+with the log offset it covers; startup loads the snapshot and replays
+only the tail. Versions are chained hashes (previous version + commit),
+so writes never hash the whole document; deltas for the dashboard come
+straight from the ops of recent commits.
+
+The build inlines dataset_version() (a content hash) instead. That hash
+is only computed when a reader asks about a version the log doesn't
+know, or when a snapshot is written, and is cached until the next
+commit; it is remembered as an alias of the chained version it was
+taken at, so build-inlined versions keep resolving for /delta.
+
+``get()`` hands out a copy of the view (new top-level dict and weeks
+list; events only ever replace whole weeks), taken on the first read
+after a commit and reused until the next, so it can be serialized
+outside the lock while writes go on.
+
+Layout under the property directory::
+
+    <type>.events.jsonl     append-only log
+    <type>.snapshot.json    {"seq", "version", "content", "offset", "doc", "undo"}
+    <type>.json             pre-log document, used once to seed the log
+"""
+import bisect
+import collections
+import hashlib
+import json
+import os
+import threading
+import time
+
+from api.store import dataset_version
+
+SNAPSHOT_EVERY = 200
+UNDO_DEPTH = 50
+DELTA_HISTORY = 200  # commits whose ops are kept for /delta
+SOURCES = ("xlsx", "docx", "ocr", "manual", "api")
+# Unit counts for deriving occupancy/leased % from the counts entered by hand
+UNITS = {"gwk": 324, "anc": 220}
+WEEKS_KEY = "week_ending"
+
+
+def _chain(version, commit):
+    payload = json.dumps(commit, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(f"{version}:{payload}".encode("utf-8")).hexdigest()[:16]
+
+
+class LeasingLog:
+    """Append-only event log + materialized view for one (property, data type)."""
+
+    def __init__(self, directory, prop, data_type="leasing"):
+        self.prop = prop
+        self._log_path = os.path.join(directory, f"{data_type}.events.jsonl")
+        self._snapshot_path = os.path.join(directory, f"{data_type}.snapshot.json")
+        self._seed_path = os.path.join(directory, f"{data_type}.json")
+        self._lock = threading.RLock()
+        self.doc, self.version, self.seq = None, None, 0
+        self._published = None  # readers' copy of ``doc`` as of ``version``, made on read
+        self._content = None  # dataset_version(doc) as of ``version``, made on demand
+        self._aliases = collections.OrderedDict()  # content version -> chained version
+        self._undo = collections.deque(maxlen=UNDO_DEPTH)  # (seq, compensating events)
+        self._recent = collections.deque(maxlen=DELTA_HISTORY)  # (base version, version, ops)
+        self._index = {}
+        self._load()
+
+    # ----- loading -----
+
+    def _load(self):
+        offset = 0
+        if os.path.exists(self._snapshot_path):
+            with open(self._snapshot_path, "r", encoding="utf-8") as f:
+                snap = json.load(f)
+            self.doc, self.version, self.seq = snap["doc"], snap["version"], snap["seq"]
+            self._undo.extend((seq, events) for seq, events in snap["undo"])
+            offset = snap["offset"]
+            if snap.get("content"):
+                self._alias(snap["content"], self.version)
+        elif os.path.exists(self._seed_path):
+            with open(self._seed_path, "r", encoding="utf-8") as f:
+                self.doc = json.load(f)
+            self.version = dataset_version(self.doc)  # matches what the build inlined
+        self._reindex()
+        if os.path.exists(self._log_path):
+            with open(self._log_path, "rb") as f:
+                f.seek(offset)
+                for line in f:
+                    if line.strip():
+                        self._commit(json.loads(line), replay=True)
+
+    def _reindex(self):
+        weeks = (self.doc or {}).get("weeks", [])
+        self._index = {w[WEEKS_KEY]: i for i, w in enumerate(weeks)}
+
+    # ----- applying events -----
+
+    def _put_week(self, week):
+        """Insert or replace one week; returns (ops, compensating event)."""
+        weeks = self.doc.setdefault("weeks", [])
+        key = week[WEEKS_KEY]
+        if key in self._index:
+            i = self._index[key]
+            previous, weeks[i] = weeks[i], week
+            undo = {"op": "week_replaced", "week": previous}
+        elif not weeks or key > weeks[-1][WEEKS_KEY]:
+            self._index[key] = len(weeks)
+            weeks.append(week)
+            undo = {"op": "week_removed", WEEKS_KEY: key}
+        else:
+            # Backfilled week: keep the list sorted, send the whole list
+            bisect.insort(weeks, week, key=lambda w: w[WEEKS_KEY])
+            self._reindex()
+            return [{"op": "set", "path": ["weeks"], "value": list(weeks)}], {"op": "week_removed", WEEKS_KEY: key}
+        return [{"op": "upsert", "path": ["weeks"], "key": WEEKS_KEY, "items": [week], "remove": []}], undo
+
+    def _remove_week(self, key):
+        weeks = self.doc.get("weeks", [])
+        i = self._index.pop(key, None)
+        if i is None:
+            return [], None
+        previous = weeks.pop(i)
+        if i < len(weeks):
+            self._reindex()
+        op = {"op": "upsert", "path": ["weeks"], "key": WEEKS_KEY, "items": [], "remove": [key]}
+        return [op], {"op": "week_added", "week": previous}
+
+    def _set_fields(self, fields):
+        ops, previous = [], {}
+        for name, value in fields.items():
+            previous[name] = self.doc.get(name)
+            if value is None:
+                self.doc.pop(name, None)
+                ops.append({"op": "del", "path": [name]})
+            else:
+                self.doc[name] = value
+                ops.append({"op": "set", "path": [name], "value": value})
+        return ops, {"op": "fields_set", "fields": previous}
+
+    def _apply(self, event):
+        kind = event["op"]
+        if kind in ("week_added", "week_replaced"):
+            return self._put_week(event["week"])
+        if kind == "week_removed":
+            return self._remove_week(event[WEEKS_KEY])
+        if kind == "fields_set":
+            return self._set_fields(event["fields"])
+        raise ValueError(f"Unknown leasing event: {kind}")
+
+    def _commit(self, commit, replay=False):
+        """Apply a commit to the view and (unless replaying) append it to the log."""
+        if self.doc is None:
+            self.doc = {"weeks": []}
+        ops, compensating = [], []
+        for event in commit["events"]:
+            event_ops, undo = self._apply(event)
+            ops.extend(event_ops)
+            if undo is not None:
+                compensating.append(undo)
+        if commit["action"] == "undo":
+            self._undo.pop()
+        elif compensating:
+            self._undo.append((commit["seq"], compensating[::-1]))
+
+        base, self.version, self.seq = self.version, _chain(self.version, commit), commit["seq"]
+        self._published = self._content = None
+        self._recent.append((base, self.version, ops))
+        if not replay:
+            os.makedirs(os.path.dirname(self._log_path), exist_ok=True)
+            with open(self._log_path, "ab") as f:
+                f.write(json.dumps(commit, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n")
+                offset = f.tell()
+            if self.seq % SNAPSHOT_EVERY == 0:
+                self._snapshot(offset)
+        return ops, base
+
+    def _snapshot(self, offset):
+        tmp = self._snapshot_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"seq": self.seq, "version": self.version, "content": self.content_version(),
+                       "offset": offset, "doc": self.doc, "undo": list(self._undo)}, f, ensure_ascii=False)
+        os.replace(tmp, self._snapshot_path)
+
+    def _alias(self, content, version):
+        self._aliases[content] = version
+        self._aliases.move_to_end(content)
+        while len(self._aliases) > DELTA_HISTORY:
+            self._aliases.popitem(last=False)
+
+    def _write(self, action, source, events, **extra):
+        commit = {"seq": self.seq + 1, "ts": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                  "action": action, "source": source, "events": events, **extra}
+        ops, base = self._commit(commit)
+        return {"ops": ops, "base": base, "version": self.version}
+
+    # ----- public API -----
+
+    def normalize_week(self, week, source):
+        week = dict(week, source_type=week.get("source_type") or source)
+        units = UNITS.get(self.prop)
+        for count, pct in (("occupied_num", "occupancy_pct"), ("leased_num", "leased_pct")):
+            if units and week.get(count) is not None and week.get(pct) is None:
+                week[pct] = round(week[count] / units * 100, 1)
+        return week
+
+    def add_week(self, week, source="manual"):
+        """Add or replace one week; returns {"ops", "base", "version"}."""
+        with self._lock:
+            week = self.normalize_week(week, source)
+            kind = "week_replaced" if week[WEEKS_KEY] in self._index else "week_added"
+            return self._write("add_week", source, [{"op": kind, "week": week}])
+
+    def remove_week(self, week_ending, source="manual"):
+        with self._lock:
+            if week_ending not in self._index:
+                return None
+            return self._write("remove_week", source, [{"op": "week_removed", WEEKS_KEY: week_ending}])
+
+    def import_doc(self, doc, source="api"):
+        """Record a whole new document (spreadsheet upload, PUT) as week-level events."""
+        with self._lock:
+            current = self.doc or {}
+            old_weeks = {w[WEEKS_KEY]: w for w in current.get("weeks", [])}
+            new_weeks = {w[WEEKS_KEY]: w for w in doc.get("weeks", [])}
+            events = [{"op": "week_removed", WEEKS_KEY: k} for k in old_weeks if k not in new_weeks]
+            for key in sorted(new_weeks):
+                if key not in old_weeks:
+                    events.append({"op": "week_added", "week": new_weeks[key]})
+                elif old_weeks[key] != new_weeks[key]:
+                    events.append({"op": "week_replaced", "week": new_weeks[key]})
+            fields = {k: v for k, v in doc.items() if k != "weeks" and current.get(k) != v}
+            fields.update({k: None for k in current if k != "weeks" and k not in doc})
+            if fields:
+                events.append({"op": "fields_set", "fields": fields})
+            if not events:
+                return {"ops": [], "base": self.version, "version": self.version}
+            return self._write("import", source, events)
+
+    def undo(self):
+        """Revert the most recent change; None when there is nothing to undo."""
+        with self._lock:
+            if not self._undo:
+                return None
+            seq, compensating = self._undo[-1]
+            result = self._write("undo", "manual", compensating, undoes=seq)
+            result["restored_from"] = f"before change #{seq}"
+            return result
+
+    def get(self):
+        """(document, version); the document is a copy no later write touches."""
+        with self._lock:
+            if self._published is None and self.doc is not None:
+                self._published = {k: list(v) if k == "weeks" else v for k, v in self.doc.items()}
+            return self._published, self.version
+
+    def content_version(self):
+        """dataset_version() of the current document, hashed at most once per commit."""
+        with self._lock:
+            if self._content is None and self.doc is not None:
+                self._content = dataset_version(self.doc)
+                self._alias(self._content, self.version)
+            return self._content
+
+    def matches(self, version):
+        """Whether ``version`` (chained, or a content version the build inlined) is the current one."""
+        with self._lock:
+            return version is not None and (version == self.version
+                                             or self._aliases.get(version) == self.version
+                                             or version == self.content_version())
+
+    def delta(self, since):
+        """Ops from version ``since`` to now, or None when it is too old."""
+        with self._lock:
+            since = self._aliases.get(since, since)
+            if since == self.version:
+                return [], self.version
+            ops = []
+            for base, version, commit_ops in reversed(self._recent):
+                ops[:0] = commit_ops
+                if base == since:
+                    return ops, self.version
+            # Unknown to the log, but maybe the build's hash of this very document
+            if since == self.content_version():
+                return [], self.version
+            return None, self.version
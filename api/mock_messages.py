@@ -0,0 +1,125 @@
+"""Local stand-in for the Anthropic Messages API, for testing the AI chat offline.
+
+local_server.py serves it at POST /mock/v1/messages. Streaming requests get
+the same server-sent event sequence as the real endpoint; the reply just
+describes the request. Prompt caching is imitated: the first request with
+a given cache_control prefix reports cache_creation_input_tokens, later
+ones report cache_read_input_tokens, so the dashboard's usage log shows
+whether its system prompt is being reused.
+
+Requests with an image (the OCR in api/ocr.py) get a JSON object of
+leasing numbers derived from the image's hash instead, so the same
+screenshot always "reads" the same.
+"""
+import hashlib
+import json
+import time
+
+MODEL = "mock-claude"
+TOKEN_DELAY = 0.02  # seconds between streamed words
+_cached_prefixes = set()
+
+
+def _tokens(text):
+    return max(1, len(text) // 4)
+
+
+def _text(content):
+    if isinstance(content, str):
+        return content
+    return "".join(block.get("text", "") for block in content or [])
+
+
+def _usage(request):
+    """Split the prompt into cached / uncached token counts like the real API."""
+    blocks = [("system", _text(request.get("system")), request.get("system"))]
+    blocks += [(m["role"], _text(m["content"]), m["content"]) for m in request.get("messages", [])]
+    usage = {"input_tokens": 0, "cache_creation_input_tokens": 0, "cache_read_input_tokens": 0}
+    prefix = hashlib.sha256()
+    cached_upto = written = 0
+    total = 0
+    for role, text, raw in blocks:
+        prefix.update(f"{role}:{text}\n".encode("utf-8"))
+        total += _tokens(text)
+        marked = isinstance(raw, list) and any(isinstance(b, dict) and b.get("cache_control") for b in raw)
+        if marked:
+            key = prefix.hexdigest()
+            if key in _cached_prefixes:
+                cached_upto, written = total, 0
+            else:
+                _cached_prefixes.add(key)
+                written = total - cached_upto
+    usage["cache_read_input_tokens"] = cached_upto
+    usage["cache_creation_input_tokens"] = written
+    usage["input_tokens"] = total - cached_upto - written
+    return usage
+
+
+def _image(content):
+    for block in content if isinstance(content, list) else []:
+        if isinstance(block, dict) and block.get("type") == "image":
+            return block.get("source", {}).get("data", "")
+    return None
+
+
+def _vision_reply(image):
+    seed = hashlib.sha256(image.encode("utf-8")).digest()
+    occupied = 280 + seed[0] % 40
+    return json.dumps({
+        "week_ending": f"2026-{1 + seed[1] % 12:02d}-{1 + seed[2] % 28:02d}",
+        "occupied_num": occupied, "leased_num": occupied + seed[3] % 8,
+        "new_prospects": seed[4] % 30, "walk_in_traffic": seed[5] % 10,
+        "gross_leases": seed[6] % 12, "net_leases": seed[7] % 10,
+        "move_in": seed[8] % 8, "move_out": seed[9] % 8,
+        "trend_30_day": round(88 + seed[10] % 100 / 10, 1), "trend_60_day": round(87 + seed[11] % 100 / 10, 1),
+        "psf_all_leases": round(1.4 + seed[12] % 50 / 100, 2),
+    })
+
+
+def _reply(request, usage):
+    image = _image((request.get("messages") or [{}])[-1].get("content"))
+    if image is not None:
+        return _vision_reply(image)
+    question = _text((request.get("messages") or [{}])[-1].get("content"))
+    return (f"**Mock reply** to: {question}\n"
+            f"System prompt: {len(_text(request.get('system')))} chars, "
+            f"{len(request.get('messages', []))} messages. "
+            f"Cache read {usage['cache_read_input_tokens']} / write "
+            f"{usage['cache_creation_input_tokens']} / uncached {usage['input_tokens']} tokens.")
+
+
+def _event(name, data):
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n".encode("utf-8")
+
+
+def respond(body):
+    """Return (status, content type, iterable of body chunks) for a request body."""
+    try:
+        request = json.loads(body)
+    except ValueError:
+        error = {"type": "error", "error": {"type": "invalid_request_error", "message": "Invalid JSON"}}
+        return 400, "application/json", [json.dumps(error).encode("utf-8")]
+
+    usage = _usage(request)
+    text = _reply(request, usage)
+    message = {"id": "msg_mock", "type": "message", "role": "assistant", "model": MODEL,
+               "content": [], "stop_reason": None, "usage": dict(usage, output_tokens=1)}
+    if not request.get("stream"):
+        message.update(content=[{"type": "text", "text": text}], stop_reason="end_turn")
+        message["usage"]["output_tokens"] = _tokens(text)
+        return 200, "application/json", [json.dumps(message).encode("utf-8")]
+
+    def events():
+        yield _event("message_start", {"type": "message_start", "message": message})
+        yield _event("content_block_start", {"type": "content_block_start", "index": 0,
+                                             "content_block": {"type": "text", "text": ""}})
+        for word in text.split(" "):
+            time.sleep(TOKEN_DELAY)
+            yield _event("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                                 "delta": {"type": "text_delta", "text": word + " "}})
+        yield _event("content_block_stop", {"type": "content_block_stop", "index": 0})
+        yield _event("message_delta", {"type": "message_delta", "delta": {"stop_reason": "end_turn"},
+                                       "usage": {"output_tokens": _tokens(text)}})
+        yield _event("message_stop", {"type": "message_stop"})
+
+    return 200, "text/event-stream", events()
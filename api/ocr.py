@@ -0,0 +1,183 @@
+"""Leasing-screenshot OCR through the Claude vision API, with a result cache.
+
+    POST /api/v1/{property}/ocr         {"image", "media_type"} -> {"data", "cached"}
+    POST /api/v1/{property}/ocr/batch   {"images": [{"image", "media_type"}, ...]}
+                                        -> {"results": [{"data", "cached"} | {"error"}]}
+
+Results are cached by the SHA-256 of the image bytes (plus the prompt and
+model, so changing either starts fresh), in memory and on disk, so a
+screenshot that was analyzed before costs nothing. The dashboard
+downscales images before sending them, which keeps the bytes, and with
+them the hash, stable for the same screenshot. A perceptual hash is not
+used on purpose: two weekly reports differ only in their digits.
+
+Batch images run concurrently on a small thread pool. Errors use the
+codes the dashboard expects: NO_KEY, INVALID_KEY, or a message.
+
+PPP_VISION_URL points the calls elsewhere, e.g. at local_server.py's
+/mock/v1/messages (api/mock_messages.py answers image requests with
+made-up leasing numbers).
+"""
+import base64
+import collections
+import concurrent.futures
+import hashlib
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+
+VISION_URL = os.environ.get("PPP_VISION_URL", "https://api.anthropic.com/v1/messages")
+VISION_MODEL = "claude-sonnet-4-20250514"
+MEDIA_TYPES = ("image/png", "image/jpeg", "image/webp", "image/gif")
+BATCH_MAX = 10
+WORKERS = 4
+MEMORY_CACHE_SIZE = 256
+TIMEOUT = 90
+OCR_FIELDS = ("week_ending", "occupied_num", "leased_num", "new_prospects", "walk_in_traffic",
+              "gross_leases", "net_leases", "move_in", "move_out", "trend_30_day",
+              "trend_60_day", "psf_all_leases")
+PROMPT = (
+    "This is a screenshot of a weekly apartment leasing report. Extract these fields and "
+    "reply with one JSON object only, no prose: " + ", ".join(OCR_FIELDS) + ". "
+    "week_ending is the report's week-ending date as YYYY-MM-DD. Counts are integers, "
+    "trends are percentages as numbers (93.5, not \"93.5%\"), psf_all_leases is dollars "
+    "per square foot. Use null for anything not shown."
+)
+PROMPT_VERSION = hashlib.sha256(f"{VISION_MODEL}\n{PROMPT}".encode("utf-8")).hexdigest()[:8]
+
+
+class OcrError(Exception):
+    def __init__(self, code, status=502):
+        super().__init__(code)
+        self.code, self.status = code, status
+
+
+def _parse_reply(text):
+    """The JSON object in the model's reply (tolerates code fences or stray prose)."""
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end < start:
+        raise OcrError("No data found in the image")
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError:
+        raise OcrError("Could not read the extracted data")
+    return {field: data.get(field) for field in OCR_FIELDS}
+
+
+class OcrService:
+    """Vision calls with a content-hash cache.
+
+    ``api_key(prop)`` returns the key to use for a property, or None.
+    """
+
+    def __init__(self, api_key, cache_dir=None, url=VISION_URL, workers=WORKERS):
+        self.api_key, self.cache_dir, self.url = api_key, cache_dir, url
+        self._pool = concurrent.futures.ThreadPoolExecutor(workers, thread_name_prefix="ocr")
+        self._memory = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "calls": 0}
+
+    # ----- cache -----
+
+    def _cache_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json") if self.cache_dir else None
+
+    def _cached(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        path = self._cache_path(key)
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._remember(key, data)
+            return data
+        return None
+
+    def _remember(self, key, data):
+        with self._lock:
+            self._memory[key] = data
+            self._memory.move_to_end(key)
+            while len(self._memory) > MEMORY_CACHE_SIZE:
+                self._memory.popitem(last=False)
+
+    def _store(self, key, data):
+        self._remember(key, data)
+        path = self._cache_path(key)
+        if path:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(path + ".tmp", path)
+
+    # ----- vision call -----
+
+    def _call(self, image_b64, media_type, prop):
+        key = self.api_key(prop)
+        if not key:
+            raise OcrError("NO_KEY", 400)
+        body = {
+            "model": VISION_MODEL,
+            "max_tokens": 512,
+            "messages": [{"role": "user", "content": [
+                {"type": "image", "source": {"type": "base64", "media_type": media_type, "data": image_b64}},
+                {"type": "text", "text": PROMPT},
+            ]}],
+        }
+        req = urllib.request.Request(self.url, data=json.dumps(body).encode("utf-8"), method="POST", headers={
+            "Content-Type": "application/json", "x-api-key": key, "anthropic-version": "2023-06-01"})
+        try:
+            with urllib.request.urlopen(req, timeout=TIMEOUT) as resp:
+                reply = json.load(resp)
+        except urllib.error.HTTPError as e:
+            if e.code in (401, 403):
+                raise OcrError("INVALID_KEY", 401)
+            raise OcrError(f"Vision API error {e.code}")
+        except (OSError, ValueError) as e:
+            raise OcrError(f"Vision API unreachable: {e}")
+        with self._lock:
+            self.stats["calls"] += 1
+        return _parse_reply("".join(b.get("text", "") for b in reply.get("content", [])))
+
+    # ----- public API -----
+
+    @staticmethod
+    def cache_key(image_b64):
+        try:
+            raw = base64.b64decode(image_b64, validate=True)
+        except (ValueError, TypeError):
+            raise OcrError("Invalid base64 image", 400)
+        return f"{hashlib.sha256(raw).hexdigest()}-{PROMPT_VERSION}"
+
+    def analyze(self, image_b64, media_type, prop=None):
+        """Return (data, cached) for one base64 image."""
+        if media_type not in MEDIA_TYPES:
+            raise OcrError(f"Unsupported image type {media_type}", 400)
+        key = self.cache_key(image_b64)
+        data = self._cached(key)
+        if data is not None:
+            with self._lock:
+                self.stats["hits"] += 1
+            return data, True
+        data = self._call(image_b64, media_type, prop)
+        self._store(key, data)
+        return data, False
+
+    def analyze_batch(self, images, prop=None):
+        """Analyze several images concurrently; one result dict per image, in order."""
+        def one(item):
+            try:
+                data, cached = self.analyze(item.get("image") or "", item.get("media_type"), prop)
+                return {"data": data, "cached": cached}
+            except OcrError as e:
+                return {"error": e.code}
+
+        # The same screenshot twice in one batch is analyzed once
+        unique = {}
+        for item in images:
+            unique.setdefault(item.get("image") or "", item)
+        results = dict(zip(unique, self._pool.map(one, unique.values())))
+        return [results[item.get("image") or ""] for item in images]
@@ -0,0 +1,271 @@
+"""HTTP routes for /api/v1/{property}/{data_type}, independent of the server framework.
+
+    GET  /api/v1/{property}/{type}               {"data", "version"} + ETag;
+                                                 304 when If-None-Match matches
+    GET  /api/v1/{property}/{type}/delta?since=v {"version", "base", "ops"};
+                                                 304 when unchanged, 410 when v is
+                                                 unknown (client falls back to GET)
+    PUT  /api/v1/{property}/{type}               body {"data"} -> {"ok", "version"}
+    PATCH /api/v1/{property}/{type}              body {"patch"}: JSON merge patch of an
+                                                 object dataset -> {"ok", "version"}
+    GET  /api/v1/{property}/bootstrap            {"data": {type: doc}, "versions": {...}}:
+                                                 all per-user state plus the dataset
+                                                 versions in one round trip; ETag/304
+    POST /api/v1/{property}/leasing/add_week     body: one week (+ "source") -> {"ok",
+                                                 "version", "base", "ops"}: the change
+                                                 as a delta against version "base"
+    POST /api/v1/{property}/leasing/undo         revert the last leasing change; same reply
+                                                 plus "restored_from"
+    POST /api/v1/{property}/upload/{type}        multipart "file" -> 202 {"ok", "job"}:
+                                                 extraction runs in the background
+    GET  /api/v1/{property}/jobs/{id}            job status (api/jobs.py); when done,
+                                                 "result" has the new dataset version
+    POST /api/v1/{property}/ocr[/batch]          screenshot OCR with a result cache
+                                                 (api/ocr.py)
+
+JSON bodies of COMPRESS_MIN_BYTES or more are gzipped for clients that
+accept it.
+
+``handle()`` returns (status, headers, body bytes) or None for paths it
+does not own, so a host server can fall through to its other routes.
+"""
+import gzip
+import hashlib
+import json
+import re
+from urllib.parse import parse_qs, urlsplit
+
+from api import leasing_log, uploads
+from api import ocr as ocr_module
+
+API_PREFIX = "/api/v1/"
+# Per-user state returned by /bootstrap, and the datasets it only reports versions for
+BOOTSTRAP_TYPES = ("contacts", "cell_comments", "actions_state", "api_key", "kimi_key")
+VERSIONED_TYPES = ("leasing", "financials")
+COMPRESS_MIN_BYTES = 1024
+ROUTE_RE = re.compile(r"^/api/v1/(?P<prop>[a-z0-9_]+)/(?P<type>[a-z0-9_]+)(?P<delta>/delta)?/?$")
+UPLOAD_RE = re.compile(r"^/api/v1/(?P<prop>[a-z0-9_]+)/upload/(?P<type>[a-z0-9_]+)/?$")
+LEASING_RE = re.compile(r"^/api/v1/(?P<prop>[a-z0-9_]+)/leasing/(?P<action>add_week|undo)/?$")
+OCR_RE = re.compile(r"^/api/v1/(?P<prop>[a-z0-9_]+)/ocr(?P<batch>/batch)?/?$")
+WEEK_ENDING_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+JOB_RE = re.compile(r"^/api/v1/(?P<prop>[a-z0-9_]+)/jobs/(?P<id>[0-9a-f]+)/?$")
+
+
+def _etag(version):
+    return f'"{version}"'
+
+
+def _etag_matches(header, version):
+    """If-None-Match may list several tags, weak or strong, or be "*"."""
+    if not header or not version:
+        return False
+    tags = [t.strip().removeprefix("W/") for t in header.split(",")]
+    return "*" in tags or _etag(version) in tags
+
+
+def _not_modified_since(store, prop, data_type, header, version):
+    """_etag_matches, also accepting another name of the current version (a build-inlined content hash)."""
+    if _etag_matches(header, version):
+        return True
+    tags = [t.strip().removeprefix("W/").strip('"') for t in (header or "").split(",")]
+    return any(tag and store.matches(prop, data_type, tag) for tag in tags)
+
+
+def _json(status, payload, version=None):
+    headers = {"Content-Type": "application/json", "Cache-Control": "no-cache"}
+    if version:
+        headers["ETag"] = _etag(version)
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return status, headers, body
+
+
+def _not_modified(version):
+    return 304, {"ETag": _etag(version), "Cache-Control": "no-cache"}, b""
+
+
+def _gzip(result, accept_encoding):
+    status, headers, body = result
+    if len(body) < COMPRESS_MIN_BYTES or "gzip" not in (accept_encoding or ""):
+        return result
+    headers = dict(headers, **{"Content-Encoding": "gzip", "Vary": "Accept-Encoding"})
+    return status, headers, gzip.compress(body, compresslevel=6)
+
+
+def bootstrap(store, prop, headers):
+    """Everything the dashboard loads at startup, as one response."""
+    versions = {t: store.version(prop, t) for t in BOOTSTRAP_TYPES + VERSIONED_TYPES}
+    combined = hashlib.sha256(json.dumps(versions, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    if _etag_matches(headers.get("If-None-Match"), combined):
+        return _not_modified(combined)
+    payload = {
+        "data": {t: store.get(prop, t)[0] for t in BOOTSTRAP_TYPES},
+        "versions": {t: versions[t] for t in VERSIONED_TYPES},
+    }
+    return _json(200, payload, combined)
+
+
+def owns(method, path):
+    """Whether this request is one of the dataset routes served here."""
+    path = urlsplit(path).path
+    return ((method in ("GET", "PUT", "PATCH") and ROUTE_RE.match(path) is not None)
+            or (method == "POST" and (UPLOAD_RE.match(path) or LEASING_RE.match(path)
+                                      or OCR_RE.match(path)) is not None)
+            or (method == "GET" and JOB_RE.match(path) is not None))
+
+
+def handle(store, method, path, headers, body=b"", jobs=None, ocr=None):
+    """Serve one API request from ``store`` (an api.store.DatasetStore).
+
+    Uploads need ``jobs`` (an api.jobs.JobQueue) to run on, OCR needs
+    ``ocr`` (an api.ocr.OcrService).
+    """
+    url = urlsplit(path)
+    if UPLOAD_RE.match(url.path) or JOB_RE.match(url.path):
+        result = _jobs_route(store, jobs, method, url.path, headers, body)
+    elif OCR_RE.match(url.path):
+        result = _ocr_route(ocr, method, url.path, body)
+    elif LEASING_RE.match(url.path):
+        result = _leasing_route(store, method, url.path, body)
+    else:
+        result = _route(store, method, path, headers, body)
+    return result and _gzip(result, headers.get("Accept-Encoding"))
+
+
+def _leasing_route(store, method, path, body):
+    """Week-level leasing writes, answered with the change instead of the document."""
+    m = LEASING_RE.match(path)
+    if method != "POST":
+        return _json(405, {"error": f"{method} not allowed"})
+    log = store.event_log(m["prop"], "leasing")
+    if m["action"] == "undo":
+        change = log.undo()
+        if change is None:
+            return _json(409, {"error": "Nothing to undo"})
+        return _json(200, dict(change, ok=True), change["version"])
+
+    try:
+        week = json.loads(body or b"{}")
+    except ValueError:
+        week = None
+    if not isinstance(week, dict) or not WEEK_ENDING_RE.match(str(week.get("week_ending"))):
+        return _json(400, {"error": 'Expected a JSON week with "week_ending": "YYYY-MM-DD"'})
+    source = week.pop("source", None) or "manual"
+    if source not in leasing_log.SOURCES:
+        return _json(400, {"error": f"Unknown source {source!r}"})
+    change = log.add_week(week, source)
+    return _json(200, dict(change, ok=True), change["version"])
+
+
+def _ocr_route(ocr, method, path, body):
+    if ocr is None:
+        return _json(404, {"error": "OCR is not enabled"})
+    if method != "POST":
+        return _json(405, {"error": f"{method} not allowed"})
+    try:
+        request = json.loads(body or b"{}")
+    except ValueError:
+        request = None
+    if not isinstance(request, dict):
+        return _json(400, {"error": "Expected a JSON body"})
+
+    m = OCR_RE.match(path)
+    prop = m["prop"]
+    if m["batch"]:
+        images = request.get("images")
+        if not isinstance(images, list) or not images or not all(isinstance(i, dict) for i in images):
+            return _json(400, {"error": 'Expected {"images": [{"image", "media_type"}, ...]}'})
+        if len(images) > ocr_module.BATCH_MAX:
+            return _json(400, {"error": f"At most {ocr_module.BATCH_MAX} images per batch"})
+        return _json(200, {"results": ocr.analyze_batch(images, prop)})
+
+    try:
+        data, cached = ocr.analyze(request.get("image") or "", request.get("media_type"), prop)
+    except ocr_module.OcrError as e:
+        return _json(e.status, {"error": e.code})
+    return _json(200, {"data": data, "cached": cached})
+
+
+def _jobs_route(store, jobs, method, path, headers, body):
+    if jobs is None:
+        return _json(404, {"error": "Uploads are not enabled"})
+    m = UPLOAD_RE.match(path)
+    if m:
+        if method != "POST":
+            return _json(405, {"error": f"{method} not allowed"})
+        try:
+            job = uploads.submit_upload(jobs, store, m["prop"], m["type"],
+                                        headers.get("Content-Type"), body)
+        except ValueError as e:
+            return _json(400, {"error": str(e)})
+        status = job.to_dict()
+        return _json(202, {"ok": True, "job": status, "status_url": f"{API_PREFIX}{m['prop']}/jobs/{job.id}"})
+
+    m = JOB_RE.match(path)
+    if method != "GET":
+        return _json(405, {"error": f"{method} not allowed"})
+    job = jobs.get(m["id"])
+    if job is None:
+        return _json(404, {"error": "Unknown job"})
+    status, headers, payload = _json(200, job.to_dict())
+    return status, dict(headers, **{"Cache-Control": "no-store"}), payload
+
+
+def _route(store, method, path, headers, body):
+    url = urlsplit(path)
+    m = ROUTE_RE.match(url.path)
+    if not m:
+        return None
+    prop, data_type = m["prop"], m["type"]
+
+    if data_type == "bootstrap":
+        if method != "GET" or m["delta"]:
+            return _json(405, {"error": f"{method} not allowed"})
+        return bootstrap(store, prop, headers)
+
+    if method == "GET" and m["delta"]:
+        since = parse_qs(url.query).get("since", [""])[0]
+        ops, version = store.delta(prop, data_type, since)
+        if version is None:
+            return _json(404, {"error": f"No {data_type} data"})
+        if ops is None:
+            return _json(410, {"error": "Unknown base version", "version": version}, version)
+        if not ops:
+            return _not_modified(version)
+        doc, _ = store.get(prop, data_type)
+        payload = {"version": version, "base": since, "ops": ops}
+        # A delta bigger than the document itself isn't worth applying
+        if len(json.dumps(ops, separators=(",", ":"))) >= len(json.dumps(doc, separators=(",", ":"))):
+            payload = {"version": version, "data": doc}
+        return _json(200, payload, version)
+
+    if method == "GET":
+        version = store.version(prop, data_type)
+        if version is None:
+            return _json(404, {"error": f"No {data_type} data"})
+        if _not_modified_since(store, prop, data_type, headers.get("If-None-Match"), version):
+            return _not_modified(version)
+        doc, version = store.get(prop, data_type)
+        return _json(200, {"data": doc, "version": version}, version)
+
+    if method == "PUT" and not m["delta"]:
+        try:
+            doc = json.loads(body or b"{}")["data"]
+        except (ValueError, KeyError, TypeError):
+            return _json(400, {"error": 'Expected a JSON body {"data": ...}'})
+        version = store.put(prop, data_type, doc)
+        return _json(200, {"ok": True, "version": version}, version)
+
+    if method == "PATCH" and not m["delta"]:
+        try:
+            patch = json.loads(body or b"{}")["patch"]
+        except (ValueError, KeyError, TypeError):
+            patch = None
+        if not isinstance(patch, dict):
+            return _json(400, {"error": 'Expected a JSON body {"patch": {...}}'})
+        doc, _ = store.get(prop, data_type)
+        if doc is not None and not isinstance(doc, dict):
+            return _json(409, {"error": f"{data_type} is not an object; use PUT"})
+        version = store.patch(prop, data_type, patch)
+        return _json(200, {"ok": True, "version": version}, version)
+
+    return _json(405, {"error": f"{method} not allowed"})
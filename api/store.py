@@ -0,0 +1,158 @@
+"""File-backed, versioned storage for per-property dashboard datasets.
+
+Every PUT gets a version: a short hash of the canonical JSON, so the same
+document always has the same version no matter who wrote it. The build
+computes versions for the data it inlines with the same function
+(src/assets.py dataset_version), which lets a freshly opened dashboard
+skip re-downloading data it already has.
+
+Layout under ``root``::
+
+    <property>/<data_type>.json                  current document
+    <property>/.history/<data_type>.<version>.json   recent versions, for deltas
+
+Types in EVENT_LOGGED are kept as an event log instead (api/leasing_log.py):
+writes append events, reads come from the log's in-memory view.
+"""
+import glob
+import hashlib
+import json
+import os
+import copy
+import threading
+
+from api import delta
+
+HISTORY_SIZE = 20
+EVENT_LOGGED = ("leasing",)
+
+
+def dataset_version(doc):
+    """Short SHA-256 of the canonical JSON form; must match src/assets.py."""
+    payload = json.dumps(doc, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_json(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+class DatasetStore:
+    """Current document + recent history for each (property, data type)."""
+
+    def __init__(self, root, history_size=HISTORY_SIZE):
+        self.root = root
+        self.history_size = history_size
+        self._lock = threading.RLock()
+        self._versions = {}  # (property, data_type) -> version of the current document
+        self._logs = {}
+
+    def _path(self, prop, data_type):
+        return os.path.join(self.root, prop, f"{data_type}.json")
+
+    def _history_path(self, prop, data_type, version):
+        return os.path.join(self.root, prop, ".history", f"{data_type}.{version}.json")
+
+    def event_log(self, prop, data_type):
+        """The LeasingLog behind an EVENT_LOGGED type, else None."""
+        if data_type not in EVENT_LOGGED:
+            return None
+        with self._lock:
+            key = (prop, data_type)
+            if key not in self._logs:
+                from api.leasing_log import LeasingLog
+                self._logs[key] = LeasingLog(os.path.join(self.root, prop), prop, data_type)
+            return self._logs[key]
+
+    def get(self, prop, data_type):
+        """Return (document, version), or (None, None) when nothing is stored."""
+        log = self.event_log(prop, data_type)
+        if log is not None:
+            return log.get()
+        path = self._path(prop, data_type)
+        if not os.path.exists(path):
+            return None, None
+        doc = _read_json(path)
+        key = (prop, data_type)
+        if key not in self._versions:
+            self._versions[key] = dataset_version(doc)
+        return doc, self._versions[key]
+
+    def version(self, prop, data_type):
+        """Current version without re-reading the document when it is known."""
+        log = self.event_log(prop, data_type)
+        if log is not None:
+            return log.version
+        version = self._versions.get((prop, data_type))
+        if version is not None:
+            return version
+        return self.get(prop, data_type)[1]
+
+    def matches(self, prop, data_type, version):
+        """Whether ``version`` names the current document (event logs also know it by content)."""
+        log = self.event_log(prop, data_type)
+        if log is not None:
+            return log.matches(version)
+        return version is not None and version == self.version(prop, data_type)
+
+    def put(self, prop, data_type, doc, source="api"):
+        """Store a new document and return its version."""
+        log = self.event_log(prop, data_type)
+        if log is not None:
+            return log.import_doc(doc, source)["version"]
+        version = dataset_version(doc)
+        with self._lock:
+            os.makedirs(os.path.join(self.root, prop, ".history"), exist_ok=True)
+            _write_json(self._path(prop, data_type), doc)
+            snapshot = self._history_path(prop, data_type, version)
+            if not os.path.exists(snapshot):
+                _write_json(snapshot, doc)
+            self._versions[(prop, data_type)] = version
+            self._prune(prop, data_type)
+        return version
+
+    def patch(self, prop, data_type, patch):
+        """Merge ``patch`` into a dict document (see delta.merge_patch).
+
+        Returns the new version. The read-modify-write happens under the
+        store lock, so concurrent patches to different keys don't lose
+        each other's changes.
+        """
+        with self._lock:
+            doc, _ = self.get(prop, data_type)
+            if self.event_log(prop, data_type) is not None:
+                doc = copy.deepcopy(doc)  # the log's live view
+            return self.put(prop, data_type, delta.merge_patch(doc or {}, patch))
+
+    def _prune(self, prop, data_type):
+        snapshots = sorted(glob.glob(self._history_path(prop, data_type, "*")),
+                           key=os.path.getmtime, reverse=True)
+        for stale in snapshots[self.history_size:]:
+            os.remove(stale)
+
+    def delta(self, prop, data_type, since):
+        """Operations from version ``since`` to the current document.
+
+        Returns (ops, version); ops is None when ``since`` is not in the
+        history, in which case the client has to fetch the full document.
+        """
+        log = self.event_log(prop, data_type)
+        if log is not None:
+            return log.delta(since) if log.doc is not None else (None, None)
+        doc, version = self.get(prop, data_type)
+        if doc is None:
+            return None, None
+        if since == version:
+            return [], version
+        snapshot = self._history_path(prop, data_type, since) if since.isalnum() else None
+        if snapshot is None or not os.path.exists(snapshot):
+            return None, version
+        return delta.diff(_read_json(snapshot), doc), version
@@ -0,0 +1,121 @@
+"""Spreadsheet uploads processed as background jobs.
+
+POST /api/v1/{property}/upload/{type} saves the file into the project's
+data folder and queues ``extract_single.py {type}`` (run in the project
+directory, as the build does). The request returns 202 with the job at
+once; the job's result is the new dataset version, which the dashboard
+then fetches through the usual delta sync.
+"""
+import email.parser
+import email.policy
+import functools
+import importlib.util
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_DIRS = {"gwk": "Greenwood_At_Katy", "anc": "Ancora"}
+# Where each extractor looks for its source files: the project's src/config.py
+# setting, and the file type it globs there
+UPLOAD_SOURCES = {
+    "gwk": {"leasing": ("DATA_LEASING", ".xlsx"), "financials": ("DATA_T12", ".xlsx")},
+    "anc": {"leasing": ("DATA_LEASING", ".xlsx"), "financials": ("DATA_FINANCIALS", ".pdf")},
+}
+EXTRACT_TIMEOUT = 600
+
+
+def parse_upload(content_type, body):
+    """Return (filename, bytes) of the "file" field of a multipart/form-data body."""
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+        b"Content-Type: " + content_type.encode("latin-1") + b"\r\n\r\n" + body)
+    for part in message.iter_parts() if message.is_multipart() else ():
+        if part.get_param("name", header="content-disposition") == "file":
+            return part.get_filename() or "upload", part.get_payload(decode=True) or b""
+    raise ValueError('Expected multipart/form-data with a "file" field')
+
+
+@functools.lru_cache(maxsize=None)
+def _project_config(prop):
+    """The project's src/config.py, loaded by path (every project has its own ``src`` package)."""
+    path = os.path.join(REPO_ROOT, PROJECT_DIRS[prop], "src", "config.py")
+    spec = importlib.util.spec_from_file_location(f"_upload_config_{prop}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _target_dir(prop, data_type):
+    setting, _extension = UPLOAD_SOURCES[prop][data_type]
+    return getattr(_project_config(prop), setting)
+
+
+def _safe_name(filename):
+    name = os.path.basename(filename.replace("\\", "/"))
+    return re.sub(r"[^\w. ()&-]+", "_", name).strip(". ") or "upload"
+
+
+def run_upload(job, store, prop, data_type, filename, content):
+    """Job body: save the file, run the extractor, store the result."""
+    project = os.path.join(REPO_ROOT, PROJECT_DIRS[prop])
+    job.update("saving", f"Saving {filename}")
+    target_dir = _target_dir(prop, data_type)
+    os.makedirs(target_dir, exist_ok=True)
+    with open(os.path.join(target_dir, _safe_name(filename)), "wb") as f:
+        f.write(content)
+
+    job.update("extracting", f"Running {data_type} extraction")
+    with tempfile.TemporaryFile() as out:
+        with subprocess.Popen([sys.executable, "extract_single.py", data_type], cwd=project,
+                              stdout=out, stderr=subprocess.PIPE, text=True) as proc:
+            # Reading stderr blocks until the extractor exits, so the deadline
+            # is a watchdog that kills it (ending the read) rather than wait()
+            timed_out = threading.Event()
+
+            def expire():
+                timed_out.set()
+                proc.kill()
+
+            watchdog = threading.Timer(EXTRACT_TIMEOUT, expire)
+            watchdog.start()
+            try:
+                # Extractors log progress with print(); relay the latest line
+                for line in proc.stderr:
+                    if line.strip():
+                        job.update(message=line.strip()[:200])
+                proc.wait()
+            finally:
+                watchdog.cancel()
+                if proc.poll() is None:
+                    proc.kill()
+                    proc.wait()
+        if timed_out.is_set():
+            raise RuntimeError(f"Extraction timed out after {EXTRACT_TIMEOUT} s")
+        if proc.returncode != 0:
+            raise RuntimeError(f"Extraction failed: {job.message or 'exit code ' + str(proc.returncode)}")
+        out.seek(0)
+        doc = json.load(out)
+
+    job.update("storing", "Saving the new dataset")
+    source = os.path.splitext(filename)[1].lstrip(".").lower() or "api"
+    version = store.put(prop, data_type, doc, source=source)
+    return {"data_type": data_type, "version": version}
+
+
+def submit_upload(jobs, store, prop, data_type, content_type, body):
+    """Queue an upload; returns the job, or raises ValueError for a bad request."""
+    if data_type not in UPLOAD_SOURCES.get(prop, {}):
+        raise ValueError(f"Cannot upload {data_type} for {prop}")
+    filename, content = parse_upload(content_type or "", body)
+    if not content:
+        raise ValueError("Empty file")
+    _setting, extension = UPLOAD_SOURCES[prop][data_type]
+    if os.path.splitext(filename)[1].lower() != extension:
+        raise ValueError(f"{data_type} uploads for {prop} must be {extension} files")
+    # One extraction per dataset at a time: they share the data folder
+    return jobs.submit("upload", run_upload, store, prop, data_type, filename, content,
+                       lock_key=(prop, data_type))
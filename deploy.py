@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""Delta deploy: send only the files that changed since the last deploy.
+
+    python3 deploy.py greenwood data       Data_* folders + extract_single.py, then an
+                                           incremental build on the server
+    python3 deploy.py all dashboard        the locally built dashboard/ folders
+    python3 deploy.py ancora data --target /tmp/ancora-test    a local directory instead
+
+Every target keeps a manifest, .deploy_manifest.json, of the files it got
+from here (relative path -> SHA-256). A deploy hashes the local tree,
+reads the target's manifest and transfers only new or changed files, as
+one tar stream over one ssh connection (mtimes are kept, which is what
+`build.py --incremental` goes by). The manifest is written last, so an
+interrupted deploy simply sends the same files again. Files the target
+got some other way (e.g. spreadsheets uploaded through the API) are not
+in the manifest and are never touched.
+
+Local hashes are cached by size and mtime in <project>/.deploy_hashes.*.json,
+so unchanged files are not even read. --full ignores the target's manifest
+and sends everything.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import shlex
+import shutil
+import subprocess
+import sys
+import tarfile
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+SERVER = "root@159.65.35.217"
+PROJECTS = {
+    "greenwood": {"dir": "Greenwood_At_Katy", "remote": "/var/www/dashboards/Greenwood"},
+    "ancora": {"dir": "Ancora", "remote": "/var/www/dashboards/Ancora"},
+}
+MANIFEST = ".deploy_manifest.json"
+HASH_CACHE = ".deploy_hashes.{kind}.json"
+DATA_FILES = ("extract_single.py",)
+# Written after everything they reference, so visitors never load an
+# index.html whose hashed assets are not there yet
+DASHBOARD_ENTRIES = ("index.html", "sw.js", "manifest.json")
+REMOTE_BUILD = "source .venv/bin/activate && python3 build.py --split --incremental"
+SSH_TARGET_RE = re.compile(r"^(?P<host>[\w.@-]+):(?P<path>.+)$")
+DELETE_BATCH = 200
+HASH_CHUNK = 1024 * 1024
+
+
+# ----- local tree -----
+
+def data_files(project_dir):
+    """Relative paths of what a data deploy covers: Data_* folders + DATA_FILES."""
+    files = [name for name in DATA_FILES if os.path.isfile(os.path.join(project_dir, name))]
+    for name in sorted(os.listdir(project_dir)):
+        if name.startswith("Data_") and os.path.isdir(os.path.join(project_dir, name)):
+            files.extend(_walk(project_dir, name))
+    return files
+
+
+def _walk(root, top):
+    found = []
+    for current, dirs, files in os.walk(os.path.join(root, top)):
+        dirs.sort()
+        for name in sorted(files):
+            if name in (".DS_Store", "Thumbs.db") or name.startswith("~$"):
+                continue
+            found.append(os.path.relpath(os.path.join(current, name), root).replace(os.sep, "/"))
+    return found
+
+
+def hash_files(root, files, cache_path):
+    """SHA-256 of each file, reusing cached digests for files whose size and mtime match."""
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+    hashes, fresh = {}, {}
+    for rel in files:
+        stat = os.stat(os.path.join(root, rel))
+        entry = cache.get(rel)
+        if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            digest = entry[2]
+        else:
+            sha = hashlib.sha256()
+            with open(os.path.join(root, rel), "rb") as f:
+                for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+                    sha.update(chunk)
+            digest = sha.hexdigest()
+        hashes[rel] = digest
+        fresh[rel] = [stat.st_size, stat.st_mtime_ns, digest]
+    with open(cache_path, "w", encoding="utf-8") as f:
+        json.dump(fresh, f)
+    return hashes
+
+
+# ----- targets -----
+
+class LocalTarget:
+    """A directory on this machine; for trying deploys without the server."""
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+
+    def __str__(self):
+        return self.path
+
+    def read_manifest(self):
+        try:
+            with open(os.path.join(self.path, MANIFEST), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def upload(self, root, files):
+        for rel in files:
+            target = os.path.join(self.path, rel)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copy2(os.path.join(root, rel), target + ".tmp")
+            os.replace(target + ".tmp", target)
+
+    def delete(self, files):
+        for rel in files:
+            try:
+                os.remove(os.path.join(self.path, rel))
+            except FileNotFoundError:
+                pass
+
+    def write_manifest(self, manifest):
+        os.makedirs(self.path, exist_ok=True)
+        path = os.path.join(self.path, MANIFEST)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(path + ".tmp", path)
+
+    def build(self):
+        if not os.path.exists(os.path.join(self.path, "build.py")):
+            print(f"  No build.py in {self.path}, skipping the build.")
+            return
+        subprocess.run([sys.executable, "build.py", "--split", "--incremental"], cwd=self.path, check=True)
+
+
+class SshTarget:
+    """A directory on a server, reached with one ssh command per step."""
+
+    def __init__(self, host, path):
+        self.host, self.path = host, path.rstrip("/")
+
+    def __str__(self):
+        return f"{self.host}:{self.path}"
+
+    def _ssh(self, command, **kwargs):
+        return subprocess.run(["ssh", self.host, command], **kwargs)
+
+    def read_manifest(self):
+        result = self._ssh(f"cat {shlex.quote(self.path + '/' + MANIFEST)}", capture_output=True)
+        if result.returncode == 255:  # ssh itself failed, not cat
+            raise RuntimeError(f"Cannot reach {self.host}: {result.stderr.decode(errors='replace').strip()}")
+        if result.returncode != 0:
+            return {}
+        try:
+            return json.loads(result.stdout)
+        except ValueError:
+            return {}
+
+    def upload(self, root, files):
+        remote = shlex.quote(self.path)
+        proc = subprocess.Popen(["ssh", self.host, f"mkdir -p {remote} && tar -xf - --no-same-owner -C {remote}"],
+                                stdin=subprocess.PIPE)
+        # Already-compressed spreadsheets, PDFs and hashed assets: plain tar
+        with tarfile.open(fileobj=proc.stdin, mode="w|") as tar:
+            for rel in files:
+                tar.add(os.path.join(root, rel), arcname=rel, recursive=False)
+        proc.stdin.close()
+        if proc.wait() != 0:
+            raise RuntimeError(f"Upload to {self} failed (exit code {proc.returncode})")
+
+    def delete(self, files):
+        for i in range(0, len(files), DELETE_BATCH):
+            names = " ".join(shlex.quote(rel) for rel in files[i:i + DELETE_BATCH])
+            self._ssh(f"cd {shlex.quote(self.path)} && rm -f -- {names}", check=True)
+
+    def write_manifest(self, manifest):
+        path = shlex.quote(self.path + "/" + MANIFEST)
+        self._ssh(f"cat > {path}.tmp && mv {path}.tmp {path}", check=True,
+                  input=json.dumps(manifest, indent=1, sort_keys=True).encode("utf-8"))
+
+    def build(self):
+        self._ssh(f"cd {shlex.quote(self.path)} && {REMOTE_BUILD}", check=True)
+
+
+def make_target(spec):
+    match = SSH_TARGET_RE.match(spec)
+    if match and not os.path.exists(spec):
+        return SshTarget(match["host"], match["path"])
+    return LocalTarget(spec)
+
+
+# ----- deploy -----
+
+def sync(root, files, target, cache_path, full=False, delete=True, entries=()):
+    """Bring ``target`` up to date with ``files`` under ``root``; returns the counts."""
+    local = hash_files(root, files, cache_path)
+    remote = {} if full else target.read_manifest()
+    changed = [rel for rel, digest in local.items() if remote.get(rel) != digest]
+    gone = sorted(rel for rel in remote if rel not in local) if delete else []
+    sent = sum(os.path.getsize(os.path.join(root, rel)) for rel in changed)
+    total = sum(os.path.getsize(os.path.join(root, rel)) for rel in local)
+    print(f"  {len(changed)} of {len(local)} files changed "
+          f"({sent / 1024:.0f} of {total / 1024:.0f} KB), {len(gone)} to delete")
+
+    last = [rel for rel in changed if rel.startswith(tuple(entries))]  # index.html, index.html.gz, ...
+    first = [rel for rel in changed if rel not in last]
+    for batch in (first, last):
+        if batch:
+            target.upload(root, batch)
+    if gone:
+        target.delete(gone)
+    if changed or gone or full:
+        # Entries the target had but we no longer track (delete=False) stay listed
+        kept = {rel: digest for rel, digest in remote.items() if rel not in local and not delete}
+        target.write_manifest(dict(kept, **local))
+    return {"changed": len(changed), "deleted": len(gone), "bytes": sent}
+
+
+def deploy(name, kind, target=None, full=False, delete=False, build=True):
+    project = PROJECTS[name]
+    project_dir = os.path.join(BASE, project["dir"])
+    cache_path = os.path.join(project_dir, HASH_CACHE.format(kind=kind))
+    print(f"=== {project['dir']}: {kind} ===")
+    if kind == "data":
+        target = make_target(target or f"{SERVER}:{project['remote']}")
+        print(f"  -> {target}")
+        counts = sync(project_dir, data_files(project_dir), target, cache_path, full, delete)
+        if build and (counts["changed"] or counts["deleted"]):
+            print("  Building (incremental)...")
+            target.build()
+        elif build:
+            print("  Nothing changed, skipping the build.")
+    else:
+        dashboard = os.path.join(project_dir, "dashboard")
+        if not os.path.isdir(dashboard):
+            raise SystemExit(f"No {dashboard}; run build.py --split first.")
+        target = make_target(target or f"{SERVER}:{project['remote']}/dashboard")
+        print(f"  -> {target}")
+        # Builds remove superseded hashed files, so the target should too
+        counts = sync(dashboard, _walk(dashboard, "."), target,
+                      cache_path, full, delete=True, entries=DASHBOARD_ENTRIES)
+    return counts
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("project", choices=list(PROJECTS) + ["all"])
+    parser.add_argument("kind", choices=("data", "dashboard"),
+                        help="data: Data_* folders, then build on the target; "
+                             "dashboard: the locally built dashboard/ folder")
+    parser.add_argument("--target", help="user@host:/path or a local directory "
+                                         "(default: the project's folder on the server)")
+    parser.add_argument("--full", action="store_true", help="ignore the target's manifest and send everything")
+    parser.add_argument("--delete", action="store_true",
+                        help="data: also delete files that were deployed before but are gone locally")
+    parser.add_argument("--no-build", dest="build", action="store_false",
+                        help="data: don't run the build on the target afterwards")
+    args = parser.parse_args()
+    if args.project == "all" and args.target:
+        parser.error("--target needs a single project")
+    return args
+
+
+def main():
+    args = parse_args()
+    names = list(PROJECTS) if args.project == "all" else [args.project]
+    for name in names:
+        deploy(name, args.kind, args.target, full=args.full, delete=args.delete, build=args.build)
+    print("Done.")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,25 +7,24 @@ set -e
 SERVER="root@159.65.35.217"
 LOCAL_BASE="$(cd "$(dirname "$0")" && pwd)"
 
-# Correct server paths (matching Nginx config)
-REMOTE_ANCORA="/var/www/dashboards/Ancora/dashboard/index.html"
-REMOTE_GREENWOOD="/var/www/dashboards/Greenwood/dashboard/index.html"
+# Server paths (matching Nginx config) are in deploy.py, which uploads
+# only the dashboard files that changed since the last deploy
 
 deploy_ancora() {
     echo "=== Deploying Ancora ==="
     echo "  Building..."
-    cd "$LOCAL_BASE/Ancora" && source .venv/bin/activate && python build.py
-    echo "  Uploading to server..."
-    scp "$LOCAL_BASE/Ancora/dashboard/index.html" "$SERVER:$REMOTE_ANCORA"
+    cd "$LOCAL_BASE/Ancora" && source .venv/bin/activate && python build.py --split
+    echo "  Uploading changed files..."
+    python3 "$LOCAL_BASE/deploy.py" ancora dashboard
     echo "  ✅ Ancora deployed"
 }
 
 deploy_greenwood() {
     echo "=== Deploying Greenwood ==="
     echo "  Building..."
-    cd "$LOCAL_BASE/Greenwood_At_Katy" && source .venv/bin/activate && python build.py
-    echo "  Uploading to server..."
-    scp "$LOCAL_BASE/Greenwood_At_Katy/dashboard/index.html" "$SERVER:$REMOTE_GREENWOOD"
+    cd "$LOCAL_BASE/Greenwood_At_Katy" && source .venv/bin/activate && python build.py --split
+    echo "  Uploading changed files..."
+    python3 "$LOCAL_BASE/deploy.py" greenwood dashboard
     echo "  ✅ Greenwood deployed"
 }
 
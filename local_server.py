@@ -1,14 +1,252 @@
 #!/usr/bin/env python3
-"""Local dev server: serves dashboards + proxies /api/ to DigitalOcean server."""
+"""Local dev server: serves dashboards + proxies /api/ to DigitalOcean server.
+
+Requests are handled on their own threads, so a slow upload or OCR call
+doesn't hold up assets or other API calls. The proxy keeps a small pool
+of keep-alive connections to the remote server and streams bodies in
+both directions.
+
+Proxied GETs are cached for CACHE_TTL seconds (less when the server's
+Cache-Control max-age says so; no-cache means revalidate every time,
+no-store means don't keep it), then revalidated with If-None-Match. A
+PUT/PATCH/POST to a dataset drops its cached responses before it is
+forwarded and again when the reply arrives, before it is relayed.
+GET /_proxy/stats shows the cache counters.
+
+Set PPP_API_DIR=<dir> to serve /api/v1 datasets from local files instead
+(api/ package), e.g. to try versioned/delta sync without the remote server.
+Spreadsheet uploads then run as background jobs on an in-process queue,
+and screenshot OCR calls the vision API with the key from ANTHROPIC_API_KEY
+or the stored api_key (PPP_VISION_URL=http://localhost:8080/mock/v1/messages
+tries it offline).
+POST /mock/v1/messages is a mock of the Anthropic Messages API for the AI
+chat (api/mock_messages.py).
+"""
+import email.utils
+import gzip
+import http.client
 import http.server
-import urllib.request
-import urllib.error
 import json
 import os
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
 
 PORT = 8080
 BASE = os.path.dirname(os.path.abspath(__file__))
 REMOTE_API = "http://159.65.35.217/api"
+LOCAL_API_DIR = os.environ.get("PPP_API_DIR")
+# Conditional-request headers passed through the proxy in each direction
+PROXY_REQUEST_HEADERS = ('If-None-Match',)
+PROXY_RESPONSE_HEADERS = ('ETag', 'Cache-Control')
+# At most this many requests in flight to the remote server at once
+UPSTREAM_CONNECTIONS = 8
+STREAM_CHUNK = 64 * 1024
+# Seconds to wait on the remote server, by API path (first match wins)
+ROUTE_TIMEOUTS = (
+    (re.compile(r'^/api/v1/[^/]+/(ocr|upload/)'), 120),
+    (re.compile(r'^/api/'), 20),
+)
+# Proxied GET responses kept in memory
+CACHE_TTL = 30  # seconds served without asking the remote server
+CACHE_MAX_ENTRIES = 256
+CACHE_MAX_BYTES = 8 * 1024 * 1024  # per response
+CACHED_HEADERS = ('Content-Type', 'ETag', 'Cache-Control')
+DATASET_PATH_RE = re.compile(r'^/api/v1/(?P<prop>[^/?]+)/(?:upload/)?(?P<type>[^/?]+)')
+STATS_PATH = '/_proxy/stats'
+# Static files
+STATIC_ROUTES = (('/greenwood', '/Greenwood_At_Katy/dashboard'), ('/ancora', '/Ancora/dashboard'))
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{10}\.[A-Za-z0-9]+$')
+COMPRESSIBLE_EXTS = ('.html', '.json', '.js', '.css', '.svg', '.txt', '.md')
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+GZIP_MIN_BYTES = 1024
+SENDFILE_MIN_BYTES = 64 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+MOCK_MESSAGES_PATH = '/mock/v1/messages'
+
+store = jobs = ocr = None
+if LOCAL_API_DIR:
+    import api
+    store = api.DatasetStore(LOCAL_API_DIR)
+    jobs = api.JobQueue()
+    ocr = api.OcrService(lambda prop: os.environ.get("ANTHROPIC_API_KEY") or store.get(prop, "api_key")[0],
+                         cache_dir=os.path.join(LOCAL_API_DIR, ".ocr_cache"))
+
+
+class UpstreamPool:
+    """Keep-alive HTTP connections to one host, at most ``size`` in use at a time."""
+
+    def __init__(self, base_url, size):
+        url = urlsplit(base_url)
+        self.host, self.port = url.hostname, url.port
+        self.prefix = url.path.rstrip('/')
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = queue.LifoQueue()
+
+    def acquire(self, timeout):
+        """Wait for a free slot and return a connection (idle if one is left open)."""
+        self._slots.acquire()
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn
+
+    def release(self, conn, reusable):
+        if reusable:
+            self._idle.put(conn)
+        else:
+            conn.close()
+        self._slots.release()
+
+
+upstream = UpstreamPool(REMOTE_API, UPSTREAM_CONNECTIONS)
+
+
+def cache_ttl(cache_control):
+    """Seconds a response may be served without asking the server, per its Cache-Control."""
+    directives = [d.strip().lower() for d in (cache_control or '').split(',')]
+    if 'no-cache' in directives or 'no-store' in directives:
+        return 0
+    for d in directives:
+        if d.startswith('max-age='):
+            try:
+                return min(CACHE_TTL, max(0, int(d[len('max-age='):])))
+            except ValueError:
+                return 0
+    return CACHE_TTL
+
+
+class CacheEntry:
+    def __init__(self, headers, body):
+        self.headers = {name: headers[name] for name in CACHED_HEADERS if headers.get(name)}
+        self.etag = self.headers.get('ETag')
+        self.body = body
+        self.ttl = cache_ttl(headers.get('Cache-Control'))
+        self.stored = time.monotonic()
+
+    def fresh(self):
+        return time.monotonic() - self.stored < self.ttl
+
+
+class ResponseCache:
+    """LRU cache of proxied GET responses, keyed by path (query included)."""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'invalidated': 0, 'evicted': 0}
+
+    def count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def get(self, path):
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None:
+                self._entries.move_to_end(path)
+            return entry
+
+    def put(self, path, entry):
+        with self._lock:
+            self._entries[path] = entry
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evicted'] += 1
+
+    def invalidate(self, path):
+        """Drop cached responses for the dataset a write to ``path`` changes.
+
+        /bootstrap embeds every per-user dataset, so it goes too.
+        """
+        m = DATASET_PATH_RE.match(path)
+        if not m:
+            return
+        prefixes = tuple(f"/api/v1/{m['prop']}/{t}" for t in (m['type'], 'bootstrap'))
+        with self._lock:
+            for key in [k for k in self._entries if k.split('?', 1)[0].startswith(prefixes)]:
+                del self._entries[key]
+                self.stats['invalidated'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats, entries=len(self._entries),
+                        bytes=sum(len(e.body) for e in self._entries.values()))
+
+
+cache = ResponseCache()
+
+
+_gzipped = {}  # (path, mtime_ns, size) -> gzip bytes, for files without a .gz sibling
+_gzipped_lock = threading.Lock()
+
+
+def gzip_file(path, st):
+    key = (path, st.st_mtime_ns, st.st_size)
+    with _gzipped_lock:
+        data = _gzipped.get(key)
+    if data is None:
+        with open(path, 'rb') as f:
+            data = gzip.compress(f.read(), compresslevel=6)
+        with _gzipped_lock:
+            for stale in [k for k in _gzipped if k[0] == path]:
+                del _gzipped[stale]
+            _gzipped[key] = data
+    return data
+
+
+def accepted_encodings(header):
+    """Codings from Accept-Encoding that aren't refused with q=0."""
+    codings = set()
+    for part in (header or '').split(','):
+        name, _, params = part.strip().partition(';')
+        if name and params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            codings.add(name.lower())
+    return codings
+
+
+def parse_range(header, size):
+    """(start, end) inclusive for a single "bytes=" range; None = whole file, False = unsatisfiable."""
+    m = RANGE_RE.match(header or '')
+    if not m or m.group(1) == m.group(2) == '':
+        return None
+    if m.group(1) == '':
+        start, end = max(0, size - int(m.group(2))), size - 1
+    else:
+        start = int(m.group(1))
+        end = min(int(m.group(2)), size - 1) if m.group(2) else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def etag_matches(header, etag):
+    return bool(header and etag) and etag.removeprefix('W/') in (
+        t.strip().removeprefix('W/') for t in header.split(','))
+
+
+def route_timeout(path):
+    return next(t for pattern, t in ROUTE_TIMEOUTS if pattern.match(path))
+
+
+def read_body(rfile, length, chunk=STREAM_CHUNK):
+    """Yield exactly ``length`` bytes of a request body in chunks."""
+    while length > 0:
+        data = rfile.read(min(chunk, length))
+        if not data:
+            return
+        length -= len(data)
+        yield data
 
 class Handler(http.server.SimpleHTTPRequestHandler):
     def __init__(self, *args, **kwargs):
@@ -17,72 +255,279 @@ class Handler(http.server.SimpleHTTPRequestHandler):
     def do_GET(self):
         if self.path.startswith('/api/'):
             self._proxy()
-        elif self.path == '/' or self.path == '/index.html':
-            super().do_GET()
-        elif self.path.startswith('/greenwood'):
-            self.path = '/Greenwood_At_Katy/dashboard' + self.path[len('/greenwood'):]
-            if self.path.endswith('/'):
-                self.path += 'index.html'
-            super().do_GET()
-        elif self.path.startswith('/ancora'):
-            self.path = '/Ancora/dashboard' + self.path[len('/ancora'):]
-            if self.path.endswith('/'):
-                self.path += 'index.html'
-            super().do_GET()
+        elif self.path == STATS_PATH:
+            self._send_json(200, {'cache': cache.snapshot(), 'ttl': CACHE_TTL})
         else:
-            super().do_GET()
+            self._static()
+
+    def do_HEAD(self):
+        self._static(head=True)
 
     def do_PUT(self):
         if self.path.startswith('/api/'):
             self._proxy()
 
+    def do_PATCH(self):
+        if self.path.startswith('/api/'):
+            self._proxy()
+
     def do_POST(self):
         if self.path.startswith('/api/'):
             self._proxy()
+        elif self.path == MOCK_MESSAGES_PATH:
+            self._mock_messages()
 
     def do_OPTIONS(self):
         if self.path.startswith('/api/'):
             self._proxy()
 
     def _proxy(self):
-        url = REMOTE_API + self.path[len('/api'):]
-        body = None
-        if self.headers.get('Content-Length'):
-            body = self.rfile.read(int(self.headers['Content-Length']))
-        req = urllib.request.Request(url, data=body, method=self.command)
-        req.add_header('Content-Type', self.headers.get('Content-Type', 'application/json'))
+        if store is not None and api.owns(self.command, self.path):
+            return self._local_api()
+        is_get = self.command == 'GET'
+        is_write = self.command in ('PUT', 'PATCH', 'POST', 'DELETE')
+        if is_write:
+            cache.invalidate(self.path)
+        entry = cache.get(self.path) if is_get else None
+        # fetch(..., {cache: 'no-store'}) and reloads ask to skip caches
+        bypass = 'no-' in self.headers.get('Cache-Control', '') + self.headers.get('Pragma', '')
+        if entry is not None and entry.fresh() and not bypass:
+            cache.count('hits')
+            return self._send_cached(entry)
+        length = int(self.headers.get('Content-Length') or 0)
+        headers = {'Content-Type': self.headers.get('Content-Type', 'application/json')}
+        if length:
+            headers['Content-Length'] = str(length)
+        for name in PROXY_REQUEST_HEADERS:
+            if self.headers.get(name):
+                headers[name] = self.headers[name]
+        if entry is not None and entry.etag:
+            # Revalidate our copy; the browser's own tag is checked against it locally
+            headers['If-None-Match'] = entry.etag
+        path = upstream.prefix + self.path[len('/api'):]
+        conn = upstream.acquire(route_timeout(self.path))
+        reusable = started = False
         try:
-            with urllib.request.urlopen(req, timeout=120) as resp:
-                data = resp.read()
-                self.send_response(resp.status)
+            resp = self._upstream_request(conn, path, headers, length)
+            if is_write:
+                # A GET that raced the write may have re-cached the old data
+                cache.invalidate(self.path)
+            if entry is not None and resp.status == 304:
+                resp.read()
+                reusable = not resp.will_close
+                if resp.headers.get('Cache-Control'):
+                    entry.ttl = cache_ttl(resp.headers['Cache-Control'])
+                entry.stored = time.monotonic()
+                cache.count('revalidated')
+                return self._send_cached(entry)
+            if is_get:
+                cache.count('misses')
+            self.send_response(resp.status)
+            if resp.status != 304:
                 self.send_header('Content-Type', resp.headers.get('Content-Type', 'application/json'))
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                self.wfile.write(data)
-        except urllib.error.HTTPError as e:
-            data = e.read()
-            self.send_response(e.code)
-            self.send_header('Content-Type', 'application/json')
+            if resp.headers.get('Content-Length'):
+                self.send_header('Content-Length', resp.headers['Content-Length'])
+            self._copy_headers(resp.headers)
             self.send_header('Access-Control-Allow-Origin', '*')
             self.end_headers()
-            self.wfile.write(data)
-        except urllib.error.URLError as e:
-            err = json.dumps({"error": f"Cannot reach server: {e.reason}"}).encode()
-            self.send_response(502)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(err)
+            started = True
+            cacheable = (is_get and resp.status == 200
+                         and 'no-store' not in resp.headers.get('Cache-Control', ''))
+            kept, size = [], 0
+            while True:
+                data = resp.read(STREAM_CHUNK)
+                if not data:
+                    break
+                self.wfile.write(data)
+                if cacheable:
+                    size += len(data)
+                    cacheable = size <= CACHE_MAX_BYTES
+                    kept.append(data)
+            reusable = not resp.will_close
+            if cacheable:
+                cache.put(self.path, CacheEntry(resp.headers, b''.join(kept)))
+        except (OSError, http.client.HTTPException) as e:
+            if not started:
+                self._proxy_error(502, f"Cannot reach server: {e}")
         except Exception as e:
-            err = json.dumps({"error": f"Proxy error: {str(e)}"}).encode()
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json')
+            if not started:
+                self._proxy_error(500, f"Proxy error: {str(e)}")
+        finally:
+            upstream.release(conn, reusable)
+
+    def _send_cached(self, entry):
+        if etag_matches(self.headers.get('If-None-Match'), entry.etag):
+            self.send_response(304)
+            self.send_header('ETag', entry.etag)
             self.send_header('Access-Control-Allow-Origin', '*')
             self.end_headers()
-            self.wfile.write(err)
+            return
+        self.send_response(200)
+        for name, value in entry.headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(entry.body)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(entry.body)
+
+    def _upstream_request(self, conn, path, headers, length):
+        """Send the request, retrying once when a pooled connection had gone stale."""
+        for attempt in (1, 2):
+            try:
+                body = read_body(self.rfile, length) if length else None
+                conn.request(self.command, path, body=body, headers=headers)
+                return conn.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                # A streamed request body can't be replayed
+                if attempt == 2 or length:
+                    raise
+
+    def _proxy_error(self, status, message):
+        try:
+            self._send_json(status, {"error": message})
+        except OSError:
+            pass  # the browser went away
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _copy_headers(self, headers):
+        for name in PROXY_RESPONSE_HEADERS:
+            if headers.get(name):
+                self.send_header(name, headers[name])
+
+    def _local_api(self):
+        """Serve a dataset route from the local DatasetStore."""
+        body = b''
+        if self.headers.get('Content-Length'):
+            body = self.rfile.read(int(self.headers['Content-Length']))
+        status, headers, data = api.handle(store, self.command, self.path, self.headers, body, jobs, ocr)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _static(self, head=False):
+        requested = self.path.split('?', 1)[0]
+        for prefix, directory in STATIC_ROUTES:
+            if self.path.startswith(prefix):
+                self.path = directory + self.path[len(prefix):]
+        path = self.translate_path(self.path)
+        if os.path.isdir(path) and os.path.isfile(os.path.join(path, 'index.html')):
+            if not requested.endswith('/'):
+                # Relative URLs in the page need the trailing slash
+                self.send_response(301)
+                self.send_header('Location', requested + '/')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            path = os.path.join(path, 'index.html')
+        if not os.path.isfile(path):
+            return super().do_HEAD() if head else super().do_GET()
+        self._send_file(path, head)
+
+    def _send_file(self, path, head):
+        """Serve one file: content negotiation, ETag/304, Range, sendfile."""
+        st = os.stat(path)
+        accepted = accepted_encodings(self.headers.get('Accept-Encoding'))
+        compressible = path.endswith(COMPRESSIBLE_EXTS)
+        encoding, body_path, data = None, path, None
+        if compressible:
+            for coding, suffix in PRECOMPRESSED:
+                sibling = path + suffix
+                if coding in accepted and os.path.isfile(sibling) \
+                        and os.stat(sibling).st_mtime_ns >= st.st_mtime_ns:
+                    encoding, body_path = coding, sibling
+                    break
+            else:
+                if 'gzip' in accepted and st.st_size >= GZIP_MIN_BYTES:
+                    encoding, data = 'gzip', gzip_file(path, st)
+        body_st = os.stat(body_path) if data is None else None
+        size = len(data) if data is not None else body_st.st_size
+        etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}{"-" + encoding if encoding else ""}"'
+
+        headers = {
+            'Content-Type': self.guess_type(path),
+            'ETag': etag,
+            'Last-Modified': email.utils.formatdate(st.st_mtime, usegmt=True),
+            'Cache-Control': ('public, max-age=31536000, immutable'
+                              if HASHED_NAME_RE.search(path) else 'no-cache'),
+            'Accept-Ranges': 'bytes',
+        }
+        if compressible:
+            headers['Vary'] = 'Accept-Encoding'
+        if encoding:
+            headers['Content-Encoding'] = encoding
+
+        if etag_matches(self.headers.get('If-None-Match'), etag):
+            self.send_response(304)
+            for name in ('ETag', 'Cache-Control', 'Vary'):
+                if name in headers:
+                    self.send_header(name, headers[name])
+            self.end_headers()
+            return
+
+        span = None
+        if self.headers.get('Range') and self.headers.get('If-Range', etag) == etag:
+            span = parse_range(self.headers['Range'], size)
+            if span is False:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+        start, end = span or (0, size - 1)
+        self.send_response(206 if span else 200)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if span:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+        if head or size == 0:
+            return
+        if data is not None:
+            self.wfile.write(data[start:end + 1])
+            return
+        with open(body_path, 'rb') as f:
+            if end - start + 1 >= SENDFILE_MIN_BYTES:
+                self.wfile.flush()
+                self.connection.sendfile(f, start, end - start + 1)
+            else:
+                f.seek(start)
+                self.wfile.write(f.read(end - start + 1))
+
+    def _mock_messages(self):
+        from api import mock_messages
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        status, content_type, chunks = mock_messages.respond(body)
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.end_headers()
+        for chunk in chunks:
+            self.wfile.write(chunk)
+            self.wfile.flush()
+
+
+def main():
+    print(f"Local server: http://localhost:{PORT}")
+    print(f"  Greenwood: http://localhost:{PORT}/greenwood/")
+    print(f"  Ancora:    http://localhost:{PORT}/ancora/")
+    print(f"  AI chat mock: {MOCK_MESSAGES_PATH}")
+    print(f"  API: local files in {LOCAL_API_DIR}" if store else f"  API proxy -> {REMOTE_API}")
+    server = http.server.ThreadingHTTPServer(('', PORT), Handler)
+    server.daemon_threads = True
+    server.serve_forever()
+
 
-print(f"Local server: http://localhost:{PORT}")
-print(f"  Greenwood: http://localhost:{PORT}/greenwood/")
-print(f"  Ancora:    http://localhost:{PORT}/ancora/")
-print(f"  API proxy -> {REMOTE_API}")
-http.server.HTTPServer(('', PORT), Handler).serve_forever()
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,5 @@
+"""Tests for the repo-level code (api/, deploy.py): run ``python -m pytest`` from the repo root."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,120 @@
+"""api/delta.py ops, and the /delta route's 304 / 200 / 410 answers (api/routes.py)."""
+import copy
+import json
+
+import pytest
+
+from api import delta, routes
+from api.store import DatasetStore, dataset_version
+
+
+def weeks(*days, **fields):
+    return [{"week_ending": f"2026-01-{d:02d}", "gross_leases": d, **fields} for d in days]
+
+
+CASES = {
+    "equal": ({"a": 1}, {"a": 1}),
+    "field set and removed": ({"a": 1, "b": 2}, {"a": 1, "c": 3}),
+    "nested value": ({"kpi": {"noi": 1, "dscr": 2}}, {"kpi": {"noi": 5, "dscr": 2}}),
+    "rolling window drops and appends": ({"months": ["Jan", "Feb", "Mar"]}, {"months": ["Feb", "Mar", "Apr"]}),
+    "keyed rows replaced, added, removed": ({"weeks": weeks(2, 9, 16)},
+                                            {"weeks": weeks(9) + weeks(16, source="ocr") + weeks(23)}),
+    "keyed rows reordered": ({"weeks": weeks(2, 9)}, {"weeks": weeks(9, 2)}),
+    "type change": ({"a": [1, 2]}, {"a": {"b": 1}}),
+}
+
+
+@pytest.mark.parametrize("old, new", CASES.values(), ids=CASES.keys())
+def test_diff_then_apply_round_trips(old, new):
+    ops = delta.diff(old, new)
+    assert delta.apply(copy.deepcopy(old), ops) == new
+    assert (ops == []) == (old == new)
+
+
+def test_op_shapes():
+    assert delta.diff({"m": [1, 2, 3]}, {"m": [2, 3, 4]}) == [
+        {"op": "append", "path": ["m"], "drop": 1, "items": [4]}]
+    ops = delta.diff({"weeks": weeks(2, 9)}, {"weeks": weeks(9, 16)})
+    assert ops == [{"op": "upsert", "path": ["weeks"], "key": "week_ending",
+                    "items": weeks(16), "remove": ["2026-01-02"]}]
+    # Reordered keyed rows can't be an upsert, so the list is sent whole
+    assert delta.diff({"weeks": weeks(2, 9)}, {"weeks": weeks(9, 2)}) == [
+        {"op": "set", "path": ["weeks"], "value": weeks(9, 2)}]
+
+
+def test_apply_does_not_alias_op_values():
+    ops = [{"op": "set", "path": ["a"], "value": {"b": 1}}]
+    doc = delta.apply({}, ops)
+    doc["a"]["b"] = 2
+    assert ops[0]["value"] == {"b": 1}
+
+
+def test_unknown_op_is_rejected():
+    with pytest.raises(ValueError):
+        delta.apply({"a": 1}, [{"op": "move", "path": ["a"]}])
+
+
+def test_merge_patch():
+    doc = {"a": 1, "b": {"c": 2, "d": 3}}
+    assert delta.merge_patch(doc, {"a": None, "b": {"c": 9}, "e": [1]}) == {"b": {"c": 9, "d": 3}, "e": [1]}
+    assert delta.merge_patch({"a": 1}, [1, 2]) == [1, 2]
+
+
+# ----- the /delta route -----
+
+def get(store, path, headers=None):
+    status, response_headers, body = routes.handle(store, "GET", path, headers or {})
+    return status, response_headers, json.loads(body) if body else None
+
+
+@pytest.fixture(params=["financials", "leasing"])  # file history, event log
+def dataset(request, tmp_path):
+    store = DatasetStore(str(tmp_path))
+    # Unchanged bulk, so the delta is smaller than the document (else the route sends it whole)
+    notes = ["unchanged note"] * 50
+    old = {"weeks": weeks(2, 9), "notes": notes}
+    first = store.put("gwk", request.param, copy.deepcopy(old))
+    new = {"weeks": weeks(9) + weeks(16), "notes": notes}
+    second = store.put("gwk", request.param, copy.deepcopy(new))
+    return store, f"/api/v1/gwk/{request.param}", old, first, new, second
+
+
+def test_delta_from_an_older_version(dataset):
+    store, url, old, first, new, second = dataset
+    status, headers, body = get(store, f"{url}/delta?since={first}")
+    assert status == 200 and body["version"] == second and headers["ETag"] == f'"{second}"'
+    assert delta.apply(copy.deepcopy(old), body["ops"]) == new
+
+
+def test_delta_bigger_than_the_document_sends_the_document(tmp_path):
+    store = DatasetStore(str(tmp_path))
+    first = store.put("gwk", "financials", {"a": 1})
+    second = store.put("gwk", "financials", {"b": 2})
+    status, _, body = get(store, f"/api/v1/gwk/financials/delta?since={first}")
+    assert status == 200 and body == {"version": second, "data": {"b": 2}}
+
+
+def test_delta_from_the_current_version_is_not_modified(dataset):
+    store, url, *_, second = dataset
+    assert get(store, f"{url}/delta?since={second}")[0] == 304
+
+
+def test_unknown_base_is_gone_then_full_get(dataset):
+    store, url, *_, new, second = dataset
+    status, _, body = get(store, f"{url}/delta?since=0123456789abcdef")
+    assert status == 410 and body["version"] == second
+    # The dashboard's fallback: a full (conditional) GET
+    status, _, body = get(store, url, {"If-None-Match": '"0123456789abcdef"'})
+    assert status == 200 and body == {"data": new, "version": second}
+    assert get(store, url, {"If-None-Match": f'"{second}"'})[0] == 304
+
+
+def test_missing_dataset_is_not_found(tmp_path):
+    assert get(DatasetStore(str(tmp_path)), "/api/v1/gwk/financials/delta?since=x")[0] == 404
+
+
+def test_build_inlined_version_is_current(dataset):
+    store, url, *_, new, second = dataset
+    built = dataset_version(new)  # what DATA_VERSIONS holds after a build of the same data
+    assert get(store, f"{url}/delta?since={built}")[0] == 304
+    assert get(store, url, {"If-None-Match": f'"{built}"'})[0] == 304
@@ -0,0 +1,144 @@
+"""deploy.py: manifest diffing, upload/delete ordering and the local directory target."""
+import json
+import os
+
+import pytest
+
+import deploy
+
+
+class RecordingTarget(deploy.LocalTarget):
+    """A LocalTarget that also logs each step, in order."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.calls = []
+
+    def upload(self, root, files):
+        self.calls.append(("upload", list(files)))
+        super().upload(root, files)
+
+    def delete(self, files):
+        self.calls.append(("delete", list(files)))
+        super().delete(files)
+
+    def write_manifest(self, manifest):
+        self.calls.append(("manifest", sorted(manifest)))
+        super().write_manifest(manifest)
+
+
+def write(root, rel, text):
+    path = os.path.join(root, rel)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root, remote = tmp_path / "local", tmp_path / "remote"
+    for rel, text in {"index.html": "<html>v1", "js/app.1111.js": "app", "data/leasing.json": "{}"}.items():
+        write(root, rel, text)
+    return str(root), RecordingTarget(str(remote)), str(tmp_path / "hashes.json")
+
+
+def sync(root, target, cache, **kwargs):
+    target.calls.clear()
+    files = deploy._walk(root, ".")
+    return deploy.sync(root, files, target, cache, entries=deploy.DASHBOARD_ENTRIES, **kwargs)
+
+
+def test_first_deploy_sends_everything_and_records_it(tree):
+    root, target, cache = tree
+    assert sync(root, target, cache) == {"changed": 3, "deleted": 0, "bytes": 13}
+    manifest = target.read_manifest()
+    assert sorted(manifest) == ["data/leasing.json", "index.html", "js/app.1111.js"]
+    with open(os.path.join(target.path, "index.html"), encoding="utf-8") as f:
+        assert f.read() == "<html>v1"
+
+
+def test_unchanged_tree_sends_nothing(tree):
+    root, target, cache = tree
+    sync(root, target, cache)
+    assert sync(root, target, cache) == {"changed": 0, "deleted": 0, "bytes": 0}
+    assert target.calls == []  # not even the manifest
+
+
+def test_entries_go_last_and_deletes_after_uploads(tree):
+    root, target, cache = tree
+    sync(root, target, cache)
+    # A rebuild: new hashed asset, index.html pointing at it, old asset removed
+    os.remove(os.path.join(root, "js/app.1111.js"))
+    write(root, "js/app.2222.js", "app v2")
+    write(root, "index.html", "<html>v2")
+    assert sync(root, target, cache) == {"changed": 2, "deleted": 1, "bytes": 14}
+    assert target.calls == [
+        ("upload", ["js/app.2222.js"]),
+        ("upload", ["index.html"]),
+        ("delete", ["js/app.1111.js"]),
+        ("manifest", ["data/leasing.json", "index.html", "js/app.2222.js"]),
+    ]
+    assert not os.path.exists(os.path.join(target.path, "js/app.1111.js"))
+
+
+def test_without_delete_removed_files_stay_listed(tree):
+    root, target, cache = tree
+    sync(root, target, cache)
+    os.remove(os.path.join(root, "data/leasing.json"))
+    write(root, "data/budget.json", "[]")
+    sync(root, target, cache, delete=False)
+    assert ("delete", ["data/leasing.json"]) not in target.calls
+    assert os.path.exists(os.path.join(target.path, "data/leasing.json"))
+    assert "data/leasing.json" in target.read_manifest()
+
+
+def test_files_the_target_got_elsewhere_are_never_touched(tree):
+    root, target, cache = tree
+    sync(root, target, cache)
+    write(target.path, "Data_Leasing/uploaded.xlsx", "from the API")
+    write(root, "index.html", "<html>v2")
+    sync(root, target, cache)
+    assert os.path.exists(os.path.join(target.path, "Data_Leasing/uploaded.xlsx"))
+    assert "Data_Leasing/uploaded.xlsx" not in target.read_manifest()
+
+
+def test_full_ignores_the_manifest(tree):
+    root, target, cache = tree
+    sync(root, target, cache)
+    assert sync(root, target, cache, full=True)["changed"] == 3
+
+
+def test_interrupted_deploy_resends(tree):
+    root, target, cache = tree
+    sync(root, target, cache)
+    write(root, "index.html", "<html>v2")
+    os.remove(os.path.join(target.path, deploy.MANIFEST))  # as if the deploy died before the manifest
+    assert sync(root, target, cache)["changed"] == 3
+
+
+def test_hash_cache_skips_files_whose_size_and_mtime_match(tree):
+    root, _target, cache = tree
+    first = deploy.hash_files(root, ["index.html"], cache)
+    path = os.path.join(root, "index.html")
+    stat = os.stat(path)
+    write(root, "index.html", "<html>v9")  # same size...
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))  # ...and mtime: trusted
+    assert deploy.hash_files(root, ["index.html"], cache) == first
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert deploy.hash_files(root, ["index.html"], cache) != first
+    with open(cache, encoding="utf-8") as f:
+        assert list(json.load(f)) == ["index.html"]
+
+
+def test_data_files_cover_data_folders_and_skip_clutter(tmp_path):
+    for rel in ("extract_single.py", "Data_Leasing/week.xlsx", "Data_Leasing/~$week.xlsx",
+                "Data_T12P&L/.DS_Store", "Data_T12P&L/t12.xlsx", "src/config.py"):
+        write(tmp_path, rel, "x")
+    assert deploy.data_files(str(tmp_path)) == ["extract_single.py", "Data_Leasing/week.xlsx",
+                                                "Data_T12P&L/t12.xlsx"]
+
+
+def test_make_target(tmp_path):
+    assert isinstance(deploy.make_target(str(tmp_path)), deploy.LocalTarget)
+    target = deploy.make_target("root@example.com:/var/www/x/")
+    assert isinstance(target, deploy.SshTarget) and str(target) == "root@example.com:/var/www/x"
@@ -0,0 +1,156 @@
+"""api/leasing_log.py: writes, replay, snapshots, undo and the versions /delta resolves."""
+import copy
+import json
+
+import pytest
+
+from api import delta, leasing_log
+from api.leasing_log import LeasingLog
+from api.store import DatasetStore, dataset_version
+
+
+def week(day, **fields):
+    return {"week_ending": f"2026-01-{day:02d}", "gross_leases": day, **fields}
+
+
+SEED = {"weeks": [week(2), week(9), week(16)], "trends": {"n_weeks": 3}}
+
+
+@pytest.fixture
+def directory(tmp_path):
+    (tmp_path / "leasing.json").write_text(json.dumps(SEED), encoding="utf-8")
+    return str(tmp_path)
+
+
+def reopen(directory):
+    return LeasingLog(directory, "gwk")
+
+
+def test_seed_version_is_the_build_version(directory):
+    log = reopen(directory)
+    assert log.get() == (SEED, dataset_version(SEED))
+
+
+def test_appended_week_is_an_upsert_that_rebuilds_the_document(directory):
+    log = reopen(directory)
+    base = log.version
+    change = log.add_week(week(23), source="manual")
+    doc, version = log.get()
+    assert change["base"] == base and change["version"] == version != base
+    assert change["ops"] == [{"op": "upsert", "path": ["weeks"], "key": "week_ending",
+                              "items": [dict(week(23), source_type="manual")], "remove": []}]
+    assert delta.apply(copy.deepcopy(SEED), change["ops"]) == doc
+
+
+def test_backfilled_week_keeps_weeks_sorted(directory):
+    log = reopen(directory)
+    change = log.add_week(week(5))
+    doc, _ = log.get()
+    assert [w["week_ending"][-2:] for w in doc["weeks"]] == ["02", "05", "09", "16"]
+    assert change["ops"][0]["op"] == "set"
+
+
+def test_counts_entered_by_hand_get_percentages(directory):
+    log = reopen(directory)
+    log.add_week({"week_ending": "2026-01-23", "occupied_num": 162})
+    assert log.get()[0]["weeks"][-1]["occupancy_pct"] == 50.0  # 162 / 324 units
+
+
+def test_replay_restores_document_and_version(directory):
+    log = reopen(directory)
+    log.add_week(week(23))
+    log.add_week(week(9, gross_leases=99), source="ocr")
+    log.remove_week("2026-01-02")
+    restarted = reopen(directory)
+    assert restarted.get() == log.get()
+    assert restarted.seq == 3
+
+
+def test_delta_from_any_recent_version(directory):
+    log = reopen(directory)
+    versions, docs = [log.version], [copy.deepcopy(log.get()[0])]
+    for day in (23, 30):
+        log.add_week(week(day))
+        versions.append(log.version)
+        docs.append(copy.deepcopy(log.get()[0]))
+    current = log.get()[0]
+    for version, doc in zip(versions, docs):
+        ops, now = log.delta(version)
+        assert now == log.version
+        assert delta.apply(copy.deepcopy(doc), ops) == current
+    assert log.delta(log.version) == ([], log.version)
+    assert log.delta("0123456789abcdef") == (None, log.version)
+
+
+def test_build_inlined_content_version_resolves(directory):
+    log = reopen(directory)
+    log.add_week(week(23))
+    built = dataset_version(log.get()[0])  # what a build of the current data inlines
+    assert built != log.version
+    assert log.delta(built) == ([], log.version)
+    assert log.matches(built) and log.matches(log.version)
+    log.add_week(week(30))
+    ops, _ = log.delta(built)
+    assert [w["week_ending"] for w in ops[0]["items"]] == ["2026-01-30"]
+    assert not log.matches(built)
+
+
+def test_import_without_changes_keeps_the_version(directory):
+    log = reopen(directory)
+    version = log.version
+    assert log.import_doc(copy.deepcopy(SEED)) == {"ops": [], "base": version, "version": version}
+
+
+def test_import_records_week_and_field_changes(directory):
+    log = reopen(directory)
+    new = {"weeks": [week(9), week(16, gross_leases=0), week(23)], "trends": {"n_weeks": 4}}
+    log.import_doc(new, source="xlsx")
+    assert log.get()[0] == new
+    log.undo()
+    assert log.get()[0] == SEED
+
+
+def test_undo_reverts_in_order_and_survives_restart(directory):
+    log = reopen(directory)
+    log.add_week(week(23))
+    after_first = copy.deepcopy(log.get()[0])
+    log.add_week(week(9, gross_leases=99))
+    restarted = reopen(directory)
+    assert restarted.undo()["restored_from"] == "before change #2"
+    assert restarted.get()[0] == after_first
+    restarted.undo()
+    assert restarted.get()[0] == SEED
+    assert restarted.undo() is None
+    assert reopen(directory).get()[0] == SEED
+
+
+def test_snapshot_plus_tail(directory, monkeypatch):
+    monkeypatch.setattr(leasing_log, "SNAPSHOT_EVERY", 2)
+    log = reopen(directory)
+    for day in (23, 30):
+        log.add_week(week(day))
+    snapshot = json.loads(open(log._snapshot_path, encoding="utf-8").read())
+    assert snapshot["seq"] == 2 and snapshot["content"] == dataset_version(snapshot["doc"])
+    log.add_week({"week_ending": "2026-02-06", "gross_leases": 1})
+    restarted = reopen(directory)
+    assert restarted.get() == log.get()
+    assert restarted.seq == 3
+    # The snapshot's content hash still resolves to a delta after the restart
+    ops, _ = restarted.delta(snapshot["content"])
+    assert delta.apply(copy.deepcopy(snapshot["doc"]), ops) == restarted.get()[0]
+
+
+def test_readers_copy_is_not_touched_by_later_writes(directory):
+    log = reopen(directory)
+    doc, version = log.get()
+    log.add_week(week(23))
+    log.remove_week("2026-01-02")
+    assert doc == SEED and dataset_version(doc) == version
+
+
+def test_store_puts_go_through_the_log(tmp_path):
+    store = DatasetStore(str(tmp_path))
+    version = store.put("gwk", "leasing", copy.deepcopy(SEED), source="xlsx")
+    assert store.get("gwk", "leasing") == (SEED, version)
+    assert (tmp_path / "gwk" / "leasing.events.jsonl").exists()
+    assert store.matches("gwk", "leasing", dataset_version(SEED))